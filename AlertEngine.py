@@ -0,0 +1,265 @@
+import heapq
+import operator
+import re
+import threading
+
+from plugins.com_core447_PrusaLinkStatus.EtaEstimator import is_number
+from plugins.com_core447_PrusaLinkStatus.FarmSummary import ERROR_STATES
+
+# Used by status keys until the user writes their own rules
+DEFAULT_RULES = "state: FINISHED ERROR ATTENTION"
+
+INFO = "info"
+WARNING = "warning"
+ERROR = "error"
+# Key backgrounds, rgba
+ALERT_COLORS = {INFO: (38, 162, 105, 255), WARNING: (229, 165, 10, 255), ERROR: (192, 28, 40, 255)}
+LEVELS = (INFO, WARNING, ERROR)
+
+NUMBER = r"-?\d+(?:\.\d+)?"
+DURATION = rf"{NUMBER}[smh]?"
+DURATION_UNITS = {"s": 1, "m": 60, "h": 60 * 60}
+
+
+def parse_duration(text: str) -> float:
+    if text is None:
+        return 0
+    if text[-1] in DURATION_UNITS:
+        return float(text[:-1]) * DURATION_UNITS[text[-1]]
+    return float(text)
+
+
+class Rule:
+    """
+    Condition on the fields of one printer. The alert goes off once the condition held for duration seconds,
+    it is over as soon as the condition doesn't hold anymore.
+    Rules are compared by their text, keys with the same rule for a printer share one alert.
+    """
+    duration: float = 0
+
+    def __init__(self, text: str, fields):
+        self.text = text
+        # Fields the condition reads, the rule is only evaluated when one of them changed
+        self.fields = frozenset(fields)
+
+    def check(self, data: dict) -> bool:
+        raise NotImplementedError
+
+    def restarts(self, changed: set[str]) -> bool:
+        # Whether a change starts the duration over even though the condition still holds
+        return False
+
+    def get_level(self, data: dict) -> str:
+        return WARNING
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Rule) and self.text == other.text
+
+    def __hash__(self) -> int:
+        return hash(self.text)
+
+    def __lt__(self, other) -> bool:
+        # Breaks ties between equal deadlines
+        return self.text < other.text
+
+
+class StateRule(Rule):
+    """state: FINISHED ERROR"""
+    def __init__(self, text: str, states):
+        super().__init__(text, {"state"})
+        self.states = frozenset(states)
+
+    def check(self, data: dict) -> bool:
+        return data.get("state") in self.states
+
+    def restarts(self, changed: set[str]) -> bool:
+        # Going from one of the states to another is a new alert
+        return "state" in changed
+
+    def get_level(self, data: dict) -> str:
+        return ERROR if data.get("state") in ERROR_STATES else INFO
+
+
+class DeviationRule(Rule):
+    """temp_nozzle ~ target_nozzle > 10 for 2m, only while the target is set"""
+    def __init__(self, text: str, field: str, target_field: str, tolerance: float, duration: float):
+        super().__init__(text, {field, target_field})
+        self.field = field
+        self.target_field = target_field
+        self.tolerance = tolerance
+        self.duration = duration
+
+    def check(self, data: dict) -> bool:
+        value, target = data.get(self.field), data.get(self.target_field)
+        if not is_number(value) or not is_number(target) or target <= 0:
+            return False
+        return abs(value - target) > self.tolerance
+
+
+class ThresholdRule(Rule):
+    """temp_bed > 110 for 30s"""
+    OPERATORS = {">": operator.gt, "<": operator.lt}
+
+    def __init__(self, text: str, field: str, comparison: str, limit: float, duration: float):
+        super().__init__(text, {field})
+        self.field = field
+        self.compare = self.OPERATORS[comparison]
+        self.limit = limit
+        self.duration = duration
+
+    def check(self, data: dict) -> bool:
+        value = data.get(self.field)
+        return is_number(value) and self.compare(value, self.limit)
+
+
+class StallRule(Rule):
+    """progress still 10m, only while printing"""
+    def __init__(self, text: str, field: str, duration: float):
+        super().__init__(text, {field, "state"})
+        self.field = field
+        self.duration = duration
+
+    def check(self, data: dict) -> bool:
+        return data.get("state") == "PRINTING"
+
+    def restarts(self, changed: set[str]) -> bool:
+        return self.field in changed
+
+
+RULE_PATTERNS = (
+    (re.compile(r"^state\s*:\s*([A-Za-z_ ]+)$"), lambda text, m: StateRule(text, m[1].upper().split())),
+    (re.compile(rf"^(\w+)\s*~\s*(\w+)\s*>\s*({NUMBER})(?:\s+for\s+({DURATION}))?$"),
+     lambda text, m: DeviationRule(text, m[1], m[2], float(m[3]), parse_duration(m[4]))),
+    (re.compile(rf"^(\w+)\s*([<>])\s*({NUMBER})(?:\s+for\s+({DURATION}))?$"),
+     lambda text, m: ThresholdRule(text, m[1], m[2], float(m[3]), parse_duration(m[4]))),
+    (re.compile(rf"^(\w+)\s+still\s+({DURATION})$"), lambda text, m: StallRule(text, m[1], parse_duration(m[2]))),
+)
+
+
+def parse_rules(text: str) -> tuple[list[Rule], list[str]]:
+    """Rules separated by ";", returns the rules and the parts that aren't one."""
+    rules, invalid = [], []
+    for part in (text or "").split(";"):
+        part = " ".join(part.split())
+        if not part:
+            continue
+        for pattern, make_rule in RULE_PATTERNS:
+            match = pattern.match(part)
+            if match:
+                rules.append(make_rule(part, match))
+                break
+        else:
+            invalid.append(part)
+    return rules, invalid
+
+
+class Alert:
+    __slots__ = ("rule", "level", "since", "acknowledged")
+
+    def __init__(self, rule: Rule, level: str, since: float):
+        self.rule = rule
+        self.level = level
+        self.since = since
+        self.acknowledged = False
+
+
+class AlertEngine:
+    """
+    Alert rules of one printer, evaluated on the fetch thread with every poll.
+    Rules are indexed by the fields they read, a poll only evaluates the rules of its changed fields.
+    Rules waiting for their duration to pass sit in a heap of deadlines, so time passing without changes costs nothing either.
+    """
+    def __init__(self):
+        self.rules_by_owner: dict[object, list[Rule]] = {}
+        self.rules_by_field: dict[str, set[Rule]] = {}
+        # When the condition of a rule started to hold
+        self.since: dict[Rule, float] = {}
+        self.deadlines: list[tuple[float, Rule]] = []
+        self.active: dict[Rule, Alert] = {}
+        # Rules that were added or removed since the last poll
+        self.new_rules: set[Rule] = set()
+        self.changed = False
+        self.lock = threading.Lock()
+
+    def set_rules(self, owner, rules: list[Rule]) -> None:
+        with self.lock:
+            if rules:
+                self.rules_by_owner[owner] = list(rules)
+            else:
+                self.rules_by_owner.pop(owner, None)
+            old_rules = set().union(*self.rules_by_field.values())
+            self.rules_by_field = {}
+            for owner_rules in self.rules_by_owner.values():
+                for rule in owner_rules:
+                    for field in rule.fields:
+                        self.rules_by_field.setdefault(field, set()).add(rule)
+            rules = set().union(*self.rules_by_field.values())
+
+            self.new_rules = (self.new_rules | (rules - old_rules)) & rules
+            for rule in old_rules - rules:
+                self.since.pop(rule, None)
+                if self.active.pop(rule, None) is not None:
+                    self.changed = True
+
+    def evaluate(self, data: dict, changed: set[str], now: float) -> bool:
+        """Updates the alerts with a new poll, returns whether they changed."""
+        with self.lock:
+            alerts_changed, self.changed = self.changed, False
+            if data is None:
+                # Nothing is known about the printer anymore
+                alerts_changed |= bool(self.active)
+                self.active.clear()
+                self.since.clear()
+                self.deadlines.clear()
+                return alerts_changed
+
+            touched = self.new_rules
+            self.new_rules = set()
+            for field in changed:
+                touched.update(self.rules_by_field.get(field, ()))
+            for rule in touched:
+                alerts_changed |= self.evaluate_rule(rule, data, changed, now)
+
+            # Rules whose condition held without changes until their deadline
+            while self.deadlines and self.deadlines[0][0] <= now:
+                deadline, rule = heapq.heappop(self.deadlines)
+                since = self.since.get(rule)
+                if since is not None and since + rule.duration == deadline and rule not in self.active:
+                    self.active[rule] = Alert(rule, rule.get_level(data), since)
+                    alerts_changed = True
+            return alerts_changed
+
+    def evaluate_rule(self, rule: Rule, data: dict, changed: set[str], now: float) -> bool:
+        if not rule.check(data):
+            self.since.pop(rule, None)
+            return self.active.pop(rule, None) is not None
+        if rule in self.since and not rule.restarts(changed):
+            # Already going off or waiting for its deadline
+            return False
+
+        self.since[rule] = now
+        alerts_changed = self.active.pop(rule, None) is not None
+        if rule.duration <= 0:
+            self.active[rule] = Alert(rule, rule.get_level(data), now)
+            return True
+        heapq.heappush(self.deadlines, (now + rule.duration, rule))
+        return alerts_changed
+
+    def acknowledge(self) -> bool:
+        with self.lock:
+            alerts = [alert for alert in self.active.values() if not alert.acknowledged]
+            for alert in alerts:
+                alert.acknowledged = True
+            return bool(alerts)
+
+    def get_alerts(self) -> list[Alert]:
+        with self.lock:
+            return list(self.active.values())
+
+    def get_level(self) -> tuple[str, bool]:
+        """Highest level of the active alerts and whether any of them isn't acknowledged yet, None without alerts."""
+        alerts = self.get_alerts()
+        if not alerts:
+            return None, False
+        return (max((alert.level for alert in alerts), key=LEVELS.index),
+                any(not alert.acknowledged for alert in alerts))
@@ -0,0 +1,56 @@
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """
+    Stops requests to a printer after repeated failures. Once open, a single probe request is let through
+    after reset_timeout. If it fails too, the breaker opens again for twice as long, up to max_reset_timeout.
+    """
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 10, max_reset_timeout: float = 300):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.state = CLOSED
+        self.failures = 0
+        self.current_timeout = reset_timeout
+        self.retry_at = 0.0
+
+    def allow_request(self, now: float = None) -> bool:
+        if now is None:
+            now = time.monotonic()
+        if self.state == OPEN and now >= self.retry_at:
+            self.state = HALF_OPEN
+            return True
+        return self.state == CLOSED
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+        self.current_timeout = self.reset_timeout
+
+    def record_failure(self, now: float = None) -> None:
+        if now is None:
+            now = time.monotonic()
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            # The probe failed, wait longer before the next one
+            self.current_timeout = min(self.max_reset_timeout, self.current_timeout * 2)
+            self.open(now)
+        elif self.state == CLOSED and self.failures >= self.failure_threshold:
+            self.open(now)
+
+    def open(self, now: float) -> None:
+        self.state = OPEN
+        self.retry_at = now + self.current_timeout
+
+    def get_retry_delay(self, now: float = None) -> float:
+        if self.state != OPEN:
+            return 0
+        if now is None:
+            now = time.monotonic()
+        return max(0, self.retry_at - now)
@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import Callable
+
+from loguru import logger as log
+
+from plugins.com_core447_PrusaLinkStatus.Diagnostics import Diagnostics
+
+# Pseudo field that changes whenever a printer goes from reachable to unreachable or back
+AVAILABILITY_FIELD = "_available"
+# Pseudo field that changes whenever an alert of a printer goes off, ends or is acknowledged
+ALERT_FIELD = "_alerts"
+# Every subscriber of a printer gets these, whatever fields it subscribed to
+CONTROL_FIELDS = frozenset({AVAILABILITY_FIELD, ALERT_FIELD})
+
+
+class Subscription:
+    def __init__(self, host: str, fields: frozenset, callback: Callable[[set[str]], None], name: str = None):
+        self.host = host
+        # Key the render time is counted for in the diagnostics
+        self.name = name or host
+        # None subscribes to every field
+        self.fields = fields
+        self.callback = callback
+
+
+class DataBus:
+    """
+    Delivers printer updates from the fetch thread to the actions interested in the changed fields.
+    Everything that changed until the main loop gets to it is handed over in one batch,
+    each subscriber is called once with all of its changed fields.
+    """
+    def __init__(self, dispatch: Callable, diagnostics: Diagnostics = None):
+        # Schedules a callable on the main loop, GLib.idle_add in the plugin
+        self.dispatch = dispatch
+        self.diagnostics = diagnostics
+        self.subscriptions: dict[str, dict[str, set[Subscription]]] = {}
+        self.wildcard_subscriptions: dict[str, set[Subscription]] = {}
+        # Changed fields per subscription and when the oldest of those changes was published
+        self.pending: dict[Subscription, tuple[set[str], float]] = {}
+        # Subscriptions per diagnostics name, a key's render times are dropped with its last subscription
+        self.names: dict[str, set[Subscription]] = {}
+        self.flush_scheduled = False
+        self.lock = threading.Lock()
+
+    def subscribe(self, host: str, fields, callback: Callable[[set[str]], None], name: str = None) -> Subscription:
+        subscription = Subscription(host, frozenset(fields) if fields is not None else None, callback, name)
+        with self.lock:
+            self.names.setdefault(subscription.name, set()).add(subscription)
+            if subscription.fields is None:
+                self.wildcard_subscriptions.setdefault(host, set()).add(subscription)
+            else:
+                by_field = self.subscriptions.setdefault(host, {})
+                for field in subscription.fields | CONTROL_FIELDS:
+                    by_field.setdefault(field, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription is None:
+            return
+        with self.lock:
+            self.pending.pop(subscription, None)
+            named = self.names.get(subscription.name, set())
+            if subscription in named:
+                named.discard(subscription)
+                if not named:
+                    del self.names[subscription.name]
+                    if self.diagnostics is not None:
+                        self.diagnostics.forget_render(subscription.name)
+            if subscription.fields is None:
+                self.wildcard_subscriptions.get(subscription.host, set()).discard(subscription)
+                return
+            by_field = self.subscriptions.get(subscription.host, {})
+            for field in subscription.fields | CONTROL_FIELDS:
+                subscribers = by_field.get(field)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del by_field[field]
+
+    def publish(self, host: str, changed: set[str]) -> None:
+        if not changed:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            by_field = self.subscriptions.get(host, {})
+            for field in changed:
+                for subscription in by_field.get(field, ()):
+                    self.pending.setdefault(subscription, (set(), now))[0].add(field)
+            for subscription in self.wildcard_subscriptions.get(host, ()):
+                self.pending.setdefault(subscription, (set(), now))[0].update(changed)
+
+            if self.pending and not self.flush_scheduled:
+                self.flush_scheduled = True
+                self.dispatch(self.flush)
+
+    def flush(self) -> bool:
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.flush_scheduled = False
+
+        for subscription, (changed, published) in pending.items():
+            start = time.perf_counter()
+            try:
+                subscription.callback(changed)
+            except Exception as e:
+                log.error(f"Error while handling update of {subscription.host}: {e}")
+            if self.diagnostics is not None:
+                end = time.perf_counter()
+                self.diagnostics.record_render(subscription.name, end - start)
+                self.diagnostics.record_lag(end - published)
+        # Don't repeat when run from GLib.idle_add
+        return False
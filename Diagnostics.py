@@ -0,0 +1,151 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+# Upper bucket bounds in milliseconds, the last bucket takes everything above
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+# Error classes of failed fetches
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+ERROR_AUTH = "auth"
+ERROR_JSON = "json-decode"
+
+
+def http_error(status: int) -> str:
+    return f"http-{status}"
+
+
+class Histogram:
+    """Counts of durations in fixed logarithmic buckets, constant size no matter how many samples it gets."""
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, milliseconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def percentile(self, p: float) -> float:
+        # Upper bound of the bucket the percentile falls into, but never more than the slowest sample
+        if self.count == 0:
+            return 0
+        rank = p * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count > 0:
+                return min(BUCKETS[i], round(self.max, 2)) if i < len(BUCKETS) else round(self.max, 2)
+        return round(self.max, 2)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2) if self.count else 0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max, 2),
+            "buckets": {f"<={bound}" if i < len(BUCKETS) else f">{BUCKETS[-1]}": count
+                        for i, (bound, count) in enumerate(zip(BUCKETS + (None,), self.counts)) if count},
+        }
+
+
+class Diagnostics:
+    """
+    Status latencies and errors per printer, latencies of the other endpoints, render time per key
+    and the lag between a fetch finishing and its update being shown. Written from the fetch thread and the main loop.
+    """
+    def __init__(self):
+        self.started = time.time()
+        # Status polls per host, they set the pace of the updates
+        self.fetch_latency: dict[str, Histogram] = {}
+        # The slower, rarer job, info and storage requests per endpoint name
+        self.endpoint_latency: dict[str, Histogram] = {}
+        self.errors: dict[str, dict[str, int]] = {}
+        self.render_time: dict[str, Histogram] = {}
+        self.display_lag = Histogram()
+        self.lock = threading.Lock()
+
+    def record_fetch(self, host: str, seconds: float, error: str = None, endpoint: str = "status") -> None:
+        with self.lock:
+            if endpoint == "status":
+                self.fetch_latency.setdefault(host, Histogram()).add(seconds * 1000)
+            else:
+                self.endpoint_latency.setdefault(endpoint, Histogram()).add(seconds * 1000)
+                if error is not None:
+                    error = f"{endpoint} {error}"
+            if error is not None:
+                errors = self.errors.setdefault(host, {})
+                errors[error] = errors.get(error, 0) + 1
+
+    def record_render(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.render_time.setdefault(name, Histogram()).add(seconds * 1000)
+
+    def forget_render(self, name: str) -> None:
+        # The key went away, its histogram would otherwise stay forever
+        with self.lock:
+            self.render_time.pop(name, None)
+
+    def record_lag(self, seconds: float) -> None:
+        with self.lock:
+            self.display_lag.add(seconds * 1000)
+
+    def get_error_count(self) -> int:
+        with self.lock:
+            return sum(sum(errors.values()) for errors in self.errors.values())
+
+    def get_slowest_printer(self) -> tuple[str, float]:
+        with self.lock:
+            if not self.fetch_latency:
+                return None, 0
+            host = max(self.fetch_latency, key=lambda host: self.fetch_latency[host].percentile(0.95))
+            return host, self.fetch_latency[host].percentile(0.95)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "uptime_s": round(time.time() - self.started),
+                "printers": {
+                    host: {"fetch": histogram.to_dict(), "errors": dict(self.errors.get(host, {}))}
+                    for host, histogram in self.fetch_latency.items()
+                },
+                "endpoints": {name: histogram.to_dict() for name, histogram in self.endpoint_latency.items()},
+                "render": {name: histogram.to_dict() for name, histogram in self.render_time.items()},
+                "display_lag": self.display_lag.to_dict(),
+            }
+
+    def to_text(self) -> str:
+        snapshot = self.snapshot()
+        lines = [f"Uptime: {snapshot['uptime_s']} s", "", "Printers (fetch latency p50/p95/p99/max ms, errors):"]
+        for host, printer in sorted(snapshot["printers"].items(), key=lambda item: -item[1]["fetch"]["p95_ms"]):
+            fetch = printer["fetch"]
+            errors = ", ".join(f"{name}: {count}" for name, count in printer["errors"].items()) or "none"
+            lines.append(f"  {host:<24} {fetch['p50_ms']}/{fetch['p95_ms']}/{fetch['p99_ms']}/{fetch['max_ms']} "
+                         f"({fetch['count']} fetches) errors: {errors}")
+        lines += ["", "Other endpoints (latency p50/p95/max ms):"]
+        for name, fetch in sorted(snapshot["endpoints"].items()):
+            lines.append(f"  {name:<24} {fetch['p50_ms']}/{fetch['p95_ms']}/{fetch['max_ms']} ({fetch['count']} fetches)")
+        lines += ["", "Render time per key (p50/p95/max ms):"]
+        for name, render in sorted(snapshot["render"].items(), key=lambda item: -item[1]["p95_ms"]):
+            lines.append(f"  {name:<40} {render['p50_ms']}/{render['p95_ms']}/{render['max_ms']} ({render['count']} renders)")
+        lag = snapshot["display_lag"]
+        lines += ["", f"Fetch to display lag p50/p95/max ms: {lag['p50_ms']}/{lag['p95_ms']}/{lag['max_ms']}"]
+        return "\n".join(lines)
+
+    def dump(self, directory: str) -> tuple[str, str]:
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, "diagnostics.json")
+        text_path = os.path.join(directory, "diagnostics.txt")
+        with open(json_path, "w") as file:
+            json.dump(self.snapshot(), file, indent=4)
+        with open(text_path, "w") as file:
+            file.write(self.to_text())
+        return json_path, text_path
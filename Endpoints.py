@@ -0,0 +1,188 @@
+from typing import Callable, NamedTuple
+
+from plugins.com_core447_PrusaLinkStatus.EtaEstimator import FIELDS as ESTIMATED_FIELDS
+
+
+class Endpoint(NamedTuple):
+    name: str
+    path: str
+    # Seconds between polls, None for the status endpoint which is timed by the PollScheduler
+    interval: float
+    # Turns the response into flat label fields
+    parse: Callable[[dict], dict]
+    # Fields the endpoint provides, used to check label placeholders
+    fields: tuple
+    # Only polled while the printer has a job, refetched as soon as the job id changes
+    job_bound: bool = False
+
+
+def drop_none(fields: dict) -> dict:
+    return {key: value for key, value in fields.items() if value is not None}
+
+
+def to_number(value):
+    if type(value) is int or type(value) is float:
+        # NaN is the only value that isn't equal to itself
+        return value if value == value else None
+    if isinstance(value, str):
+        try:
+            return to_number(float(value))
+        except ValueError:
+            return None
+    return None
+
+
+def to_int(value):
+    value = to_number(value)
+    return round(value) if value is not None else None
+
+
+def to_state(value):
+    return value.upper() if isinstance(value, str) else None
+
+
+# Status fields with the section and key of the status response they come from and the conversion to their unit.
+# Only these are read, so a key of one section can never overwrite a field of another.
+STATUS_SOURCES = (
+    ("state", "printer", "state", to_state),
+    ("temp_bed", "printer", "temp_bed", to_number),  # °C
+    ("target_bed", "printer", "target_bed", to_number),
+    ("temp_nozzle", "printer", "temp_nozzle", to_number),
+    ("target_nozzle", "printer", "target_nozzle", to_number),
+    ("axis_x", "printer", "axis_x", to_number),  # mm
+    ("axis_y", "printer", "axis_y", to_number),
+    ("axis_z", "printer", "axis_z", to_number),
+    ("flow", "printer", "flow", to_number),  # %
+    ("speed", "printer", "speed", to_number),
+    ("fan_hotend", "printer", "fan_hotend", to_int),  # rpm
+    ("fan_print", "printer", "fan_print", to_int),
+    ("id", "job", "id", to_int),
+    ("progress", "job", "progress", to_number),  # %
+    ("time_remaining", "job", "time_remaining", to_int),  # s
+    ("time_printing", "job", "time_printing", to_int),
+)
+
+
+def parse_status(status: dict) -> "StatusRecord":
+    values = [None] * len(FIELDS)
+    sections = {"printer": status.get("printer") or {}, "job": status.get("job") or {}}
+    for index, section, key, convert in STATUS_OFFSETS:
+        values[index] = convert(sections[section].get(key))
+    return StatusRecord(values)
+
+
+def parse_job(job: dict) -> dict:
+    file = job.get("file") or {}
+    refs = file.get("refs") or {}
+    return drop_none({
+        "file_name": file.get("display_name") or file.get("name"),
+        "file_path": file.get("path"),
+        "file_size": file.get("size"),
+        "thumbnail": refs.get("thumbnail"),
+    })
+
+
+def parse_info(info: dict) -> dict:
+    return drop_none({
+        "printer_name": info.get("name"),
+        "hostname": info.get("hostname"),
+        "serial": info.get("serial"),
+        "location": info.get("location"),
+        "nozzle_diameter": info.get("nozzle_diameter"),
+    })
+
+
+def parse_storage(storage: dict) -> dict:
+    storages = [entry for entry in storage.get("storage_list") or () if entry.get("available", True)]
+    if not storages:
+        return {}
+    return drop_none({
+        "storage_name": storages[0].get("name"),
+        "storage_free": storages[0].get("free_space"),
+        "storage_total": storages[0].get("total_space"),
+    })
+
+
+STATUS = Endpoint("status", "/api/v1/status", None, parse_status, tuple(source[0] for source in STATUS_SOURCES))
+JOB = Endpoint("job", "/api/v1/job", 60, parse_job,
+               ("file_name", "file_path", "file_size", "thumbnail"), job_bound=True)
+INFO = Endpoint("info", "/api/v1/info", 60 * 60, parse_info,
+                ("printer_name", "hostname", "serial", "location", "nozzle_diameter"))
+STORAGE = Endpoint("storage", "/api/v1/storage", 5 * 60, parse_storage,
+                   ("storage_name", "storage_free", "storage_total"))
+
+# Requested alongside a successful status poll when they are due, each in a task of its own
+EXTRA_ENDPOINTS = (JOB, INFO, STORAGE)
+
+# Every field the data of a printer can have
+FIELDS = STATUS.fields + tuple(field for endpoint in EXTRA_ENDPOINTS for field in endpoint.fields) + ESTIMATED_FIELDS
+FIELD_SET = frozenset(FIELDS)
+OFFSETS = {field: index for index, field in enumerate(FIELDS)}
+STATUS_OFFSETS = tuple((OFFSETS[field], section, key, convert) for field, section, key, convert in STATUS_SOURCES)
+
+
+class StatusRecord:
+    """
+    Data of one printer poll, a flat list with every known field at a fixed offset and None for missing ones.
+    Reads and writes like a dict, so templates, the estimator and alert rules take it as it is.
+    """
+    __slots__ = ("values",)
+
+    def __init__(self, values: list = None):
+        self.values = values if values is not None else [None] * len(FIELDS)
+
+    def get(self, field: str, default=None):
+        index = OFFSETS.get(field)
+        if index is None:
+            return default
+        value = self.values[index]
+        return default if value is None else value
+
+    def __getitem__(self, field: str):
+        value = self.get(field)
+        if value is None:
+            raise KeyError(field)
+        return value
+
+    def __setitem__(self, field: str, value) -> None:
+        self.values[OFFSETS[field]] = value
+
+    def __delitem__(self, field: str) -> None:
+        if field not in self:
+            raise KeyError(field)
+        self.values[OFFSETS[field]] = None
+
+    def __contains__(self, field: str) -> bool:
+        index = OFFSETS.get(field)
+        return index is not None and self.values[index] is not None
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.values) - self.values.count(None)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, StatusRecord):
+            return self.values == other.values
+        return isinstance(other, dict) and dict(self.items()) == other
+
+    def __repr__(self) -> str:
+        return f"StatusRecord({dict(self.items())})"
+
+    def keys(self) -> list[str]:
+        return [field for field, value in zip(FIELDS, self.values) if value is not None]
+
+    def items(self) -> list[tuple]:
+        return [(field, value) for field, value in zip(FIELDS, self.values) if value is not None]
+
+    def update(self, fields: dict) -> None:
+        for field, value in fields.items():
+            self[field] = value
+
+    def copy(self) -> "StatusRecord":
+        return StatusRecord(list(self.values))
+
+    def diff(self, other: "StatusRecord") -> set[str]:
+        """Fields that differ from other, compared offset by offset."""
+        return {field for field, value, other_value in zip(FIELDS, self.values, other.values) if value != other_value}
@@ -0,0 +1,107 @@
+import math
+import time
+from collections import deque
+
+# Fields the estimator adds to the printer data
+FIELDS = ("eta", "eta_clock", "progress_rate")
+
+
+def is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and not math.isnan(value)
+
+
+class EtaEstimator:
+    """
+    Finish time of one printer's job from a least squares line through the last window points where its progress changed.
+    The sums of the regression are updated when a point enters or leaves the window, each sample costs O(1).
+    Points are placed by print time, so pauses don't drag the rate down.
+    Until there are min_points, PrusaLink's own time_remaining is passed through.
+    """
+    def __init__(self, window: int = 10, min_points: int = 3):
+        self.window = window
+        self.min_points = min_points
+        self.reset()
+
+    def reset(self, job_id=None) -> None:
+        self.job_id = job_id
+        self.points: deque[tuple[float, float]] = deque()
+        self.sum_x = self.sum_y = self.sum_xx = self.sum_xy = 0.0
+        # Print time is used when the printer reports it, wall time otherwise
+        self.use_print_time: bool = None
+        # x is stored relative to the first point of a job to keep the sums small
+        self.origin: float = None
+        self.last_progress: float = None
+
+    def add_point(self, x: float, y: float) -> None:
+        self.points.append((x, y))
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_xy += x * y
+        if len(self.points) > self.window:
+            old_x, old_y = self.points.popleft()
+            self.sum_x -= old_x
+            self.sum_y -= old_y
+            self.sum_xx -= old_x * old_x
+            self.sum_xy -= old_x * old_y
+
+    def get_line(self) -> tuple[float, float]:
+        # Intercept and slope in percent per second, None while there aren't enough points
+        n = len(self.points)
+        if n < self.min_points:
+            return None
+        denominator = n * self.sum_xx - self.sum_x * self.sum_x
+        if denominator <= 0:
+            return None
+        slope = (n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+        if slope <= 0:
+            return None
+        return (self.sum_y - slope * self.sum_x) / n, slope
+
+    def update(self, data: dict, now: float = None) -> dict:
+        """Adds eta (seconds), eta_clock (HH:MM) and progress_rate (percent per hour) to data."""
+        if now is None:
+            now = time.time()
+        progress = data.get("progress")
+        job_id = data.get("id")
+        if job_id is None or not is_number(progress):
+            self.reset()
+            return data
+
+        print_time = data.get("time_printing")
+        if (job_id != self.job_id or self.use_print_time is None
+                or (self.last_progress is not None and progress < self.last_progress)):
+            # A new job or a restarted one
+            self.reset(job_id)
+            self.use_print_time = is_number(print_time)
+        x = print_time if self.use_print_time else now
+        if not is_number(x):
+            return data
+        if self.origin is None:
+            self.origin = x
+        x -= self.origin
+
+        # Progress only moves in steps, the moment it changes is the exact time that value was reached.
+        # The first value seen of a job that is already running is somewhere within its step, so it is skipped.
+        if progress != self.last_progress:
+            if self.last_progress is not None or progress == 0:
+                self.add_point(x, progress)
+            self.last_progress = progress
+
+        line = self.get_line()
+        if progress >= 100:
+            eta = 0
+        elif line is not None:
+            intercept, slope = line
+            # Progress the line expects now, between the steps the reported value lags behind
+            expected = min(100, progress + 1, max(progress, intercept + slope * x))
+            eta = round((100 - expected) / slope)
+            data["progress_rate"] = round(slope * 60 * 60, 2)
+        elif is_number(data.get("time_remaining")) and data["time_remaining"] >= 0:
+            eta = data["time_remaining"]
+        else:
+            return data
+
+        data["eta"] = eta
+        data["eta_clock"] = time.strftime("%H:%M", time.localtime(now + eta))
+        return data
@@ -0,0 +1,189 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+from plugins.com_core447_PrusaLinkStatus.DataBus import AVAILABILITY_FIELD, DataBus
+from plugins.com_core447_PrusaLinkStatus.EtaEstimator import is_number
+
+# Pseudo host the summary is published under on the DataBus, with the fields below
+FARM_HOST = "*farm*"
+SUMMARY_FIELDS = ("printers", "counts", "soonest", "error")
+
+OFFLINE = "OFFLINE"
+ERROR_STATES = frozenset({"ERROR", "ATTENTION"})
+# Printer fields the summary is built from
+INPUT_FIELDS = frozenset({"state", "eta", "temp_nozzle", "printer_name", AVAILABILITY_FIELD})
+# Finish times are compared in whole minutes, so an eta that wobbles by a few seconds changes nothing
+FINISH_RESOLUTION = 60
+
+
+class PrinterSummary:
+    __slots__ = ("host", "name", "state", "finish", "temp")
+
+    def __init__(self, host: str):
+        self.host = host
+        self.name = host
+        self.state: str = None
+        # Timestamp the current job should finish at, None when not printing
+        self.finish: float = None
+        self.temp: float = None
+
+
+class FarmSummary:
+    """
+    Counts by state, the soonest finishing job and the hottest printer in an error state over all registered printers.
+    Printers report their changed fields from the fetch thread, an update only touches that printer's entry.
+    Changes of the summary itself are published on the DataBus under FARM_HOST.
+    """
+    def __init__(self, bus: DataBus = None):
+        self.bus = bus
+        self.printers: dict[str, PrinterSummary] = {}
+        # Sorted, the order dials page through
+        self.hosts: list[str] = []
+        self.counts: dict[str, int] = {}
+        # (finish, host) of printing printers, entries that no longer match the printer are dropped when they reach the top
+        self.finish_heap: list[tuple[float, str]] = []
+        self.errors: set[str] = set()
+        self.lock = threading.Lock()
+
+    def update(self, printer, changed: set[str]) -> None:
+        if printer.host in self.printers and changed.isdisjoint(INPUT_FIELDS):
+            return
+
+        data = printer.data
+        host = printer.host
+        with self.lock:
+            if printer.users <= 0:
+                # Released while its last poll was still running
+                return
+            old_soonest, old_error = self.get_soonest_key(), self.get_error_key()
+            published = set()
+            summary = self.printers.get(host)
+            if summary is None:
+                summary = self.printers[host] = PrinterSummary(host)
+                insort(self.hosts, host)
+                published.add("printers")
+
+            state = OFFLINE if data is None or printer.stale else data.get("state", OFFLINE)
+            if state != summary.state:
+                if summary.state is not None:
+                    self.add_count(summary.state, -1)
+                self.add_count(state, 1)
+                summary.state = state
+                published.add("counts")
+                if state in ERROR_STATES:
+                    self.errors.add(host)
+                else:
+                    self.errors.discard(host)
+
+            if data is not None:
+                summary.name = data.get("printer_name") or host
+                summary.temp = data.get("temp_nozzle")
+
+            finish = None
+            eta = data.get("eta") if data is not None else None
+            if state == "PRINTING" and is_number(eta) and printer.data_time is not None:
+                finish = round((printer.data_time + eta) / FINISH_RESOLUTION) * FINISH_RESOLUTION
+            if finish != summary.finish:
+                summary.finish = finish
+                if finish is not None:
+                    heapq.heappush(self.finish_heap, (finish, host))
+                    self.compact_heap()
+
+            if self.get_soonest_key() != old_soonest:
+                published.add("soonest")
+            if self.get_error_key() != old_error:
+                published.add("error")
+
+        if self.bus is not None:
+            self.bus.publish(FARM_HOST, published)
+
+    def remove(self, host: str) -> None:
+        with self.lock:
+            if host not in self.printers:
+                return
+            old_soonest, old_error = self.get_soonest_key(), self.get_error_key()
+            summary = self.printers.pop(host)
+            del self.hosts[bisect_left(self.hosts, host)]
+            self.add_count(summary.state, -1)
+            self.errors.discard(host)
+            published = {"printers", "counts"}
+            if self.get_soonest_key() != old_soonest:
+                published.add("soonest")
+            if self.get_error_key() != old_error:
+                published.add("error")
+
+        if self.bus is not None:
+            self.bus.publish(FARM_HOST, published)
+
+    def add_count(self, state: str, delta: int) -> None:
+        count = self.counts.get(state, 0) + delta
+        if count > 0:
+            self.counts[state] = count
+        else:
+            self.counts.pop(state, None)
+
+    def compact_heap(self) -> None:
+        # Every finish change pushes a new entry, rebuild once the outdated ones outnumber the valid ones
+        if len(self.finish_heap) <= 2 * len(self.printers) + 16:
+            return
+        self.finish_heap = [(summary.finish, host) for host, summary in self.printers.items() if summary.finish is not None]
+        heapq.heapify(self.finish_heap)
+
+    def get_soonest_summary(self) -> PrinterSummary:
+        heap = self.finish_heap
+        while heap:
+            finish, host = heap[0]
+            summary = self.printers.get(host)
+            if summary is not None and summary.finish == finish:
+                return summary
+            heapq.heappop(heap)
+        return None
+
+    def get_soonest_key(self) -> tuple:
+        summary = self.get_soonest_summary()
+        return (summary.host, summary.name, summary.finish) if summary is not None else None
+
+    def get_error_summary(self) -> PrinterSummary:
+        # Only the printers in an error state are looked at, usually none or a few
+        hottest = None
+        for host in self.errors:
+            summary = self.printers[host]
+            if hottest is None or (summary.temp or 0) > (hottest.temp or 0):
+                hottest = summary
+        return hottest
+
+    def get_error_key(self) -> tuple:
+        summary = self.get_error_summary()
+        return (summary.host, summary.name, round(summary.temp or 0)) if summary is not None else None
+
+    def get_counts(self) -> dict[str, int]:
+        with self.lock:
+            return dict(self.counts)
+
+    def get_total(self) -> int:
+        return len(self.hosts)
+
+    def get_soonest(self) -> tuple[str, str, float]:
+        """Host, name and finish timestamp of the job that finishes first, None when nothing prints."""
+        with self.lock:
+            return self.get_soonest_key()
+
+    def get_hottest_error(self) -> tuple[str, str, int]:
+        """Host, name and nozzle temperature of the hottest printer in an error state, None when there is none."""
+        with self.lock:
+            return self.get_error_key()
+
+    def get_page_host(self, host: str, step: int) -> str:
+        """The host step printers after host in the paging order, None stands for the overview before the first printer."""
+        with self.lock:
+            pages = [None] + self.hosts
+            index = 0
+            if host is not None:
+                position = bisect_left(self.hosts, host)
+                if position < len(self.hosts) and self.hosts[position] == host:
+                    index = position + 1
+                else:
+                    # The printer is gone, step from the gap it left
+                    index = position if step > 0 else position + 1
+            return pages[(index + step) % len(pages)]
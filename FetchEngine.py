@@ -0,0 +1,78 @@
+import asyncio
+import concurrent.futures
+import threading
+
+
+class FetchEngine:
+    """
+    Runs all printer requests on one asyncio event loop in a background thread.
+    A single aiohttp session keeps connections alive between polls, so only the first request to a printer pays for the tcp handshake.
+    """
+    def __init__(self, pool_size: int = 32, timeout: float = 5, connect_timeout: float = 2, keepalive_timeout: float = 30):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        # Printers on the local network either answer quickly or are off, don't wait for the full timeout then
+        self.connect_timeout = connect_timeout
+        self.keepalive_timeout = keepalive_timeout
+
+        self.loop = asyncio.new_event_loop()
+        self.session = None
+        self.ready = threading.Event()
+        self.thread: threading.Thread = None
+
+    def start(self) -> None:
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self.run_loop, name="printer status fetch", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    def stop(self) -> None:
+        if self.thread is None:
+            return
+        self.submit(self.close_session()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.thread = None
+
+    def run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.open_session())
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def open_session(self) -> None:
+        # aiohttp takes a while to import, only pay for it once the first printer is added
+        import aiohttp
+
+        # One connection per printer is enough, PrusaLink handles requests sequentially anyway
+        connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=1,
+                                         keepalive_timeout=self.keepalive_timeout, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=self.connect_timeout))
+
+    async def close_session(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def get_json(self, host: str, key: str, path: str, etag: str = None) -> tuple[int, dict, str]:
+        # With the etag of the last response the printer can answer 304 Not Modified instead of sending it again
+        url = f"http://{host}{path}"
+        headers = {"X-Api-Key": key or ""}
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        async with self.session.get(url, headers=headers) as response:
+            etag = response.headers.get("ETag")
+            if response.status != 200:
+                # Drain the body so the connection can be reused
+                await response.read()
+                return response.status, None, etag
+            return response.status, await response.json(content_type=None), etag
+
+    async def get_bytes(self, host: str, key: str, path: str) -> tuple[int, bytes]:
+        url = f"http://{host}{path}"
+        async with self.session.get(url, headers={"X-Api-Key": key or ""}) as response:
+            return response.status, await response.read()
@@ -3,13 +3,11 @@ from src.backend.DeckManagement.DeckController import DeckController
 from src.backend.PageManagement.Page import Page
 from src.backend.PluginManager.PluginBase import PluginBase
 
-import matplotlib.pyplot as plt
-import matplotlib
-# Use different backend to prevent errors with running plt in different threads
-matplotlib.use('agg')
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+from plugins.com_core447_PrusaLinkStatus.KeyFrame import FrameAction
+from plugins.com_core447_PrusaLinkStatus.GraphRenderer import GRAPH_SIZE, GraphFrame, GraphStyle, prepare_graph
+
 from PIL import Image
-import io
+import time
 
 # Import gtk
 import gi
@@ -18,102 +16,78 @@ gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
 from gi.repository import Gtk, Adw, Gdk
 
-class GraphBase(ActionBase):
+class GraphBase(FrameAction, ActionBase):
     def __init__(self, action_id: str, action_name: str,
                  deck_controller: "DeckController", page: Page, coords: str, plugin_base: PluginBase):
         super().__init__(action_id=action_id, action_name=action_name,
             deck_controller=deck_controller, page=page, coords=coords, plugin_base=plugin_base)
 
-        self.percentages: list[float] = []
         self.target = 280
+        self.shown_frame: GraphFrame = None
+        # Right edge of the last frame, the graph scrolls on from there even when no value changes
+        self.graph_time: float = None
 
-    def set_percentages_lenght(self, length: int):
-        if len(self.percentages) > length:
-            self.percentages = self.percentages[-length:]
-        elif len(self.percentages) < length:
-            for _ in range(length - len(self.percentages)):
-                self.percentages.insert(0, 0)
-        
-        return self.percentages
-    
-    def get_graph(self) -> Image.Image:
-        ## Get vars
+    def get_series(self, since: float) -> tuple[list[float], list[float]]:
+        # Returns timestamps and values newer than since, implemented by the graph actions
+        return [], []
+
+    def get_overlay_series(self, since: float) -> list[tuple[list[float], list[float]]]:
+        # Further (timestamps, values) series drawn as lines over the main one
+        return []
+
+    def get_graph_style(self) -> GraphStyle:
         settings = self.get_settings()
-        line_color = self.conv_color_to_plt(settings.get("line-color", [255, 255, 255, 255]))
-        fill_color = self.conv_color_to_plt(settings.get("fill-color", [255, 255, 255, 150]))
-        target_line_color = self.conv_color_to_plt(settings.get("target-line-color", [255, 255, 255, 150]))
-        line_width = settings.get("line-width", 5)
-        target_line_width = settings.get("target-line-width", 10)
-        time_period = settings.get("time-period", 15)
-        dynamic_scaling = settings.get("dynamic-scaling", False)
-        show_target_line = settings.get("show-target-line", False)
-
-        self.set_percentages_lenght(time_period)
-
-        # Create a new figure with a transparent background
-        fig = plt.figure(figsize=(6, 6))
-        fig.patch.set_alpha(0)
-        fig.patch.set_facecolor('none')
-
-        # Set the FigureCanvas to the backend
-        canvas = FigureCanvas(fig)
-
-        # Plot the data with a transparent background
-        ax = plt.Axes(fig, [0., 0., 1., 1.])
-        ax.set_axis_off()
-        fig.add_axes(ax)
-
-        ax.plot(self.percentages, color=line_color, linewidth=line_width)
-        ax.fill_between(range(len(self.percentages)), self.percentages, color=fill_color[:3], alpha=fill_color[3])
-
-        # Hide the spines
-        for spine in ax.spines.values():
-            spine.set_visible(False)
-
-        # Turn off the axis and set margins to zero
-        ax.margins(0)
-        ax.axis('off')
-
-         # If show_target_line is True, add a dashed line at the y value of self.target
-        if show_target_line:
-            ax.axhline(y=self.target, linewidth=target_line_width, linestyle='--', color=target_line_color[:3], alpha=target_line_color[3], zorder=5)
-
-        # Set the y-axis to range from 0 to 100
-        if not dynamic_scaling:
-            ax.set_ylim(0, self.target*1.2)
-
-        # Draw the canvas and retrieve the buffer
-        canvas.draw()
-        buf = io.BytesIO()
-        canvas.print_png(buf)
-
-        # Convert buffer to a Pillow Image
-        buf.seek(0)
-        img = Image.open(buf)
-
-        # The Pillow Image now has a transparent background
-        # img.show()  # If you want to display the image
-        # img.save('plot.png')  # If you want to save the image
-
-        plt.close()  # Close the plot to free resources
-
-        # Now 'img' is a Pillow Image object with a transparent background
-        return img
-    
-    def show_graph(self):
-        return
-        image = self.get_graph()
-        try:
-            image.verify()
-        except:
-            return
-        self.set_media(image)
-    
-    def conv_color_to_plt(self, color: list[int]) -> list[float]:
-        float_color: list[float] = []
-        for c in color:
-            float_color.append(c / 255)
-        return float_color
+        return GraphStyle(
+            line_color=tuple(settings.get("line-color", [255, 255, 255, 255])),
+            fill_color=tuple(settings.get("fill-color", [255, 255, 255, 150])),
+            target_line_color=tuple(settings.get("target-line-color", [255, 255, 255, 150])),
+            line_width=settings.get("line-width", 5),
+            target_line_width=settings.get("target-line-width", 10),
+            dynamic_scaling=settings.get("dynamic-scaling", False),
+            show_target_line=settings.get("show-target-line", False),
+        )
+
+    def get_graph_frame(self) -> GraphFrame:
+        time_period = self.get_settings().get("time-period", 15)
+        now = time.time()
+        self.graph_time = now
+        timestamps, values = self.get_series(now - time_period)
+        overlays = self.get_overlay_series(now - time_period)
+        for series_timestamps, series_values in [(timestamps, values)] + overlays:
+            if len(series_values) > 0:
+                # Hold the latest value until now so the line always reaches the right edge
+                series_timestamps.append(now)
+                series_values.append(series_values[-1])
+
+        return prepare_graph(values, self.target, self.get_graph_style(),
+                             timestamps=timestamps, time_range=(now - time_period, now), overlays=overlays)
+
+    def is_graph_scrolled(self) -> bool:
+        # Whether the time window moved by at least one pixel column since the last frame
+        if self.graph_time is None:
+            return False
+        time_period = self.get_settings().get("time-period", 15)
+        return time.time() - self.graph_time >= time_period / GRAPH_SIZE
+
+    def show_graph(self, commit: bool = True):
+        # With commit=False the image is only staged, for subclasses that update their labels in the same frame.
+        # Frames that aren't cached are drawn by the render pool and shown by on_graph_rendered.
+        graph_frame = self.get_graph_frame()
+        if graph_frame != self.shown_frame:
+            image = self.plugin_base.render_pool.render(self, graph_frame, self.on_graph_rendered,
+                                                        self.get_diagnostics_name())
+            if image is not None:
+                self.get_frame().set_media(image)
+                self.shown_frame = graph_frame
+        if commit:
+            self.get_frame().commit()
+
+    def on_graph_rendered(self, graph_frame: GraphFrame, image: Image.Image) -> None:
+        start = time.perf_counter()
+        self.get_frame().set_media(image)
+        self.shown_frame = graph_frame
+        self.get_frame().commit()
+        self.record_render(start)
     
     def get_config_rows(self) -> list:
         self.line_color_row = ColorRow()
@@ -131,7 +105,8 @@ class GraphBase(ActionBase):
         self.target_line_width_row = Adw.SpinRow.new_with_range(1, 30, 1)
         self.target_line_width_row.set_title("Target Line Width:")
 
-        self.time_period_row = Adw.SpinRow.new_with_range(1, 60, 1)
+        # Up to 12 hours, long windows are drawn from the downsampled telemetry tiers
+        self.time_period_row = Adw.SpinRow.new_with_range(1, 12 * 60 * 60, 1)
         self.time_period_row.set_title("Time Period (s):")
 
         self.dynamic_scaling_row = Adw.SwitchRow(title="Dynamic Y-axis Scaling:")
@@ -217,7 +192,6 @@ class GraphBase(ActionBase):
         settings = self.get_settings()
         settings["time-period"] = int(spin.get_value())
         self.set_settings(settings)
-        self.set_percentages_lenght(int(spin.get_value()))
         self.show_graph()
 
     def on_dynamic_scaling_change(self, switch, *args):
@@ -0,0 +1,146 @@
+from typing import NamedTuple
+
+from PIL import Image
+
+# Output size of the graphs, set_media scales them down to the key
+GRAPH_SIZE = 144
+# Graphs are drawn larger and scaled down for anti aliasing
+SUPERSAMPLING = 2
+# Line widths used to be matplotlib points on a 6 inch, 100 dpi figure
+POINTS_PER_IMAGE = 6 * 72
+
+
+class GraphStyle(NamedTuple):
+    line_color: tuple = (255, 255, 255, 255)
+    fill_color: tuple = (255, 255, 255, 150)
+    target_line_color: tuple = (255, 255, 255, 150)
+    line_width: float = 5
+    target_line_width: float = 10
+    dynamic_scaling: bool = False
+    show_target_line: bool = False
+    # One per overlay series, repeated when there are more overlays
+    overlay_colors: tuple = ((255, 140, 0, 255), (0, 170, 255, 255), (120, 220, 60, 255), (230, 60, 200, 255))
+
+
+def get_y_range(values: list[float], target: float, style: GraphStyle) -> tuple[float, float]:
+    # target is None for values without one, they are always scaled to their own range
+    if style.dynamic_scaling or target is None or target <= 0:
+        # Like matplotlib's autoscaling: the filled area always reaches down to 0
+        low = min(0, min(values, default=0))
+        high = max(values, default=0)
+        if style.show_target_line and target is not None:
+            low, high = min(low, target), max(high, target)
+    else:
+        low, high = 0, target * 1.2
+    if high <= low:
+        high = low + 1
+    return low, high
+
+
+def to_color(color) -> tuple:
+    color = tuple(int(c) for c in color)
+    if len(color) == 3:
+        color += (255,)
+    return color
+
+
+def draw_dashed_line(draw: "ImageDraw.ImageDraw", y: float, width: int, line_width: int, color: tuple) -> None:
+    # Same dash pattern matplotlib uses for "--"
+    dash, gap = 3.7 * line_width, 1.6 * line_width
+    x = 0
+    while x < width:
+        draw.line([(x, y), (min(width, x + dash), y)], fill=color, width=line_width)
+        x += dash + gap
+
+
+class GraphFrame(NamedTuple):
+    """Everything that ends up in a graph image, in canvas pixels. Equal frames produce equal images."""
+    points: tuple
+    zero: int
+    target_y: int
+    style: GraphStyle
+    size: int
+    # Points of the overlay series, drawn as lines on top of the main series
+    overlays: tuple = ()
+
+
+def simplify_points(points: list[tuple[int, int]]) -> tuple:
+    # Drop points in the middle of horizontal runs, a steady value then gives the same frame whatever the sample times were
+    simplified = []
+    for point in points:
+        if len(simplified) >= 2 and simplified[-1][1] == point[1] and simplified[-2][1] == point[1]:
+            simplified[-1] = point
+        elif len(simplified) >= 1 and simplified[-1] == point:
+            continue
+        else:
+            simplified.append(point)
+    return tuple(simplified)
+
+
+def prepare_graph(values: list[float], target: float, style: GraphStyle, size: int = GRAPH_SIZE,
+                  timestamps: list[float] = None, time_range: tuple[float, float] = None,
+                  overlays: list[tuple[list[float], list[float]]] = ()) -> GraphFrame:
+    """
+    Without timestamps the values are spread evenly over the width.
+    With timestamps and a (start, end) time_range they are placed by time, values outside the range are clipped.
+    overlays are further (timestamps, values) series, all series share the same y-axis.
+    """
+    canvas_size = size * SUPERSAMPLING
+    low, high = get_y_range(values + [value for _, overlay in overlays for value in overlay], target, style)
+    bottom = canvas_size - 1
+
+    def to_y(value: float) -> int:
+        return round(bottom - (value - low) / (high - low) * bottom)
+
+    def to_points(series: list[float], series_timestamps: list[float]) -> tuple:
+        if len(series) == 0:
+            return ()
+        if series_timestamps is not None and time_range is not None:
+            start, end = time_range
+            x_scale = (canvas_size - 1) / max(1e-9, end - start)
+            points = [(min(canvas_size - 1, max(0, round((t - start) * x_scale))), to_y(value)) for t, value in zip(series_timestamps, series)]
+        else:
+            step = (canvas_size - 1) / max(1, len(series) - 1)
+            points = [(round(i * step), to_y(value)) for i, value in enumerate(series)]
+        if len(points) == 1:
+            points.append((canvas_size - 1, points[0][1]))
+        return simplify_points(points)
+
+    target_y = to_y(target) if style.show_target_line and target is not None else None
+    overlay_points = tuple(to_points(overlay, overlay_timestamps) for overlay_timestamps, overlay in overlays)
+    return GraphFrame(to_points(values, timestamps), to_y(0), target_y, style, size, overlay_points)
+
+
+def draw_graph(frame: GraphFrame) -> Image.Image:
+    # Only imported once the first graph is drawn
+    from PIL import ImageDraw
+
+    canvas_size = frame.size * SUPERSAMPLING
+    scale = canvas_size / POINTS_PER_IMAGE
+    style = frame.style
+
+    image = Image.new("RGBA", (canvas_size, canvas_size), (0, 0, 0, 0))
+    # The RGBA mode blends translucent colors instead of overwriting pixels
+    draw = ImageDraw.Draw(image, "RGBA")
+
+    points = list(frame.points)
+    if len(points) > 0:
+        draw.polygon([(points[0][0], frame.zero)] + points + [(points[-1][0], frame.zero)], fill=to_color(style.fill_color))
+        draw.line(points, fill=to_color(style.line_color), width=max(1, round(style.line_width * scale)), joint="curve")
+
+    # Drawn in the same pass, a graph with overlays is still a single image
+    for i, overlay in enumerate(frame.overlays):
+        if len(overlay) > 0:
+            color = style.overlay_colors[i % len(style.overlay_colors)]
+            draw.line(list(overlay), fill=to_color(color), width=max(1, round(style.line_width * scale)), joint="curve")
+
+    if frame.target_y is not None:
+        draw_dashed_line(draw, frame.target_y, canvas_size, max(1, round(style.target_line_width * scale)),
+                         to_color(style.target_line_color))
+
+    return image.reduce(SUPERSAMPLING)
+
+
+def render_graph(values: list[float], target: float, style: GraphStyle, size: int = GRAPH_SIZE,
+                 timestamps: list[float] = None, time_range: tuple[float, float] = None) -> Image.Image:
+    return draw_graph(prepare_graph(values, target, style, size, timestamps, time_range))
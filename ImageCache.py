@@ -0,0 +1,53 @@
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+
+def get_image_size(image: Image.Image) -> int:
+    # Bytes of the decoded pixels
+    return image.width * image.height * len(image.getbands())
+
+
+class ImageCache:
+    """Least recently used cache of rendered images, shared by all keys of the plugin."""
+    def __init__(self, max_entries: int = 256, max_bytes: int = None):
+        self.max_entries = max_entries
+        # Limit for the decoded size of all images, None only limits the number of entries
+        self.max_bytes = max_bytes
+        self.images: OrderedDict = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.images)
+
+    def get(self, key) -> Image.Image:
+        with self.lock:
+            image = self.images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.images.move_to_end(key)
+            return image
+
+    def put(self, key, image: Image.Image) -> None:
+        with self.lock:
+            replaced = self.images.pop(key, None)
+            if replaced is not None:
+                self.size -= get_image_size(replaced)
+            self.images[key] = image
+            self.size += get_image_size(image)
+            while len(self.images) > self.max_entries or (
+                    self.max_bytes is not None and self.size > self.max_bytes and len(self.images) > 1):
+                _, evicted = self.images.popitem(last=False)
+                self.size -= get_image_size(evicted)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.images.clear()
+            self.size = 0
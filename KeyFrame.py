@@ -0,0 +1,82 @@
+import time
+
+LABEL_POSITIONS = ("top", "center", "bottom")
+
+
+class KeyFrame:
+    """
+    Label, media and background changes of one action, staged during an update and written to the deck together.
+    Anything that matches what was committed last is skipped, a frame without changes doesn't touch the deck at all.
+    """
+    def __init__(self, action):
+        self.action = action
+        self.staged: dict = {}
+        self.committed: dict = {}
+
+    def set_label(self, position: str, text: str, **style) -> None:
+        self.staged[position] = (text, tuple(sorted(style.items())))
+
+    def set_top_label(self, text: str, **style) -> None:
+        self.set_label("top", text, **style)
+
+    def set_center_label(self, text: str, **style) -> None:
+        self.set_label("center", text, **style)
+
+    def set_bottom_label(self, text: str, **style) -> None:
+        self.set_label("bottom", text, **style)
+
+    def set_media(self, image) -> None:
+        self.staged["media"] = image
+
+    def set_background(self, color: tuple) -> None:
+        self.staged["background"] = tuple(color)
+
+    def is_changed(self, name: str, value) -> bool:
+        if name not in self.committed:
+            return True
+        if name == "media":
+            # Images come from the shared cache, identical frames are the same object
+            return self.committed[name] is not value
+        return self.committed[name] != value
+
+    def commit(self) -> bool:
+        changes = {name: value for name, value in self.staged.items() if self.is_changed(name, value)}
+        self.staged.clear()
+        if not changes:
+            return False
+
+        for position in LABEL_POSITIONS:
+            if position in changes:
+                text, style = changes[position]
+                getattr(self.action, f"set_{position}_label")(text, update=False, **dict(style))
+        if "media" in changes:
+            self.action.set_media(image=changes["media"], update=False)
+        if "background" in changes:
+            self.action.set_background_color(color=list(changes["background"]), update=False)
+        # One re-composite and transfer for everything that changed
+        self.action.get_input().update()
+
+        self.committed.update(changes)
+        return True
+
+    def reset(self) -> None:
+        # Forget what is on the key, the next commit writes everything again
+        self.committed.clear()
+
+
+class FrameAction:
+    """Mixin giving an action a KeyFrame to batch its deck updates."""
+    frame: KeyFrame = None
+
+    def get_frame(self) -> KeyFrame:
+        if self.frame is None:
+            self.frame = KeyFrame(self)
+        return self.frame
+
+    def get_diagnostics_name(self) -> str:
+        # Render times are counted per key
+        return f"{self.action_name} {self.coords}"
+
+    def record_render(self, start: float) -> None:
+        # For drawing done on the main loop outside of a DataBus update, start is a time.perf_counter() value
+        self.plugin_base.diagnostics.record_render(self.get_diagnostics_name(), time.perf_counter() - start)
@@ -0,0 +1,85 @@
+from loguru import logger as log
+
+from plugins.com_core447_PrusaLinkStatus.LabelTemplate import LabelTemplate
+
+# Import gtk modules
+import gi
+gi.require_version("Gtk", "4.0")
+gi.require_version("Adw", "1")
+from gi.repository import Adw
+
+LABEL_POSITIONS = ("top", "center", "bottom")
+
+
+class LabelAction:
+    """
+    Mixin for printer actions with user defined label templates like "{temp_nozzle:.1f}°C".
+    Needs PrinterAction, only the fields used in the labels are subscribed to.
+    """
+    templates: dict[str, LabelTemplate] = None
+    label_fields: set[str] = frozenset()
+
+    def get_default_labels(self) -> dict[str, str]:
+        # Used until the user edits the labels
+        return {}
+
+    def get_labels(self) -> dict[str, str]:
+        labels = self.get_settings().get("labels")
+        if labels is None or not any(labels.values()):
+            return self.get_default_labels()
+        return labels
+
+    def get_label_rows(self) -> list:
+        self.top_label_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.top-label.title"))
+        self.center_label_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.center-label.title"))
+        self.bottom_label_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.bottom-label.title"))
+
+        labels = self.get_labels()
+        for position in LABEL_POSITIONS:
+            row = getattr(self, f"{position}_label_row")
+            row.set_text(labels.get(position, ""))
+            row.connect("notify::text", self.on_label_row_changed)
+        self.compile_labels()
+
+        return [self.top_label_row, self.center_label_row, self.bottom_label_row]
+
+    def on_label_row_changed(self, entry, *args):
+        settings = self.get_settings()
+        settings["labels"] = {position: getattr(self, f"{position}_label_row").get_text() for position in LABEL_POSITIONS}
+        self.set_settings(settings)
+
+        self.compile_labels()
+        self.show()
+
+    def compile_labels(self) -> None:
+        labels = self.get_labels()
+        self.templates = {}
+        self.label_fields = set()
+        for position in LABEL_POSITIONS:
+            template = LabelTemplate(labels.get(position, ""))
+            self.templates[position] = template
+            self.label_fields.update(template.fields)
+
+            if template.unknown_fields:
+                log.warning(f"Unknown placeholders in {position} label: {', '.join(template.unknown_fields)}")
+            # Mark rows with unknown placeholders
+            row = getattr(self, f"{position}_label_row", None)
+            if row is not None:
+                if template.unknown_fields:
+                    row.add_css_class("error")
+                else:
+                    row.remove_css_class("error")
+
+        # Only get woken up for the fields the labels use
+        if self.printer is not None:
+            self.subscribe_printer()
+
+    def get_subscribed_fields(self) -> set[str]:
+        if self.templates is None:
+            self.compile_labels()
+        return self.label_fields
+
+    def render_labels(self, data: dict) -> dict[str, str]:
+        if self.templates is None:
+            self.compile_labels()
+        return {position: self.templates[position].render(data) for position in LABEL_POSITIONS}
@@ -0,0 +1,84 @@
+import re
+
+from plugins.com_core447_PrusaLinkStatus.Endpoints import FIELD_SET
+from plugins.com_core447_PrusaLinkStatus.EtaEstimator import is_number
+
+# Fields of all polled PrusaLink endpoints and the estimated ones
+KNOWN_FIELDS = FIELD_SET
+TIME_FIELDS = {"time_remaining", "time_printing", "eta"}
+
+PLACEHOLDER_PATTERN = re.compile(r"{(\w+)(?::([^{}]*))?}")
+
+
+def seconds_to_readable(seconds: int, show_seconds: bool = False) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if show_seconds:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def format_value(value, spec: str) -> str:
+    if spec in ("hm", "hms"):
+        if not is_number(value):
+            # Like the other specs, a value that doesn't fit is shown as it is
+            return str(value)
+        return seconds_to_readable(value, show_seconds=spec == "hms")
+    try:
+        return format(value, spec)
+    except (ValueError, TypeError):
+        # Allow integer specs like {progress:3d} for values PrusaLink sends as float
+        if isinstance(value, float):
+            return format(round(value), spec)
+        return str(value)
+
+
+def format_default(field: str, value) -> str:
+    if field in TIME_FIELDS and isinstance(value, (int, float)):
+        return seconds_to_readable(value)
+    if isinstance(value, float):
+        return str(round(value))
+    return str(value)
+
+
+class LabelTemplate:
+    """
+    A label like "{temp_nozzle:.1f}°C" parsed once into literal text and placeholders.
+    Rendering only touches the fields the label references.
+    Placeholders without a format spec keep the old formatting: times as hh:mm, floats rounded.
+    """
+    def __init__(self, template: str, known_fields: set[str] = KNOWN_FIELDS):
+        self.template = template or ""
+        # Literal strings and (field, spec, raw placeholder) tuples in label order
+        self.parts: list = []
+        self.fields: set[str] = set()
+        self.unknown_fields: list[str] = []
+
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(self.template):
+            if match.start() > position:
+                self.parts.append(self.template[position:match.start()])
+            field, spec = match.group(1), match.group(2)
+            self.parts.append((field, spec, match.group(0)))
+            self.fields.add(field)
+            if known_fields is not None and field not in known_fields and field not in self.unknown_fields:
+                self.unknown_fields.append(field)
+            position = match.end()
+        if position < len(self.template):
+            self.parts.append(self.template[position:])
+
+    def render(self, data: dict) -> str:
+        rendered = []
+        for part in self.parts:
+            if isinstance(part, str):
+                rendered.append(part)
+                continue
+            field, spec, raw = part
+            if field not in data:
+                # Leave unknown placeholders visible, like plain str.replace did
+                rendered.append(raw)
+            elif spec is None:
+                rendered.append(format_default(field, data[field]))
+            else:
+                rendered.append(format_value(data[field], spec))
+        return "".join(rendered)
@@ -0,0 +1,87 @@
+import random
+import time
+
+ACTIVE_STATES = {"PRINTING", "BUSY"}
+IDLE_STATES = {"IDLE", "READY", "FINISHED", "STOPPED"}
+
+
+class PollScheduler:
+    """
+    Picks the delay until the next poll of one printer from its state and how fast its values are changing.
+    Active printers are polled fast, idle and unreachable ones back off exponentially.
+    """
+    def __init__(self, fast: float = 1, normal: float = 5, idle: float = 10, max_interval: float = 60,
+                 jitter: float = 0.1, heating_threshold: float = 3, temp_rate_threshold: float = 0.5):
+        self.fast = fast
+        self.normal = normal
+        self.idle = idle
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.heating_threshold = heating_threshold
+        self.temp_rate_threshold = temp_rate_threshold
+
+        self.idle_polls = 0
+        self.failed_polls = 0
+        self.last_sample: tuple[float, float, float] = None  # time, temp_nozzle, progress
+
+    def next_interval(self, data: dict, now: float = None) -> float:
+        if now is None:
+            now = time.monotonic()
+        return self.add_jitter(self.get_base_interval(data, now))
+
+    def get_base_interval(self, data: dict, now: float) -> float:
+        if data is None or data.get("state") == "OFFLINE":
+            self.last_sample = None
+            self.idle_polls = 0
+            self.failed_polls += 1
+            return self.backoff(self.normal, self.failed_polls)
+        self.failed_polls = 0
+
+        temp_rate, progress_rate = self.update_rates(data, now)
+
+        if self.is_heating(data) or temp_rate > self.temp_rate_threshold:
+            self.idle_polls = 0
+            return self.fast
+
+        state = data.get("state")
+        if state in IDLE_STATES:
+            self.idle_polls += 1
+            return self.backoff(self.idle, self.idle_polls)
+        self.idle_polls = 0
+
+        if state in ACTIVE_STATES:
+            # Poll faster towards the end of a print, a 5 second delay matters more there
+            if data.get("progress", 0) >= 95 or progress_rate > 1:
+                return self.fast
+        return self.normal
+
+    def update_rates(self, data: dict, now: float) -> tuple[float, float]:
+        temp = data.get("temp_nozzle") or 0
+        progress = data.get("progress") or 0
+
+        temp_rate = progress_rate = 0
+        if self.last_sample is not None:
+            last_time, last_temp, last_progress = self.last_sample
+            elapsed = now - last_time
+            if elapsed > 0:
+                temp_rate = abs(temp - last_temp) / elapsed
+                progress_rate = max(0, progress - last_progress) / elapsed * 60  # percent per minute
+        self.last_sample = (now, temp, progress)
+        return temp_rate, progress_rate
+
+    def is_heating(self, data: dict) -> bool:
+        for temp_key, target_key in (("temp_nozzle", "target_nozzle"), ("temp_bed", "target_bed")):
+            target = data.get(target_key) or 0
+            if target > 0 and abs(target - (data.get(temp_key) or 0)) > self.heating_threshold:
+                return True
+        return False
+
+    def backoff(self, base: float, attempts: int) -> float:
+        return min(self.max_interval, base * 2 ** max(0, attempts - 1))
+
+    def add_jitter(self, interval: float) -> float:
+        # Spread polls of many printers so they don't all hit the network at once
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def initial_delay(self) -> float:
+        return random.uniform(0, self.fast)
@@ -0,0 +1,297 @@
+import concurrent.futures
+import re
+import time
+
+from loguru import logger as log
+
+from plugins.com_core447_PrusaLinkStatus.AlertEngine import ALERT_COLORS, Rule, parse_rules
+from plugins.com_core447_PrusaLinkStatus.DataBus import ALERT_FIELD, Subscription
+from plugins.com_core447_PrusaLinkStatus.KeyFrame import FrameAction
+from plugins.com_core447_PrusaLinkStatus.PrinterRegistry import AUTH_FAILED, REACHABLE, Printer
+
+# Import gtk modules
+import gi
+gi.require_version("Gtk", "4.0")
+gi.require_version("Adw", "1")
+from gi.repository import Gtk, Adw, GLib
+
+# Wait for a pause in typing before connecting to the printer
+CONNECTION_CHECK_DELAY = 600
+# Hostname, ipv4 or [ipv6], optionally with a port
+HOST_PATTERN = re.compile(r"^([A-Za-z0-9-]+(\.[A-Za-z0-9-]+)*|\[[0-9A-Fa-f:.]+\])(:\d{1,5})?$")
+# Background restored after an alert when the key's own color can't be read
+NO_ALERT_COLOR = (0, 0, 0, 0)
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 60 * 60:
+        return f"{int(seconds // 60)}m"
+    return f"{int(seconds // 3600)}h"
+
+
+class PrinterAction(FrameAction):
+    """
+    Mixin for actions that show data of one printer.
+    Each action stores its own ip and key, the printer itself is shared through the plugin's registry.
+    """
+    printer: Printer = None
+    subscription: Subscription = None
+
+    # Stale marker currently on the key, it has to be redrawn when the age text changes
+    shown_stale_label: str = None
+
+    connection_check_source: int = None
+    connection_check_id: int = 0
+
+    # Alert rules used until the user writes their own, None for actions without alerts
+    default_alerts: str = None
+    alert_rules: list[Rule] = None
+    # Unacknowledged alerts flash, this is whether the color is on right now
+    flash_on: bool = False
+    # Background the key had before the first alert colored it, restored when the alerts are over
+    saved_background: tuple = None
+
+    def on_ready(self) -> None:
+        # Also called when the key is shown again, the page load cleared what the frame remembers as committed
+        self.get_frame().reset()
+        self.acquire_printer()
+
+    def on_removed_from_cache(self) -> None:
+        self.release_printer()
+
+    def on_tick(self) -> None:
+        start = time.perf_counter()
+        if self.update_on_tick():
+            self.record_render(start)
+
+    def update_on_tick(self) -> bool:
+        # Returns whether anything was drawn
+        drawn = False
+        # Only the age of stale data changes without an update from the printer
+        if self.get_stale_label() != self.shown_stale_label:
+            self.show()
+            drawn = True
+        if self.printer is not None and self.printer.alerts.active:
+            self.flash_on = not self.flash_on
+            self.show_alert()
+            drawn = True
+        return drawn
+
+    def on_key_down(self) -> None:
+        # Stops the flashing, the key keeps its color until the alert is over
+        if self.printer is not None:
+            self.printer.acknowledge_alerts()
+        # Graphs toggle their scaling on press as well
+        on_key_down = getattr(super(), "on_key_down", None)
+        if on_key_down is not None:
+            on_key_down()
+
+    def show(self) -> None:
+        pass
+
+    def get_stale_label(self) -> str:
+        if self.printer is None:
+            return None
+        age = self.printer.get_stale_age()
+        if age is None:
+            return None
+        return self.plugin_base.lm.get("actions.status.stale").format(age=format_age(age))
+
+    def get_printer_settings(self) -> tuple[str, str]:
+        settings = self.get_settings()
+        # Fall back to the old plugin wide settings so existing setups keep working
+        plugin_settings = self.plugin_base.get_settings()
+        ip = settings.get("ip", plugin_settings.get("ip", ""))
+        key = settings.get("key", plugin_settings.get("key", ""))
+        return ip, key
+
+    def acquire_printer(self) -> None:
+        ip, key = self.get_printer_settings()
+        old_printer = self.printer
+        self.printer = self.plugin_base.registry.acquire(ip, key)
+        if old_printer is not None and old_printer is not self.printer:
+            old_printer.alerts.set_rules(self, [])
+        self.plugin_base.registry.release(old_printer)
+        self.subscribe_printer()
+        self.register_alerts()
+        self.show_alert()
+
+    def release_printer(self) -> None:
+        self.plugin_base.data_bus.unsubscribe(self.subscription)
+        self.subscription = None
+        if self.printer is not None:
+            self.printer.alerts.set_rules(self, [])
+        self.plugin_base.registry.release(self.printer)
+        self.printer = None
+
+    def subscribe_printer(self) -> None:
+        old_subscription = self.subscription
+        self.subscription = None
+        if self.printer is not None:
+            self.subscription = self.plugin_base.data_bus.subscribe(self.printer.host, self.get_subscribed_fields(),
+                                                                    self.on_printer_changed, self.get_diagnostics_name())
+        # Dropped last, the key's render times only go with its last subscription
+        self.plugin_base.data_bus.unsubscribe(old_subscription)
+
+    def get_subscribed_fields(self) -> set[str]:
+        # Fields this action shows, None for all of them
+        return None
+
+    def on_printer_changed(self, changed: set[str]) -> None:
+        if ALERT_FIELD in changed:
+            self.show_alert()
+            if len(changed) == 1:
+                return
+        self.on_printer_update(changed)
+
+    def on_printer_update(self, changed: set[str]) -> None:
+        # Called on the main loop when subscribed fields of the printer changed
+        pass
+
+    def get_alert_text(self) -> str:
+        return self.get_settings().get("alerts", self.default_alerts)
+
+    def compile_alerts(self) -> None:
+        self.alert_rules, invalid = parse_rules(self.get_alert_text())
+        if invalid:
+            log.warning(f"Invalid alert rules: {'; '.join(invalid)}")
+        row = getattr(self, "alerts_row", None)
+        if row is not None:
+            if invalid:
+                row.add_css_class("error")
+            else:
+                row.remove_css_class("error")
+
+    def register_alerts(self) -> None:
+        if self.alert_rules is None:
+            self.compile_alerts()
+        if self.printer is not None:
+            self.printer.alerts.set_rules(self, self.alert_rules)
+
+    def show_alert(self) -> None:
+        level, flashing = self.printer.alerts.get_level() if self.printer is not None else (None, False)
+        frame = self.get_frame()
+        if level is None and self.saved_background is None:
+            # Never colored, leave the background the user set alone
+            return
+        if self.saved_background is None:
+            self.saved_background = self.get_original_background()
+        if level is None or (flashing and not self.flash_on):
+            frame.set_background(self.saved_background)
+        else:
+            frame.set_background(ALERT_COLORS[level])
+        frame.commit()
+        if level is None:
+            self.saved_background = None
+
+    def get_original_background(self) -> tuple:
+        get_background_color = getattr(self, "get_background_color", None)
+        if get_background_color is None:
+            return NO_ALERT_COLOR
+        color = get_background_color()
+        return tuple(color) if color is not None else NO_ALERT_COLOR
+
+    def get_alert_rows(self) -> list:
+        self.alerts_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.alerts.title"))
+        self.alerts_row.set_text(self.get_alert_text() or "")
+        self.alerts_row.connect("notify::text", self.on_alerts_row_changed)
+        self.compile_alerts()
+        return [self.alerts_row]
+
+    def on_alerts_row_changed(self, entry, *args):
+        settings = self.get_settings()
+        settings["alerts"] = entry.get_text()
+        self.set_settings(settings)
+
+        self.compile_alerts()
+        self.register_alerts()
+
+    def get_data(self) -> dict:
+        if self.printer is None:
+            return
+        return self.printer.data
+
+    def get_printer_rows(self) -> list:
+        self.ip_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.ip.title"))
+        self.key_row = Adw.PasswordEntryRow(title=self.plugin_base.lm.get("actions.status.key.title"))
+
+        self.connection_label = Gtk.Label(css_classes=["dim-label"], valign=Gtk.Align.CENTER)
+        self.ip_row.add_suffix(self.connection_label)
+
+        ip, key = self.get_printer_settings()
+        self.ip_row.set_text(ip)
+        self.key_row.set_text(key)
+
+        if self.printer is not None and self.printer.connection_state is not None:
+            self.show_connection_state(self.printer.connection_state)
+
+        self.ip_row.connect("notify::text", self.on_ip_row_changed)
+        self.key_row.connect("notify::text", self.on_key_row_changed)
+
+        return [self.ip_row, self.key_row]
+
+    def on_ip_row_changed(self, entry, *args):
+        settings = self.get_settings()
+        settings["ip"] = entry.get_text()
+        self.set_settings(settings)
+
+        self.schedule_connection_check()
+
+    def on_key_row_changed(self, entry, *args):
+        settings = self.get_settings()
+        settings["key"] = entry.get_text()
+        self.set_settings(settings)
+
+        self.schedule_connection_check()
+
+    def schedule_connection_check(self) -> None:
+        if self.connection_check_source is not None:
+            GLib.source_remove(self.connection_check_source)
+        self.connection_check_source = GLib.timeout_add(CONNECTION_CHECK_DELAY, self.check_connection)
+
+    def check_connection(self) -> bool:
+        self.connection_check_source = None
+        # Results of older checks are ignored
+        self.connection_check_id += 1
+        check_id = self.connection_check_id
+
+        ip, _ = self.get_printer_settings()
+        if not HOST_PATTERN.match(ip.strip()):
+            self.release_printer()
+            # Don't keep showing the data of the printer that was set before
+            self.show()
+            self.show_alert()
+            self.show_connection_state("invalid-host" if ip.strip() else None)
+            return GLib.SOURCE_REMOVE
+
+        self.acquire_printer()
+        self.show_connection_state("checking")
+        # The request runs on the fetch engine, the result is handed back to the gtk main loop
+        future = self.printer.check_connection()
+        future.add_done_callback(lambda future: GLib.idle_add(self.on_connection_checked, future, check_id))
+        return GLib.SOURCE_REMOVE
+
+    def on_connection_checked(self, future: concurrent.futures.Future, check_id: int) -> bool:
+        if check_id != self.connection_check_id or future.cancelled() or future.exception() is not None:
+            return GLib.SOURCE_REMOVE
+        self.show_connection_state(future.result())
+        return GLib.SOURCE_REMOVE
+
+    def show_connection_state(self, state: str) -> None:
+        if not hasattr(self, "connection_label"):
+            return
+        for css_class in ("success", "warning", "error"):
+            self.connection_label.remove_css_class(css_class)
+        if state is None:
+            self.connection_label.set_text("")
+            return
+
+        self.connection_label.set_text(self.plugin_base.lm.get(f"actions.status.connection.{state}"))
+        if state == REACHABLE:
+            self.connection_label.add_css_class("success")
+        elif state == AUTH_FAILED:
+            self.connection_label.add_css_class("warning")
+        elif state != "checking":
+            self.connection_label.add_css_class("error")
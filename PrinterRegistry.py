@@ -0,0 +1,394 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+from loguru import logger as log
+
+from plugins.com_core447_PrusaLinkStatus.AlertEngine import AlertEngine
+from plugins.com_core447_PrusaLinkStatus.CircuitBreaker import CircuitBreaker
+from plugins.com_core447_PrusaLinkStatus.DataBus import ALERT_FIELD, AVAILABILITY_FIELD, DataBus
+from plugins.com_core447_PrusaLinkStatus.Diagnostics import ERROR_AUTH, ERROR_CONNECTION, ERROR_JSON, ERROR_TIMEOUT, Diagnostics, http_error
+from plugins.com_core447_PrusaLinkStatus.Endpoints import EXTRA_ENDPOINTS, STATUS, Endpoint, StatusRecord
+from plugins.com_core447_PrusaLinkStatus.EtaEstimator import EtaEstimator
+from plugins.com_core447_PrusaLinkStatus.FarmSummary import FarmSummary
+from plugins.com_core447_PrusaLinkStatus.FetchEngine import FetchEngine
+from plugins.com_core447_PrusaLinkStatus.PollScheduler import PollScheduler
+from plugins.com_core447_PrusaLinkStatus.TelemetryLog import TelemetryLog
+from plugins.com_core447_PrusaLinkStatus.TelemetryStore import TelemetryStore
+
+
+# Result of the last request to a printer
+REACHABLE = "reachable"
+AUTH_FAILED = "auth-failed"
+TIMEOUT = "timeout"
+UNREACHABLE = "unreachable"
+HTTP_ERROR = "http-error"
+
+
+def diff_data(old: dict, new: dict) -> set[str]:
+    if old is None and new is None:
+        return set()
+    if old is None or new is None:
+        return set(old or new) | {AVAILABILITY_FIELD}
+    if isinstance(old, StatusRecord) and isinstance(new, StatusRecord):
+        return new.diff(old)
+    changed = {key for key, value in new.items() if key not in old or old[key] != value}
+    changed.update(key for key in old if key not in new)
+    return changed
+
+
+# How long the last successful poll is shown when a printer stops answering
+MAX_STALE_AGE = 60 * 60
+
+
+class Printer:
+    """A single PrusaLink printer, polled by exactly one task no matter how many actions use it."""
+    def __init__(self, engine: FetchEngine, host: str, key: str, telemetry: TelemetryStore = None,
+                 telemetry_log: TelemetryLog = None, bus: DataBus = None, diagnostics: Diagnostics = None,
+                 scheduler: PollScheduler = None, summary: FarmSummary = None):
+        self.engine = engine
+        self.bus = bus
+        self.summary = summary
+        self.diagnostics = diagnostics
+        self.host = host
+        self.key = key
+        self.scheduler = scheduler or PollScheduler()
+        self.breaker = CircuitBreaker()
+
+        self.data: StatusRecord = None
+        # Set when the printer stopped answering, data then still holds the last successful poll from data_time
+        self.stale = False
+        self.data_time: float = None
+        self.connection_state: str = None
+        self.last_error: str = None
+        self.users = 0
+
+        # Numeric fields over time, shared by all graphs of this printer
+        self.telemetry = telemetry or TelemetryStore()
+        self.telemetry_log = telemetry_log
+        # Replay of the telemetry log, the live samples wait for it but the polls don't
+        self.telemetry_load: asyncio.Future = None
+
+        # Fields of the rarely changing endpoints, merged into every status poll
+        self.endpoint_data: dict[str, dict] = {}
+        # Requests to those endpoints that are still running, by endpoint name
+        self.extra_tasks: dict[str, asyncio.Task] = {}
+        self.next_fetch: dict[str, float] = {}
+        self.etags: dict[str, str] = {}
+        self.job_id = None
+        self.estimator = EtaEstimator()
+        # Alert rules of the actions showing this printer
+        self.alerts = AlertEngine()
+
+        self.task: concurrent.futures.Future = None
+
+    def set_key(self, key: str) -> None:
+        self.key = key
+
+    def start(self) -> None:
+        if self.task is not None:
+            return
+        self.task = self.engine.submit(self.fetch_data_loop())
+
+    def stop(self) -> None:
+        if self.task is None:
+            return
+        self.task.cancel()
+        self.task = None
+
+    def check_connection(self) -> concurrent.futures.Future:
+        # Polls once right away, the future resolves to the connection state
+        return self.engine.submit(self.update())
+
+    async def fetch_data_loop(self) -> None:
+        try:
+            self.load_telemetry()
+            await asyncio.sleep(self.scheduler.initial_delay())
+            while True:
+                # An open breaker skips the request entirely, offline printers cost nothing until the next probe
+                if self.breaker.allow_request():
+                    await self.update()
+
+                interval = self.scheduler.next_interval(None if self.stale else self.data)
+                await asyncio.sleep(max(interval, self.breaker.get_retry_delay()))
+        finally:
+            # Stopped, the requests to the other endpoints go with the loop
+            self.cancel_extras()
+
+    def load_telemetry(self) -> None:
+        # Polls from check_connection can come before the loop's first one, whichever is first starts the replay
+        if self.telemetry_log is None or self.telemetry.loaded or self.telemetry_load is not None:
+            return
+        # Samples polled meanwhile are recorded once the replay is done
+        self.telemetry.hold()
+        self.telemetry_load = asyncio.ensure_future(self.replay_telemetry())
+
+    async def replay_telemetry(self) -> None:
+        try:
+            count = await asyncio.get_running_loop().run_in_executor(None, self.telemetry.load, self.telemetry_log)
+        except Exception as e:
+            log.error(f"Failed to load the telemetry log of {self.host}: {e}")
+        else:
+            log.debug(f"Loaded {count} telemetry records of {self.host}")
+
+    async def update(self) -> str:
+        self.load_telemetry()
+        data = await self.fetch_data()
+        if data is None:
+            self.breaker.record_failure()
+            self.set_unavailable()
+        else:
+            self.breaker.record_success()
+            self.set_data(data)
+        return self.connection_state
+
+    def get_stale_age(self) -> float:
+        if not self.stale or self.data_time is None:
+            return None
+        return time.time() - self.data_time
+
+    def set_unavailable(self) -> None:
+        if self.data is None:
+            return
+        if self.stale and self.get_stale_age() > MAX_STALE_AGE:
+            self.set_data(None)
+            return
+        if not self.stale:
+            # Keep the last known data, only tell the actions that it is stale now
+            self.stale = True
+            self.publish({AVAILABILITY_FIELD})
+
+    def set_data(self, data: dict) -> set[str]:
+        changed = diff_data(self.data, data)
+        if self.stale:
+            self.stale = False
+            changed.add(AVAILABILITY_FIELD)
+        self.data = data
+        timestamp = time.time()
+        if self.alerts.evaluate(data, changed, timestamp):
+            changed.add(ALERT_FIELD)
+        if data is not None:
+            self.data_time = timestamp
+            # Only the status fields change often enough to be worth a history
+            self.telemetry.record({key: data[key] for key in STATUS.fields if key in data}, timestamp)
+            if self.telemetry_log is not None:
+                self.telemetry_log.append(timestamp, data)
+        self.publish(changed)
+        return changed
+
+    def publish(self, changed: set[str]) -> None:
+        if not changed:
+            return
+        if self.summary is not None:
+            self.summary.update(self, changed)
+        if self.bus is not None:
+            self.bus.publish(self.host, changed)
+
+    def acknowledge_alerts(self) -> concurrent.futures.Future:
+        # Changes of the printer are published from the fetch thread only
+        return self.engine.submit(self.acknowledge())
+
+    async def acknowledge(self) -> None:
+        if self.alerts.acknowledge():
+            self.publish({ALERT_FIELD})
+
+    def get_history(self, field: str, since: float) -> tuple[list[float], list[float]]:
+        return self.telemetry.get_window(field, since)
+
+    async def request(self, endpoint: Endpoint) -> tuple[str, int, dict, str]:
+        # Returns the connection state, http status, parsed json and the error class of a failed request
+        start = time.perf_counter()
+        status_code, body, error, state = None, None, None, REACHABLE
+        # The status changes with nearly every poll, a conditional request would hardly ever match
+        etag = self.etags.get(endpoint.path) if endpoint is not STATUS else None
+        try:
+            status_code, body, etag = await self.engine.get_json(self.host, self.key, endpoint.path, etag)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            state, error = TIMEOUT, ERROR_TIMEOUT
+        except ValueError:
+            # Also covers json.JSONDecodeError
+            state, error = HTTP_ERROR, ERROR_JSON
+        except Exception as e:
+            log.debug(f"Request to {self.host}{endpoint.path} failed: {e}")
+            state, error = UNREACHABLE, ERROR_CONNECTION
+        else:
+            if status_code in (401, 403):
+                state, error = AUTH_FAILED, ERROR_AUTH
+            elif status_code not in (200, 204, 304):
+                state, error = HTTP_ERROR, http_error(status_code)
+            elif etag is not None and endpoint is not STATUS:
+                self.etags[endpoint.path] = etag
+
+        if self.diagnostics is not None:
+            self.diagnostics.record_fetch(self.host, time.perf_counter() - start, error, endpoint.name)
+        return state, status_code, body, error
+
+    async def fetch_data(self) -> dict:
+        self.connection_state, _, status, error = await self.request(STATUS)
+        if error is not None:
+            if error != self.last_error:
+                log.warning(f"Fetching status of {self.host} failed: {error}")
+            self.last_error = error
+            return
+        self.last_error = None
+        if status is None:
+            self.connection_state = HTTP_ERROR
+            return
+
+        data = STATUS.parse(status)
+        self.schedule_extras(data.get("id"))
+        for fields in self.endpoint_data.values():
+            data.update(fields)
+        return self.estimator.update(data)
+
+    def schedule_extras(self, job_id) -> None:
+        # Each endpoint that is due gets its own task, a slow one never holds back the status or the others
+        if job_id != self.job_id:
+            # A new job or none at all, the cached file info belongs to the previous one
+            self.job_id = job_id
+            for endpoint in EXTRA_ENDPOINTS:
+                if endpoint.job_bound:
+                    self.endpoint_data.pop(endpoint.name, None)
+                    self.next_fetch.pop(endpoint.name, None)
+                    self.etags.pop(endpoint.path, None)
+                    task = self.extra_tasks.pop(endpoint.name, None)
+                    if task is not None:
+                        task.cancel()
+
+        now = time.monotonic()
+        for endpoint in EXTRA_ENDPOINTS:
+            if endpoint.job_bound and job_id is None:
+                continue
+            if endpoint.name in self.extra_tasks or now < self.next_fetch.get(endpoint.name, 0):
+                continue
+            self.next_fetch[endpoint.name] = now + endpoint.interval
+            self.extra_tasks[endpoint.name] = asyncio.ensure_future(self.fetch_extra(endpoint))
+
+    def cancel_extras(self) -> None:
+        for task in self.extra_tasks.values():
+            task.cancel()
+        self.extra_tasks.clear()
+
+    async def fetch_extra(self, endpoint: Endpoint) -> None:
+        try:
+            _, status_code, body, error = await self.request(endpoint)
+        finally:
+            if self.extra_tasks.get(endpoint.name) is asyncio.current_task():
+                del self.extra_tasks[endpoint.name]
+
+        old_fields = self.endpoint_data.get(endpoint.name)
+        if status_code == 404:
+            # Older firmware without this endpoint, don't ask again
+            log.info(f"{self.host} doesn't support {endpoint.path}")
+            self.next_fetch[endpoint.name] = float("inf")
+        elif error is not None:
+            # Keep the cached fields, the status request decides whether the printer is reachable
+            log.debug(f"Fetching {endpoint.path} of {self.host} failed: {error}")
+        elif status_code == 304:
+            pass
+        elif status_code == 204 or body is None:
+            self.endpoint_data.pop(endpoint.name, None)
+        else:
+            self.endpoint_data[endpoint.name] = endpoint.parse(body)
+
+        fields = self.endpoint_data.get(endpoint.name)
+        if fields != old_fields:
+            self.set_endpoint_data(endpoint, fields or {})
+
+    def set_endpoint_data(self, endpoint: Endpoint, fields: dict) -> None:
+        # Merged into the last poll right away, the next status poll merges them as well
+        if self.data is None or self.stale:
+            return
+        data = self.data.copy()
+        data.update({field: fields.get(field) for field in endpoint.fields})
+        changed = diff_data(self.data, data)
+        self.data = data
+        if self.alerts.evaluate(data, changed, time.time()):
+            changed.add(ALERT_FIELD)
+        self.publish(changed)
+
+
+class PrinterRegistry:
+    """Printers keyed by host. Actions acquire the printer they are configured for and release it when done."""
+    def __init__(self, engine: FetchEngine = None, bus: DataBus = None, diagnostics: Diagnostics = None,
+                 telemetry_directory: str = None, summary: FarmSummary = None):
+        self.engine = engine or FetchEngine()
+        self.bus = bus
+        # Aggregate over all printers, kept up to date by the printers themselves
+        self.summary = summary
+        self.diagnostics = diagnostics
+        # Directory for the on disk telemetry logs, None keeps history in memory only
+        self.telemetry_directory = telemetry_directory
+        self.printers: dict[str, Printer] = {}
+        # Kept when a printer is removed so graphs still have their history after a page switch
+        self.telemetry: dict[str, TelemetryStore] = {}
+        self.telemetry_logs: dict[str, TelemetryLog] = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, host: str, key: str) -> Printer:
+        host = (host or "").strip()
+        if host == "":
+            return None
+
+        with self.lock:
+            printer = self.printers.get(host)
+            if printer is None:
+                log.info(f"Adding printer {host}")
+                self.engine.start()
+                telemetry = self.telemetry.setdefault(host, TelemetryStore())
+                printer = Printer(self.engine, host, key, telemetry, self.get_telemetry_log(host), self.bus,
+                                  self.diagnostics, summary=self.summary)
+                self.printers[host] = printer
+            elif key and printer.key != key:
+                printer.set_key(key)
+
+            printer.users += 1
+            if printer.users == 1 and self.summary is not None:
+                # Counted as offline until its first poll
+                self.summary.update(printer, {AVAILABILITY_FIELD})
+            printer.start()
+            return printer
+
+    def release(self, printer: Printer) -> None:
+        if printer is None:
+            return
+
+        with self.lock:
+            printer.users -= 1
+            if printer.users > 0:
+                return
+
+            log.info(f"Removing printer {printer.host}")
+            printer.stop()
+            if self.printers.get(printer.host) is printer:
+                del self.printers[printer.host]
+                if self.summary is not None:
+                    self.summary.remove(printer.host)
+                self.drop_telemetry(printer.host)
+
+    def drop_telemetry(self, host: str) -> None:
+        # Hosts that never sent a sample, like the partial ones passed while typing, leave nothing behind
+        telemetry = self.telemetry.get(host)
+        if telemetry is None or not telemetry.is_empty():
+            return
+        del self.telemetry[host]
+        telemetry_log = self.telemetry_logs.pop(host, None)
+        if telemetry_log is not None:
+            telemetry_log.close()
+
+    def get_telemetry_log(self, host: str) -> TelemetryLog:
+        if self.telemetry_directory is None:
+            return None
+        if host not in self.telemetry_logs:
+            self.telemetry_logs[host] = TelemetryLog(self.telemetry_directory, host)
+        return self.telemetry_logs[host]
+
+    def get(self, host: str) -> Printer:
+        return self.printers.get((host or "").strip())
+
+    def get_printers(self) -> list[Printer]:
+        with self.lock:
+            return list(self.printers.values())
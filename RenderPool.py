@@ -0,0 +1,111 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable
+
+from loguru import logger as log
+from PIL import Image
+
+from plugins.com_core447_PrusaLinkStatus.Diagnostics import Diagnostics
+from plugins.com_core447_PrusaLinkStatus.GraphRenderer import GraphFrame, draw_graph
+from plugins.com_core447_PrusaLinkStatus.ImageCache import ImageCache
+
+
+def render_frame(frame: GraphFrame) -> tuple[Image.Image, float]:
+    # Runs in a worker, also returns how long drawing took
+    start = time.perf_counter()
+    image = draw_graph(frame)
+    return image, time.perf_counter() - start
+
+
+class RenderPool:
+    """
+    Draws graph frames in worker threads, shared by all graph keys.
+    Pillow holds the GIL while drawing, so the workers still compete with the main loop for it. They only
+    keep a burst of redraws from running back to back on the main loop. Worker processes would avoid that,
+    but StreamController's spawned children would import its main module again.
+    Each key renders at most one frame at a time and only the newest frame asked for in the meantime is drawn next,
+    outdated ones are skipped. Finished images go into the cache and are handed to the callback on the main loop.
+    """
+    def __init__(self, dispatch: Callable, cache: ImageCache, workers: int = 2, diagnostics: Diagnostics = None):
+        # Schedules a callable on the main loop, GLib.idle_add in the plugin
+        self.dispatch = dispatch
+        self.cache = cache
+        # Drawing times are added to the render time of the key they were drawn for
+        self.diagnostics = diagnostics
+        self.workers = workers
+        # Started on the first frame that isn't cached
+        self.executor = None
+        # Frame each key is rendering and the newest frame with its callback and diagnostics name asked for per key
+        self.running: dict[Hashable, GraphFrame] = {}
+        self.latest: dict[Hashable, tuple[GraphFrame, Callable, str]] = {}
+        self.lock = threading.Lock()
+
+    def render(self, key: Hashable, frame: GraphFrame,
+               callback: Callable[[GraphFrame, Image.Image], None], name: str = None) -> Image.Image:
+        """
+        Returns cached images right away, otherwise None and callback(frame, image) follows on the main loop.
+        name is the key's name in the diagnostics.
+        """
+        image = self.cache.get(frame)
+        with self.lock:
+            if image is not None:
+                # Newer than anything still rendering for this key
+                self.latest.pop(key, None)
+                return image
+            self.latest[key] = (frame, callback, name)
+            if key in self.running:
+                return None
+            self.running[key] = frame
+        self.submit(key, frame)
+        return None
+
+    def cancel(self, key: Hashable) -> None:
+        # For keys that went away, a frame still rendering is dropped when it's done
+        with self.lock:
+            self.latest.pop(key, None)
+
+    def get_executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="graph render")
+        return self.executor
+
+    def submit(self, key: Hashable, frame: GraphFrame) -> None:
+        future = self.get_executor().submit(render_frame, frame)
+        future.add_done_callback(lambda future: self.dispatch(self.on_rendered, key, frame, future))
+
+    def on_rendered(self, key: Hashable, frame: GraphFrame, future: Future) -> bool:
+        try:
+            image, seconds = future.result()
+        except Exception as e:
+            log.error(f"Failed to render graph: {e}")
+            image, seconds = None, None
+        else:
+            self.cache.put(frame, image)
+
+        with self.lock:
+            del self.running[key]
+            latest = self.latest.pop(key, None)
+        if latest is None:
+            # Cancelled or a cached frame was shown meanwhile
+            return False
+        latest_frame, callback, name = latest
+        if seconds is not None and name is not None and self.diagnostics is not None:
+            # Frames of keys that went away meanwhile aren't counted, their histograms are gone
+            self.diagnostics.record_render(name, seconds)
+        if latest_frame == frame:
+            if image is not None:
+                callback(frame, image)
+            return False
+
+        # Frames asked for while this one rendered are outdated except for the newest
+        image = self.render(key, latest_frame, callback, name)
+        if image is not None:
+            callback(latest_frame, image)
+        # Don't repeat when run from GLib.idle_add
+        return False
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
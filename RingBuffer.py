@@ -0,0 +1,60 @@
+from array import array
+
+
+class RingBuffer:
+    """
+    Fixed capacity (timestamp, value) samples in two flat double arrays.
+    Appending overwrites the oldest sample once full, so memory stays constant no matter how long a print runs.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.timestamps = array("d", bytes(8 * self.capacity))
+        self.values = array("d", bytes(8 * self.capacity))
+        self.start = 0
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, timestamp: float, value: float) -> None:
+        index = (self.start + self.length) % self.capacity
+        self.timestamps[index] = timestamp
+        self.values[index] = value
+        if self.length < self.capacity:
+            self.length += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def get_timestamp(self, i: int) -> float:
+        return self.timestamps[(self.start + i) % self.capacity]
+
+    def get_value(self, i: int) -> float:
+        return self.values[(self.start + i) % self.capacity]
+
+    def last(self) -> tuple[float, float]:
+        if self.length == 0:
+            return None
+        return self.get_timestamp(self.length - 1), self.get_value(self.length - 1)
+
+    def find(self, timestamp: float) -> int:
+        # Index of the first sample at or after timestamp, samples are appended in time order
+        low, high = 0, self.length
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_timestamp(middle) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def window(self, since: float, include_previous: bool = True) -> tuple[list[float], list[float]]:
+        """
+        Samples newer than since. With include_previous the last older sample is included as well,
+        so a line drawn from them starts at the left edge of the window instead of at the first new sample.
+        """
+        first = self.find(since)
+        if include_previous and first > 0:
+            first -= 1
+        timestamps = [self.get_timestamp(i) for i in range(first, self.length)]
+        values = [self.get_value(i) for i in range(first, self.length)]
+        return timestamps, values
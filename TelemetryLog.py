@@ -0,0 +1,159 @@
+import contextlib
+import math
+import mmap
+import os
+import re
+import struct
+
+from loguru import logger as log
+
+# Fields stored per record, in record order. Missing values are stored as NaN.
+FIELDS = (
+    "temp_nozzle", "target_nozzle", "temp_bed", "target_bed",
+    "axis_x", "axis_y", "axis_z", "speed", "flow",
+    "fan_hotend", "fan_print", "progress", "time_printing", "time_remaining",
+)
+
+MAGIC = b"PLTL"
+VERSION = 1
+# Magic, version, record size, field count, padding to 16 bytes
+HEADER = struct.Struct("<4sHHH6x")
+# Timestamp followed by one float per field
+RECORD = struct.Struct(f"<d{len(FIELDS)}f")
+
+
+def sanitize_host(host: str) -> str:
+    return re.sub(r"[^A-Za-z0-9.-]", "_", host)
+
+
+class TelemetryLog:
+    """
+    Append only log of one printer's polled values with fixed width records, so files can be memory-mapped
+    and searched by timestamp without parsing them. Files are rotated once they reach max_bytes.
+    """
+    def __init__(self, directory: str, host: str, max_bytes: int = 4 * 1024 * 1024, backups: int = 3):
+        self.directory = directory
+        self.name = sanitize_host(host)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.file = None
+
+    def get_path(self, index: int = 0) -> str:
+        suffix = f".{index}" if index > 0 else ""
+        return os.path.join(self.directory, f"{self.name}{suffix}.bin")
+
+    def get_paths(self) -> list[str]:
+        # Oldest first
+        paths = [self.get_path(i) for i in range(self.backups, -1, -1)]
+        return [path for path in paths if os.path.isfile(path)]
+
+    def open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.get_path()
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(FIELDS)))
+        else:
+            # Drop a partial record left behind by a crash, it would shift all following records
+            size = self.file.tell()
+            partial = (size - HEADER.size) % RECORD.size
+            if partial:
+                self.file.truncate(size - partial)
+                self.file.seek(0, os.SEEK_END)
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def rotate(self) -> None:
+        self.close()
+        for i in range(self.backups, 0, -1):
+            source = self.get_path(i - 1)
+            if os.path.isfile(source):
+                os.replace(source, self.get_path(i))
+        self.open()
+
+    def append(self, timestamp: float, data: dict) -> None:
+        values = []
+        for field in FIELDS:
+            value = data.get(field)
+            values.append(value if isinstance(value, (int, float)) else math.nan)
+        try:
+            if self.file is None:
+                self.open()
+            elif self.file.tell() + RECORD.size > self.max_bytes:
+                self.rotate()
+            self.file.write(RECORD.pack(timestamp, *values))
+            self.file.flush()
+        except OSError as e:
+            log.error(f"Failed to write telemetry log {self.get_path()}: {e}")
+            self.close()
+
+    def read(self, since: float = None, step: int = 1, skip: int = 0):
+        """
+        Yields (timestamp, values) from all files, oldest first, without loading whole files into memory.
+        Leaves out the first skip records at or after since and then yields every step-th one.
+        """
+        for path in self.get_paths():
+            # Records left to leave out carry over to the next file
+            skip = yield from read_file(path, since, step, skip)
+
+    def count(self, since: float = None) -> int:
+        # Number of records at or after since, without reading them
+        total = 0
+        for path in self.get_paths():
+            with open_file(path) as (buffer, count):
+                if buffer is not None:
+                    total += count - find_first(buffer, count, since)
+        return total
+
+
+@contextlib.contextmanager
+def open_file(path: str):
+    # Yields the mapped file and its number of records, None for empty files and unknown formats
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        count = (size - HEADER.size) // RECORD.size
+        if count <= 0:
+            yield None, 0
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            magic, version, record_size, _ = HEADER.unpack_from(buffer, 0)
+            if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+                log.warning(f"Skipping telemetry log {path} with unknown format")
+                yield None, 0
+                return
+            yield buffer, count
+
+
+def find_first(buffer, count: int, since: float = None) -> int:
+    # Records are in time order, so the first one at or after since can be found by bisecting the mapping
+    if since is None:
+        return 0
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if struct.unpack_from("<d", buffer, HEADER.size + middle * RECORD.size)[0] < since:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def read_file(path: str, since: float = None, step: int = 1, skip: int = 0):
+    # Returns how many records the next file has to leave out to keep the step
+    with open_file(path) as (buffer, count):
+        if buffer is None:
+            return skip
+        first = find_first(buffer, count, since) + skip
+        if first >= count:
+            return first - count
+        for i in range(first, count, step):
+            record = RECORD.unpack_from(buffer, HEADER.size + i * RECORD.size)
+            yield record[0], record[1:]
+        return step - 1 - (count - 1 - first) % step
+
+
+def to_dict(values: tuple) -> dict:
+    return {field: value for field, value in zip(FIELDS, values) if not math.isnan(value)}
@@ -0,0 +1,187 @@
+import math
+import threading
+import time
+
+from plugins.com_core447_PrusaLinkStatus.RingBuffer import RingBuffer
+from plugins.com_core447_PrusaLinkStatus.TelemetryLog import TelemetryLog, to_dict
+
+# Raw samples, 10 minutes at the fastest poll interval
+RAW_CAPACITY = 600
+# (bucket length in seconds, number of buckets): 12 hours of 1 minute buckets, 2 days of 10 minute buckets
+TIERS = ((60, 720), (600, 288))
+# Upper limit of points handed to a graph, the raw tier always fits
+MAX_POINTS = RAW_CAPACITY
+# Oldest data any tier can hold, nothing older has to be replayed from the log
+MAX_AGE = max(resolution * capacity for resolution, capacity in TIERS)
+# Records per tier bucket read from the log on replay, the others in between are skipped
+REPLAY_SAMPLES_PER_BUCKET = 4
+
+
+class Tier:
+    """Fixed length time buckets with min, max and average of the samples that fell into them."""
+    def __init__(self, resolution: float, capacity: int):
+        self.resolution = resolution
+        self.avg = RingBuffer(capacity)
+        self.min = RingBuffer(capacity)
+        self.max = RingBuffer(capacity)
+
+        # Bucket that is still being filled
+        self.bucket_start: float = None
+        self.bucket_min = self.bucket_max = self.bucket_sum = 0.0
+        self.bucket_count = 0
+
+    def __len__(self) -> int:
+        return len(self.avg) + (1 if self.bucket_count else 0)
+
+    def add(self, timestamp: float, value: float) -> None:
+        bucket_start = math.floor(timestamp / self.resolution) * self.resolution
+        if bucket_start != self.bucket_start:
+            self.flush()
+            self.bucket_start = bucket_start
+            self.bucket_min = self.bucket_max = value
+        else:
+            self.bucket_min = min(self.bucket_min, value)
+            self.bucket_max = max(self.bucket_max, value)
+        self.bucket_sum += value
+        self.bucket_count += 1
+
+    def flush(self) -> None:
+        if self.bucket_count == 0:
+            return
+        self.avg.append(self.bucket_start, self.bucket_sum / self.bucket_count)
+        self.min.append(self.bucket_start, self.bucket_min)
+        self.max.append(self.bucket_start, self.bucket_max)
+        self.bucket_sum = 0.0
+        self.bucket_count = 0
+
+    def count_since(self, since: float) -> int:
+        return len(self.avg) - self.avg.find(since) + (1 if self.bucket_count else 0)
+
+    def is_complete(self, since: float) -> bool:
+        return len(self.avg) < self.avg.capacity or self.avg.get_timestamp(0) <= since
+
+    def window(self, since: float, kind: str = "avg") -> tuple[list[float], list[float]]:
+        timestamps, values = getattr(self, kind).window(since)
+        if self.bucket_count:
+            timestamps.append(self.bucket_start)
+            values.append({"avg": self.bucket_sum / self.bucket_count, "min": self.bucket_min, "max": self.bucket_max}[kind])
+        return timestamps, values
+
+
+class MetricHistory:
+    """Raw samples of one field plus coarser tiers for long time windows."""
+    def __init__(self):
+        self.raw = RingBuffer(RAW_CAPACITY)
+        self.tiers = [Tier(resolution, capacity) for resolution, capacity in TIERS]
+
+    def append(self, timestamp: float, value: float) -> None:
+        self.raw.append(timestamp, value)
+        for tier in self.tiers:
+            tier.add(timestamp, value)
+
+    def raw_is_complete(self, since: float) -> bool:
+        return len(self.raw) < self.raw.capacity or self.raw.get_timestamp(0) <= since
+
+    def window(self, since: float, max_points: int = MAX_POINTS) -> tuple[list[float], list[float]]:
+        # Use the finest resolution that still has all samples of the window and stays within max_points
+        if self.raw_is_complete(since) and len(self.raw) - self.raw.find(since) <= max_points:
+            return self.raw.window(since)
+        for tier in self.tiers:
+            if tier.is_complete(since) and tier.count_since(since) <= max_points:
+                return tier.window(since)
+        return self.tiers[-1].window(since)
+
+
+class TelemetryStore:
+    """History of all numeric fields of one printer, shared by every graph that shows it."""
+    def __init__(self):
+        self.metrics: dict[str, MetricHistory] = {}
+        self.lock = threading.Lock()
+        # Held for the whole replay, a second load waits for the first and then finds the store loaded
+        self.load_lock = threading.Lock()
+        self.loaded = False
+        # Live samples that came in during the replay, None while they are recorded right away
+        self.held: list[tuple[dict, float]] = None
+        # Records from this time on are in the log and held as well, the replay stops before them
+        self.held_since: float = None
+
+    def is_empty(self) -> bool:
+        return not self.metrics
+
+    def record(self, data: dict, timestamp: float) -> None:
+        with self.lock:
+            if self.held is not None:
+                # Added after the replay so every history stays in time order
+                self.held.append((data, timestamp))
+                return
+            self.add(data, timestamp)
+
+    def add(self, data: dict, timestamp: float) -> None:
+        for key, value in data.items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            metric = self.metrics.get(key)
+            if metric is None:
+                metric = self.metrics[key] = MetricHistory()
+            metric.append(timestamp, value)
+
+    def hold(self) -> None:
+        # Called before a replay is started, live samples wait for it from now on
+        with self.lock:
+            if not self.loaded and self.held is None:
+                self.held = []
+                self.held_since = time.time()
+
+    def load(self, telemetry_log: TelemetryLog, samples_per_bucket: int = REPLAY_SAMPLES_PER_BUCKET) -> int:
+        """
+        Refills the history from disk and then adds the live samples held back meanwhile.
+        Only the newest records go into the raw samples, each tier is filled from every n-th record of its time span
+        so its buckets get about samples_per_bucket of them. Returns the number of records read.
+        """
+        count = 0
+        with self.load_lock:
+            if self.loaded:
+                return count
+            metrics: dict[str, MetricHistory] = {}
+            try:
+                now = time.time()
+                until = self.held_since if self.held_since is not None else now
+
+                def replay(records, add) -> int:
+                    replayed = 0
+                    for timestamp, values in records:
+                        if timestamp >= until:
+                            break
+                        for key, value in to_dict(values).items():
+                            metric = metrics.get(key)
+                            if metric is None:
+                                metric = metrics[key] = MetricHistory()
+                            add(metric, timestamp, value)
+                        replayed += 1
+                    return replayed
+
+                since = now - MAX_AGE
+                skip = max(0, telemetry_log.count(since) - RAW_CAPACITY)
+                count += replay(telemetry_log.read(since, skip=skip),
+                                lambda metric, timestamp, value: metric.raw.append(timestamp, value))
+                for i, (resolution, capacity) in enumerate(TIERS):
+                    since = now - resolution * capacity
+                    step = max(1, telemetry_log.count(since) // (capacity * samples_per_bucket))
+                    count += replay(telemetry_log.read(since, step=step),
+                                    lambda metric, timestamp, value, i=i: metric.tiers[i].add(timestamp, value))
+            finally:
+                # A broken log must not hold back the live samples forever
+                with self.lock:
+                    self.metrics.update(metrics)
+                    for data, timestamp in self.held or ():
+                        self.add(data, timestamp)
+                    self.held = None
+                    self.loaded = True
+        return count
+
+    def get_window(self, field: str, since: float, max_points: int = MAX_POINTS) -> tuple[list[float], list[float]]:
+        with self.lock:
+            metric = self.metrics.get(field)
+            if metric is None:
+                return [], []
+            return metric.window(since, max_points)
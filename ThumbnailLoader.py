@@ -0,0 +1,81 @@
+import asyncio
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from loguru import logger as log
+from PIL import Image
+
+from plugins.com_core447_PrusaLinkStatus.ImageCache import ImageCache
+
+THUMBNAIL_SIZE = 144
+
+
+def decode_thumbnail(data: bytes, size: int = THUMBNAIL_SIZE) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    # Lets jpeg thumbnails decode at a reduced scale right away, no effect on png
+    image.draft("RGB", (size, size))
+    image = image.convert("RGBA")
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+    # Center on a transparent square so the key doesn't stretch it
+    square = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    square.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+    return square
+
+
+class ThumbnailLoader:
+    """
+    Job thumbnails of all printers. Each one is downloaded once per job, decoded and scaled to key size
+    on a small worker pool and kept in a cache bounded by the decoded size.
+    """
+    def __init__(self, dispatch: Callable, size: int = THUMBNAIL_SIZE, max_bytes: int = 16 * 1024 * 1024,
+                 workers: int = 2):
+        # Schedules the callbacks on the main loop, GLib.idle_add in the plugin
+        self.dispatch = dispatch
+        self.size = size
+        self.cache = ImageCache(max_bytes=max_bytes)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail decode")
+        # Callbacks waiting for a thumbnail that is being loaded
+        self.pending: dict[tuple, list[Callable]] = {}
+        self.lock = threading.Lock()
+
+    def load(self, printer, key: tuple, callback: Callable[[tuple, Image.Image], None]) -> Image.Image:
+        """
+        key is (host, job id, thumbnail path). Returns the cached thumbnail or None,
+        in which case it is loaded in the background and passed to callback on the main loop.
+        """
+        image = self.cache.get(key)
+        if image is not None:
+            return image
+        with self.lock:
+            callbacks = self.pending.get(key)
+            if callbacks is not None:
+                # Another key already asked for it
+                callbacks.append(callback)
+                return None
+            self.pending[key] = [callback]
+        printer.engine.submit(self.fetch(printer, key))
+        return None
+
+    async def fetch(self, printer, key: tuple) -> None:
+        path = key[2]
+        image = None
+        try:
+            status, data = await printer.engine.get_bytes(printer.host, printer.key, path)
+            if status == 200:
+                # Decoding takes a few milliseconds, keep it off the fetch loop
+                image = await asyncio.get_running_loop().run_in_executor(self.pool, decode_thumbnail, data, self.size)
+                self.cache.put(key, image)
+            else:
+                log.warning(f"Fetching thumbnail {path} of {printer.host} failed: http-{status}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning(f"Loading thumbnail {path} of {printer.host} failed: {e}")
+
+        with self.lock:
+            callbacks = self.pending.pop(key, [])
+        for callback in callbacks:
+            self.dispatch(callback, key, image)
@@ -0,0 +1,231 @@
+"""
+End to end load test: many simulated printers polled by the plugin's PrinterRegistry, updates delivered by
+the DataBus to the plugin's real Status and MetricGraph actions, running on stand-ins for StreamController
+and gtk without a deck. The fake printers run their scripted timelines faster than real time in a separate process.
+
+Reports fetches per second, the plugin's cpu time per printer, render and fetch to display latencies
+and how memory grows over the simulated hours.
+
+Usage: python benchmarks/bench_e2e.py [--printers 200] [--duration 60] [--speedup 120] [--poll-scale 1]
+                                      [--scenarios print paused error offline slow digest] [--telemetry-log]
+"""
+import argparse
+import os
+import queue
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import plugin_path  # noqa: F401
+from loguru import logger as log
+
+import headless_host
+from fake_prusalink import SCENARIOS, FarmProcess
+from plugins.com_core447_PrusaLinkStatus.AlertEngine import DEFAULT_RULES
+from plugins.com_core447_PrusaLinkStatus.DataBus import DataBus
+from plugins.com_core447_PrusaLinkStatus.Diagnostics import Diagnostics, Histogram
+from plugins.com_core447_PrusaLinkStatus.FarmSummary import FarmSummary
+from plugins.com_core447_PrusaLinkStatus.FetchEngine import FetchEngine
+from plugins.com_core447_PrusaLinkStatus.ImageCache import ImageCache
+from plugins.com_core447_PrusaLinkStatus.PollScheduler import PollScheduler
+from plugins.com_core447_PrusaLinkStatus.PrinterRegistry import PrinterRegistry
+from plugins.com_core447_PrusaLinkStatus.RenderPool import RenderPool
+from plugins.com_core447_PrusaLinkStatus.ThumbnailLoader import ThumbnailLoader
+
+STATUS_SETTINGS = {
+    "labels": {"top": "{state}", "center": "{progress}% {eta}", "bottom": "{temp_nozzle:.1f}/{temp_bed:.0f}"},
+    "alerts": f"{DEFAULT_RULES}; temp_nozzle ~ target_nozzle > 10 for 2m; progress still 10m",
+}
+GRAPH_SETTINGS = {"field": "temp_nozzle", "time-period": 15 * 60, "show-target-line": True}
+# StreamController ticks every action once a second
+TICK = 1
+
+
+class MainLoop:
+    """Stands in for the gtk main loop: runs callables handed over with idle_add on one thread."""
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name="main loop", daemon=True)
+
+    def idle_add(self, callback, *args) -> None:
+        self.queue.put((callback, args))
+
+    def run(self) -> None:
+        while True:
+            callback, args = self.queue.get()
+            if callback is None:
+                return
+            try:
+                repeat = callback(*args)
+            except Exception as e:
+                # GLib logs exceptions of callbacks and carries on as well
+                log.exception(f"Error in main loop callback: {e}")
+                continue
+            if repeat:
+                self.queue.put((callback, args))
+
+    def stop(self) -> None:
+        self.queue.put((None, ()))
+        self.thread.join()
+
+
+class HeadlessPlugin:
+    """The objects PrusaLinkStatusPlugin gives its actions, set up like the plugin does."""
+    def __init__(self, main_loop: MainLoop, printers: int, telemetry_directory: str = None):
+        self.lm = headless_host.Locales()
+        self.diagnostics = Diagnostics()
+        self.graph_cache = ImageCache()
+        self.render_pool = RenderPool(main_loop.idle_add, self.graph_cache, diagnostics=self.diagnostics)
+        self.thumbnails = ThumbnailLoader(main_loop.idle_add)
+        self.data_bus = DataBus(main_loop.idle_add, self.diagnostics)
+        self.farm = FarmSummary(self.data_bus)
+        self.registry = PrinterRegistry(FetchEngine(pool_size=max(32, printers)), self.data_bus, self.diagnostics,
+                                        telemetry_directory, summary=self.farm)
+
+    def get_settings(self) -> dict:
+        return {}
+
+
+def run_on_main_loop(main_loop: MainLoop, callback, *args) -> None:
+    # Actions are only ever touched from the main loop, wait until it ran the callback
+    done = threading.Event()
+
+    def run() -> None:
+        callback(*args)
+        done.set()
+
+    main_loop.idle_add(run)
+    done.wait()
+
+
+def create_keys(plugin: HeadlessPlugin, deck: headless_host.Deck, hosts: list[str]) -> list:
+    # The stand-ins have to be in place before the plugin's main module is imported
+    from plugins.com_core447_PrusaLinkStatus.main import MetricGraph, Status
+
+    keys = []
+    for index, host in enumerate(hosts):
+        for action_class, settings in ((Status, STATUS_SETTINGS), (MetricGraph, GRAPH_SETTINGS)):
+            key = action_class(action_id=action_class.__name__, action_name=action_class.__name__, deck_controller=deck,
+                               page=None, coords=f"{index},{len(keys) % 2}", plugin_base=plugin)
+            key.set_settings(dict(settings, ip=host, key="key"))
+            keys.append(key)
+    return keys
+
+
+def get_rss() -> int:
+    # Resident memory in bytes
+    with open("/proc/self/statm") as file:
+        return int(file.read().split()[1]) * resource.getpagesize()
+
+
+def merge(histograms) -> Histogram:
+    merged = Histogram()
+    for histogram in histograms:
+        merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+        merged.count += histogram.count
+        merged.total += histogram.total
+        merged.max = max(merged.max, histogram.max)
+    return merged
+
+
+def describe(histogram: Histogram) -> str:
+    stats = histogram.to_dict()
+    return f"p50 {stats['p50_ms']} ms | p95 {stats['p95_ms']} ms | p99 {stats['p99_ms']} ms | max {stats['max_ms']} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--printers", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=60, help="Real seconds to run")
+    parser.add_argument("--speedup", type=float, default=120, help="Simulated seconds per real second")
+    parser.add_argument("--poll-scale", type=float, default=1, help="Multiplies the poll intervals")
+    # Digest printers turn down the api key, they keep the auth failure path busy
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS) + ["digest"])
+    parser.add_argument("--telemetry-log", action="store_true", help="Also write the on disk telemetry logs")
+    args = parser.parse_args()
+
+    # The offline and slow printers would log a warning for every failure streak
+    log.remove()
+    log.add(sys.stderr, level="ERROR")
+
+    with FarmProcess(args.printers, scenarios=args.scenarios, speedup=args.speedup) as farm, \
+            tempfile.TemporaryDirectory() as directory:
+        main_loop = MainLoop()
+        main_loop.thread.start()
+        headless_host.install(main_loop.idle_add)
+        plugin = HeadlessPlugin(main_loop, args.printers,
+                                os.path.join(directory, "telemetry") if args.telemetry_log else None)
+        diagnostics = plugin.diagnostics
+        deck = headless_host.Deck()
+        keys = create_keys(plugin, deck, farm.hosts)
+
+        rss_start = get_rss()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+
+        scale = args.poll_scale
+        for key in keys:
+            run_on_main_loop(main_loop, key.on_ready)
+            key.printer.scheduler = PollScheduler(fast=1 * scale, normal=5 * scale, idle=10 * scale,
+                                                  max_interval=60 * scale)
+
+        stop = threading.Event()
+
+        def tick() -> None:
+            while not stop.wait(TICK):
+                for key in keys:
+                    main_loop.idle_add(key.on_tick)
+
+        ticker = threading.Thread(target=tick, name="tick", daemon=True)
+        ticker.start()
+
+        rss_samples = []
+        while time.perf_counter() - start < args.duration:
+            time.sleep(min(5, args.duration / 10))
+            rss_samples.append((time.perf_counter() - start, get_rss()))
+            print(f"  {rss_samples[-1][0]:6.1f} s  rss {rss_samples[-1][1] / 2 ** 20:7.1f} MiB  "
+                  f"fetches {sum(h.count for h in diagnostics.fetch_latency.values())}", flush=True)
+
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+        stop.set()
+        ticker.join()
+        counts = plugin.farm.get_counts()
+        alerts = sum(len(printer.alerts.active) for printer in plugin.registry.get_printers())
+        for key in keys:
+            run_on_main_loop(main_loop, key.on_removed_from_cache)
+        main_loop.stop()
+        plugin.render_pool.shutdown()
+        served = farm.stop()
+
+    fetches = sum(histogram.count for histogram in diagnostics.fetch_latency.values())
+    errors: dict[str, int] = {}
+    for printer_errors in diagnostics.errors.values():
+        for error, count in printer_errors.items():
+            errors[error] = errors.get(error, 0) + count
+    simulated_hours = elapsed * args.speedup / 3600
+
+    print(f"{args.printers} printers ({', '.join(args.scenarios)}), {elapsed:.0f} s, "
+          f"{simulated_hours:.1f} simulated hours per printer")
+    print(f"  status fetches   {fetches / elapsed:8.1f} per second ({served} requests served)")
+    print(f"  errors           {', '.join(f'{name}: {count}' for name, count in sorted(errors.items())) or 'none'}")
+    print(f"  plugin cpu       {cpu / elapsed * 100:8.1f} % of a core, {cpu / elapsed / args.printers * 1000:.2f} ms per printer per second")
+    print(f"  status latency   {describe(merge(diagnostics.fetch_latency.values()))}")
+    print(f"  other endpoints  {describe(merge(diagnostics.endpoint_latency.values()))}")
+    print(f"  render           {describe(merge(diagnostics.render_time.values()))}")
+    print(f"  fetch to display {describe(diagnostics.display_lag)}")
+    print(f"  farm summary     {', '.join(f'{state}: {count}' for state, count in sorted(counts.items()))}")
+    print(f"  active alerts    {alerts}")
+    print(f"  deck updates     {deck.updates / elapsed:8.1f} per second, graph cache {plugin.graph_cache.hits} hits / {plugin.graph_cache.misses} misses")
+    if len(rss_samples) >= 2:
+        # Skip the first sample, it still contains the warm up
+        (first_time, first_rss), (last_time, last_rss) = rss_samples[0], rss_samples[-1]
+        growth = (last_rss - first_rss) / max(1e-9, (last_time - first_time) * args.speedup / 3600)
+        print(f"  memory           {rss_start / 2 ** 20:.1f} MiB at start, {last_rss / 2 ** 20:.1f} MiB at the end, "
+              f"{growth / 2 ** 20:+.2f} MiB per simulated hour after warm up")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Replays status sequences through EtaEstimator and compares its eta with PrusaLink's time_remaining.
+
+Without --log, prints are simulated with a slicer estimate that is off, a speed change by the user
+that the printer can't fully follow and sometimes a pause, see simulate_print.
+With --log, a telemetry log written by the plugin is replayed, the truth is when progress reached 100.
+
+Usage: python benchmarks/bench_eta.py [--prints 20] [--duration 7200] [--poll 2] [--window 10 30] [--log FILE ...]
+"""
+import argparse
+import math
+import random
+import statistics
+import time
+
+import plugin_path  # noqa: F401
+
+from plugins.com_core447_PrusaLinkStatus.EtaEstimator import EtaEstimator
+from plugins.com_core447_PrusaLinkStatus.TelemetryLog import read_file, to_dict
+
+
+def simulate_print(estimate: float, poll: float, error: float = 1.1, speed_change_at: float = 0.4,
+                   speed: float = 1.3, effective_speed: float = 1.15, pause_at: float = 0.5,
+                   pause_length: float = 600) -> list:
+    """
+    Returns (timestamp, status, true remaining seconds) samples of one print.
+    Like M73, progress is the share of the slicer's time estimate that is done and time_remaining the rest
+    of the estimate divided by the speed setting. The printer is error times slower than the slicer thinks,
+    and a speed change only speeds it up by effective_speed because of acceleration limits.
+    """
+    samples = []
+    now, print_time, done = 0.0, 0.0, 0.0
+    paused = False
+    start_time = 1_700_000_000.0
+    while done < 1:
+        if not paused and done >= pause_at and pause_length > 0:
+            paused, pause_end = True, now + pause_length
+        changed = done >= speed_change_at
+        if paused and now < pause_end:
+            state = "PAUSED"
+        else:
+            state = "PRINTING"
+            done = min(1, done + poll / estimate / error * (effective_speed if changed else 1))
+            print_time += poll
+        now += poll
+
+        status = {
+            "id": 1,
+            "state": state,
+            "progress": math.floor(done * 100),
+            "time_printing": round(print_time),
+            # M73 reports whole minutes
+            "time_remaining": round((1 - done) * estimate / (speed if changed else 1) / 60) * 60,
+        }
+        samples.append((start_time + now, status))
+
+    end = samples[-1][0]
+    return [(timestamp, status, end - timestamp) for timestamp, status in samples]
+
+
+def load_log(path: str) -> list:
+    samples = []
+    for timestamp, values in read_file(path):
+        status = to_dict(values)
+        if "progress" not in status:
+            continue
+        status["id"] = 1
+        samples.append((timestamp, status))
+
+    # Truth is when the print reached 100, records after that or of unfinished prints are left out
+    finished = [timestamp for timestamp, status in samples if status["progress"] >= 100]
+    if not finished:
+        return []
+    end = finished[0]
+    return [(timestamp, status, end - timestamp) for timestamp, status in samples if timestamp <= end]
+
+
+def replay(samples: list, window: int) -> tuple[list[float], list[float], float]:
+    estimator = EtaEstimator(window=window)
+    reported_errors, estimated_errors = [], []
+    cost = 0.0
+    for timestamp, status, remaining in samples:
+        data = dict(status)
+        start = time.perf_counter()
+        estimator.update(data, now=timestamp)
+        cost += time.perf_counter() - start
+        if data["progress"] >= 100 or data.get("state") == "PAUSED":
+            continue
+        if "time_remaining" in data:
+            reported_errors.append(abs(data["time_remaining"] - remaining))
+        if "eta" in data:
+            estimated_errors.append(abs(data["eta"] - remaining))
+    return reported_errors, estimated_errors, cost / max(1, len(samples))
+
+
+def describe(errors: list[float]) -> str:
+    if not errors:
+        return "no samples"
+    errors = sorted(errors)
+    return (f"mean {statistics.mean(errors) / 60:6.1f} min | p90 {errors[int(len(errors) * 0.9)] / 60:6.1f} min | "
+            f"max {errors[-1] / 60:6.1f} min")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prints", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=2 * 60 * 60, help="Nominal print duration in seconds")
+    parser.add_argument("--poll", type=float, default=2)
+    parser.add_argument("--window", type=int, nargs="*", default=[EtaEstimator().window],
+                        help="Regression windows to compare, in progress steps")
+    parser.add_argument("--log", nargs="*", default=[], help="Telemetry log files to replay instead of simulating")
+    args = parser.parse_args()
+
+    if args.log:
+        runs = [load_log(path) for path in args.log]
+    else:
+        random.seed(1)
+        runs = []
+        for _ in range(args.prints):
+            speed = random.choice((1, 1.3, 0.8))
+            runs.append(simulate_print(args.duration * random.uniform(0.5, 1.5), args.poll,
+                                       error=random.uniform(0.95, 1.2), speed_change_at=random.uniform(0.1, 0.9),
+                                       speed=speed, effective_speed=1 + (speed - 1) * random.uniform(0.3, 0.8),
+                                       pause_at=random.uniform(0.2, 0.8), pause_length=random.choice((0, 0, 300))))
+    runs = [samples for samples in runs if samples]
+    if not runs:
+        print("Nothing to replay")
+        return
+
+    print(f"{len(runs)} prints, {sum(len(samples) for samples in runs)} samples")
+    reported = [error for samples in runs for error in replay(samples, args.window[0])[0]]
+    print(f"  time_remaining error      {describe(reported)}")
+    for window in args.window:
+        estimated, costs = [], []
+        for samples in runs:
+            _, estimated_errors, cost = replay(samples, window)
+            estimated += estimated_errors
+            costs.append(cost)
+        print(f"  eta error, window {window:3d}  {describe(estimated)} | {statistics.mean(costs) * 1e6:.2f} us per sample")
+
+if __name__ == "__main__":
+    main()
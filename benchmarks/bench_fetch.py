@@ -0,0 +1,85 @@
+"""
+Compares one status poll round over many printers:
+  - requests without a session, one thread per printer (what PrusaLinkPy does)
+  - FetchEngine: one event loop, pooled keep-alive connections
+
+Usage: python benchmarks/bench_fetch.py [--printers 1 10 50 100] [--rounds 20] [--delay 0.005]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import plugin_path  # noqa: F401
+import requests
+
+from fake_prusalink import FarmThread
+from plugins.com_core447_PrusaLinkStatus.FetchEngine import FetchEngine
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def bench_requests(hosts: list[str], rounds: int) -> tuple[list[float], list[float]]:
+    latencies, round_times = [], []
+
+    def fetch(host: str) -> float:
+        start = time.perf_counter()
+        requests.get(f"http://{host}/api/v1/status", headers={"X-Api-Key": "key"}).json()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=len(hosts)) as pool:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            latencies.extend(pool.map(fetch, hosts))
+            round_times.append(time.perf_counter() - start)
+    return latencies, round_times
+
+
+def bench_engine(hosts: list[str], rounds: int) -> tuple[list[float], list[float]]:
+    engine = FetchEngine(pool_size=max(32, len(hosts)))
+    engine.start()
+    latencies, round_times = [], []
+
+    async def fetch(host: str) -> float:
+        start = time.perf_counter()
+        await engine.get_json(host, "key", "/api/v1/status")
+        return time.perf_counter() - start
+
+    async def poll_round() -> list[float]:
+        return await asyncio.gather(*(fetch(host) for host in hosts))
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        latencies.extend(engine.submit(poll_round()).result())
+        round_times.append(time.perf_counter() - start)
+    engine.stop()
+    return latencies, round_times
+
+
+def report(name: str, latencies: list[float], round_times: list[float]) -> None:
+    print(f"  {name:<10} round median {statistics.median(round_times) * 1000:8.2f} ms | "
+          f"latency p50 {percentile(latencies, 0.5) * 1000:7.2f} ms  "
+          f"p95 {percentile(latencies, 0.95) * 1000:7.2f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--printers", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.005, help="simulated PrusaLink processing time in seconds")
+    args = parser.parse_args()
+
+    for count in args.printers:
+        with FarmThread(count, args.delay) as hosts:
+            print(f"{count} printers, {args.rounds} rounds")
+            report("requests", *bench_requests(hosts, args.rounds))
+            report("engine", *bench_engine(hosts, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Checks what loading the plugin costs before any printer or graph is used.
+
+Follows the module level imports of main.py through the plugin's own modules, fails if a heavy
+dependency is imported at load time and measures the import time of everything StreamController
+doesn't already have loaded, using python -X importtime.
+
+Usage: python benchmarks/bench_import.py [--budget-ms 50]
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+from plugin_path import PLUGIN_DIR, PLUGIN_ID
+
+PACKAGE = f"plugins.{PLUGIN_ID}"
+# Already imported by StreamController itself when the plugin is loaded
+APP_MODULES = {"src", "gi", "globals", "loguru", "PIL"}
+# Must only be imported when they are actually needed
+DEFERRED_MODULES = {"matplotlib", "numpy", "aiohttp", "PrusaLinkPy", "requests"}
+
+
+def get_module_imports(path: str) -> set[str]:
+    # Only module level statements, imports inside functions are deferred by definition
+    with open(path) as file:
+        tree = ast.parse(file.read(), path)
+    modules = set()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.add(node.module)
+    return modules
+
+
+def collect_imports(entry: str = "main.py") -> tuple[set[str], set[str]]:
+    plugin_modules, external_modules = set(), set()
+    pending = [os.path.join(PLUGIN_DIR, entry)]
+    while pending:
+        for module in get_module_imports(pending.pop()):
+            if module.startswith(PACKAGE + "."):
+                name = module[len(PACKAGE) + 1:]
+                if name not in plugin_modules:
+                    plugin_modules.add(name)
+                    pending.append(os.path.join(PLUGIN_DIR, f"{name}.py"))
+            else:
+                external_modules.add(module)
+    return plugin_modules, external_modules
+
+
+def is_app_module(module: str) -> bool:
+    return module.split(".")[0] in APP_MODULES
+
+
+def measure(plugin_modules: list[str], external_modules: list[str]) -> list[tuple[str, int, int]]:
+    # Returns (module, nesting level, cumulative microseconds) in the order python -X importtime reports them
+    code = "; ".join(
+        ["import sys", f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})", "import plugin_path"] +
+        [f"import {module}" for module in sorted(APP_MODULES - {"src", "gi", "globals"})] +
+        [f"import {module}" for module in external_modules] +
+        [f"import {PACKAGE}.{module}" for module in plugin_modules]
+    )
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two spaces per level
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), level, int(cumulative_us)))
+        if name.strip() == "plugin_path":
+            # Everything before was interpreter startup
+            entries.clear()
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    plugin_modules, external_modules = collect_imports()
+    failed = False
+
+    eager = sorted(m for m in external_modules if m.split(".")[0] in DEFERRED_MODULES)
+    if eager:
+        print(f"FAIL: imported at plugin load: {', '.join(eager)}")
+        failed = True
+
+    # Modules that need the app or gtk can't be imported here, their own imports were checked above
+    standalone = sorted(m for m in plugin_modules
+                        if not any(is_app_module(i) for i in get_module_imports(os.path.join(PLUGIN_DIR, f"{m}.py"))))
+    externals = sorted(m for m in external_modules if not is_app_module(m) and m.split(".")[0] not in DEFERRED_MODULES)
+    entries = measure(standalone, externals)
+
+    loaded = {name.split(".")[0] for name, _, _ in entries}
+    late = sorted(loaded & DEFERRED_MODULES)
+    if late:
+        print(f"FAIL: imported at plugin load through a dependency: {', '.join(late)}")
+        failed = True
+
+    # Top level imports include everything they pulled in. Whatever the app modules pulled in is already loaded in StreamController.
+    total_us = sum(cumulative_us for name, level, cumulative_us in entries
+                   if level == 0 and not is_app_module(name))
+    print(f"Plugin modules checked: {', '.join(sorted(plugin_modules))}")
+    print("Imports added by the plugin:")
+    for name, _, cumulative_us in sorted((e for e in entries if e[1] == 0 and not is_app_module(e[0])), key=lambda entry: -entry[2]):
+        print(f"  {cumulative_us / 1000:8.2f} ms  {name}")
+    print(f"Total {total_us / 1000:.2f} ms of {args.budget_ms:.0f} ms budget")
+    if total_us / 1000 > args.budget_ms:
+        print("FAIL: over budget")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares rendering a label with the old per-key str.replace loop and with a compiled LabelTemplate.
+
+Usage: python benchmarks/bench_labels.py [--extra-keys 0 50 500] [--iterations 20000]
+"""
+import argparse
+import timeit
+
+import plugin_path  # noqa: F401
+
+from fake_prusalink import make_status
+from plugins.com_core447_PrusaLinkStatus.LabelTemplate import LabelTemplate
+
+LABELS = [
+    "{temp_nozzle}°C",
+    "{progress}% {time_remaining}",
+    "{state} {temp_nozzle}/{target_nozzle} {temp_bed}/{target_bed}",
+]
+
+
+def seconds_to_readable(seconds: int) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def inject_data(label: str, data: dict) -> str:
+    # The renderer Status used before LabelTemplate
+    for key in data:
+        value = data[key]
+        if key in ["time_remaining", "time_printing"]:
+            value = seconds_to_readable(value)
+
+        if isinstance(value, float):
+            value = round(value)
+
+        label = label.replace("{" + key + "}", str(value))
+    return label
+
+
+def make_data(extra_keys: int) -> dict:
+    status = make_status(50)
+    data = {}
+    data.update(status["printer"])
+    data.update(status["job"])
+    for i in range(extra_keys):
+        data[f"extra_{i}"] = float(i)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--extra-keys", type=int, nargs="+", default=[0, 50, 500])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    for extra_keys in args.extra_keys:
+        data = make_data(extra_keys)
+        print(f"{len(data)} keys in status")
+        for label in LABELS:
+            template = LabelTemplate(label)
+            assert template.render(data) == inject_data(label, data)
+
+            old = timeit.timeit(lambda: inject_data(label, data), number=args.iterations)
+            new = timeit.timeit(lambda: template.render(data), number=args.iterations)
+            print(f"  {label!r:<64} replace {old / args.iterations * 1e6:8.2f} us | "
+                  f"compiled {new / args.iterations * 1e6:6.2f} us | {old / new:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Main loop responsiveness while many graph keys redraw: graphs drawn inline on the main loop, like before,
+against the shared RenderPool with worker threads.
+Every key gets a new frame at --rate per second, a heartbeat measures how late the main loop runs its callbacks.
+
+Usage: python benchmarks/bench_render.py [--keys 32] [--rate 2] [--duration 10] [--workers 2]
+"""
+import argparse
+import math
+import statistics
+import threading
+import time
+
+import plugin_path  # noqa: F401
+
+from bench_e2e import MainLoop
+from plugins.com_core447_PrusaLinkStatus.GraphRenderer import GraphStyle, draw_graph, prepare_graph
+from plugins.com_core447_PrusaLinkStatus.ImageCache import ImageCache
+from plugins.com_core447_PrusaLinkStatus.RenderPool import RenderPool
+
+HEARTBEAT = 0.01
+
+
+class GraphKey:
+    def __init__(self, index: int, pool: RenderPool, cache: ImageCache):
+        self.index = index
+        self.pool = pool
+        self.cache = cache
+        self.style = GraphStyle(show_target_line=True)
+        self.shown = 0
+
+    def show(self, step: int) -> None:
+        # A new sample every step, like a printer update
+        values = [210 + 10 * math.sin((step + i + self.index) / 10) for i in range(300)]
+        frame = prepare_graph(values, 215, self.style, timestamps=list(range(300)), time_range=(0, 300))
+        if self.pool is None:
+            if self.cache.get(frame) is None:
+                self.cache.put(frame, draw_graph(frame))
+            self.shown += 1
+        elif self.pool.render(self, frame, self.on_rendered) is not None:
+            self.shown += 1
+
+    def on_rendered(self, frame, image) -> None:
+        self.shown += 1
+
+
+def run(mode: str, args) -> None:
+    main_loop = MainLoop()
+    main_loop.thread.start()
+    cache = ImageCache()
+    pool = None if mode == "inline" else RenderPool(main_loop.idle_add, cache, workers=args.workers)
+    keys = [GraphKey(index, pool, cache) for index in range(args.keys)]
+    if pool is not None:
+        # Start the workers before measuring
+        pool.get_executor().submit(sum, ()).result()
+
+    lateness = []
+    stop = threading.Event()
+
+    def beat(posted: float) -> None:
+        lateness.append(time.perf_counter() - posted)
+
+    def heartbeat() -> None:
+        while not stop.is_set():
+            main_loop.idle_add(beat, time.perf_counter())
+            time.sleep(HEARTBEAT)
+
+    def updates() -> None:
+        step = 0
+        while not stop.is_set():
+            step += 1
+            for key in keys:
+                main_loop.idle_add(key.show, step)
+            time.sleep(1 / args.rate)
+
+    threads = [threading.Thread(target=heartbeat), threading.Thread(target=updates)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    main_loop.stop()
+    if pool is not None:
+        pool.shutdown()
+
+    lateness.sort()
+    requested = args.keys * args.rate * elapsed
+    shown = sum(key.shown for key in keys)
+    print(f"  {mode:9s}  main loop lateness p50 {statistics.median(lateness) * 1000:6.2f} ms | "
+          f"p99 {lateness[int(len(lateness) * 0.99)] * 1000:6.2f} ms | max {lateness[-1] * 1000:6.2f} ms | "
+          f"{shown / elapsed:6.1f} frames shown per second of {requested / elapsed:.0f} asked for")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=32)
+    parser.add_argument("--rate", type=float, default=2, help="New frames per key and second")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", default=["inline", "threads"])
+    args = parser.parse_args()
+
+    print(f"{args.keys} graph keys, {args.rate} frames per key and second, {args.workers} workers")
+    for mode in args.modes:
+        run(mode, args)
+
+
+if __name__ == "__main__":
+    main()
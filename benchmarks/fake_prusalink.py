@@ -0,0 +1,442 @@
+"""
+Fake PrusaLink http server for benchmarks.
+Every printer listens on its own port on localhost and answers /api/v1/status, /api/v1/job, /api/v1/info,
+/api/v1/storage and the job thumbnail. The job endpoint sends an ETag and answers 304 to matching conditional requests.
+
+Printers either count their progress up on every status request, or follow a scripted Timeline of phases
+(heating, printing, paused, error, offline, slow responses) on a simulated clock that can run faster than real time.
+Printers can require an api key or http digest auth like PrusaLink without an api key.
+The plugin only sends the api key, so digest printers stand for printers whose key is wrong or missing.
+All printers of a farm share one aiohttp server, so hundreds of them fit into one process.
+
+Usage: python benchmarks/fake_prusalink.py [--printers 1] [--scenario print] [--speedup 1]
+"""
+import argparse
+import asyncio
+import functools
+import hashlib
+import io
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from typing import NamedTuple
+
+from aiohttp import web
+
+ROOM_TEMP = 25.0
+NOZZLE_TEMP = 215.0
+BED_TEMP = 60.0
+
+DIGEST_REALM = "Printer API"
+THUMBNAIL_PATH = "/thumb/l/usb/BENCHY~1.BGC"
+
+
+def make_status(progress: float = 0, job_id: int = 42) -> dict:
+    return {
+        "printer": {
+            "state": "PRINTING",
+            "temp_bed": 60.1 + random.random(),
+            "target_bed": 60.0,
+            "temp_nozzle": 215.4 + random.random(),
+            "target_nozzle": 215.0,
+            "axis_z": 2.4,
+            "axis_x": 120.5,
+            "axis_y": 98.0,
+            "flow": 100,
+            "speed": 100,
+            "fan_hotend": 7800,
+            "fan_print": 5200,
+        },
+        "job": {
+            "id": job_id,
+            "progress": progress,
+            "time_remaining": 3600,
+            "time_printing": 1200,
+        },
+    }
+
+
+def make_job(job_id: int, progress: float = 0) -> dict:
+    return {
+        "id": job_id,
+        "state": "PRINTING",
+        "progress": progress,
+        "time_remaining": 3600,
+        "time_printing": 1200,
+        "file": {
+            "name": "BENCHY~1.BGC",
+            "display_name": "benchy_0.4n_0.2mm_PLA_MK4_1h.bgcode",
+            "path": "/usb",
+            "size": 1862391,
+            "refs": {"thumbnail": THUMBNAIL_PATH},
+        },
+    }
+
+
+INFO = {"name": "Fake MK4", "hostname": "prusa-mk4", "serial": "FAKE-0001", "nozzle_diameter": 0.4}
+STORAGE = {"storage_list": [{"type": "USB", "path": "/usb", "name": "usb", "available": True,
+                             "free_space": 7 * 1024 ** 3, "total_space": 8 * 1024 ** 3}]}
+
+
+@functools.cache
+def make_thumbnail() -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (313, 173), (250, 104, 0)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class Phase(NamedTuple):
+    # idle, heating, printing, paused, error, finished or offline
+    kind: str
+    # Simulated seconds
+    duration: float
+    # Seconds every response is held back, more than the plugin's timeout makes requests time out
+    delay: float = 0
+
+
+# Scripted printer lives, they start over when they reach the end
+SCENARIOS = {
+    "print": (Phase("idle", 120), Phase("heating", 180), Phase("printing", 2 * 60 * 60), Phase("finished", 300)),
+    "paused": (Phase("heating", 120), Phase("printing", 30 * 60), Phase("paused", 10 * 60), Phase("printing", 30 * 60),
+               Phase("finished", 300)),
+    "error": (Phase("heating", 120), Phase("printing", 20 * 60), Phase("error", 10 * 60), Phase("idle", 10 * 60)),
+    "offline": (Phase("heating", 120), Phase("printing", 20 * 60), Phase("offline", 5 * 60), Phase("printing", 20 * 60),
+                Phase("finished", 300)),
+    "slow": (Phase("heating", 120, delay=0.5), Phase("printing", 30 * 60, delay=1.5), Phase("printing", 5 * 60, delay=8),
+             Phase("printing", 30 * 60, delay=0.2), Phase("finished", 300)),
+}
+
+
+class Timeline:
+    """Status of a printer at any point of a looping list of phases."""
+    def __init__(self, phases: tuple, job_id: int = 1):
+        self.phases = phases
+        self.duration = sum(phase.duration for phase in phases)
+        self.print_duration = sum(phase.duration for phase in phases if phase.kind == "printing")
+        self.job_id = job_id
+
+    def locate(self, t: float) -> tuple[Phase, float, float, int]:
+        """Returns the phase at simulated time t, the time into it, the printing time before t and the loop count."""
+        loop, t = divmod(t, self.duration)
+        printed = 0.0
+        for phase in self.phases:
+            if t < phase.duration:
+                if phase.kind == "printing":
+                    printed += t
+                return phase, t, printed, int(loop)
+            t -= phase.duration
+            if phase.kind == "printing":
+                printed += phase.duration
+        return self.phases[-1], self.phases[-1].duration, printed, int(loop)
+
+    def status_at(self, t: float) -> dict:
+        """None while the printer is offline."""
+        phase, offset, printed, loop = self.locate(t)
+        if phase.kind == "offline":
+            return None
+
+        share = offset / phase.duration if phase.duration else 1
+        state = {"idle": "IDLE", "heating": "PRINTING", "printing": "PRINTING", "paused": "PAUSED",
+                 "error": "ERROR", "finished": "FINISHED"}[phase.kind]
+        if phase.kind in ("heating", "printing", "paused"):
+            nozzle_target, bed_target = NOZZLE_TEMP, BED_TEMP
+        else:
+            nozzle_target = bed_target = 0.0
+
+        if phase.kind == "heating":
+            nozzle = ROOM_TEMP + (NOZZLE_TEMP - ROOM_TEMP) * min(1, share * 1.2)
+            bed = ROOM_TEMP + (BED_TEMP - ROOM_TEMP) * min(1, share * 1.5)
+        elif nozzle_target:
+            nozzle, bed = nozzle_target, bed_target
+        else:
+            # Cooling down exponentially
+            nozzle = ROOM_TEMP + (NOZZLE_TEMP - ROOM_TEMP) * math.exp(-offset / 120)
+            bed = ROOM_TEMP + (BED_TEMP - ROOM_TEMP) * math.exp(-offset / 300)
+        noise = math.sin(t / 7) * 0.4
+
+        printer = {
+            "state": state,
+            "temp_nozzle": round(nozzle + noise, 1),
+            "target_nozzle": nozzle_target,
+            "temp_bed": round(bed + noise / 2, 1),
+            "target_bed": bed_target,
+            "axis_x": round(125 + 100 * math.sin(t / 3), 1) if phase.kind == "printing" else 0.0,
+            "axis_y": round(105 + 90 * math.cos(t / 5), 1) if phase.kind == "printing" else 0.0,
+            "axis_z": round(printed / self.print_duration * 48, 2) if self.print_duration else 0.0,
+            "flow": 100,
+            "speed": 100,
+            "fan_hotend": 7800 if nozzle > 50 else 0,
+            "fan_print": 5200 if phase.kind == "printing" else 0,
+        }
+        status = {"printer": printer}
+        if phase.kind in ("heating", "printing", "paused", "finished"):
+            progress = printed / self.print_duration if self.print_duration else 1
+            status["job"] = {
+                "id": self.job_id + loop,
+                "progress": 100 if phase.kind == "finished" else math.floor(progress * 100),
+                "time_remaining": round((self.print_duration - printed) / 60) * 60,
+                "time_printing": round(printed),
+            }
+        return status
+
+    def delay_at(self, t: float) -> float:
+        return self.locate(t)[0].delay
+
+
+class FakePrinter:
+    def __init__(self, api_key: str = "key", delay: float = 0, timeline: Timeline = None, speedup: float = 1,
+                 offset: float = 0, digest_password: str = None):
+        self.api_key = api_key
+        self.delay = delay
+        # With digest_password the printer wants digest auth as user "maker" instead of an api key
+        self.digest_password = digest_password
+        self.nonce = os.urandom(8).hex()
+
+        self.timeline = timeline
+        self.speedup = speedup
+        self.offset = offset
+        self.started = time.monotonic()
+
+        self.requests = 0
+        self.job_requests = 0
+        self.job_id = 42
+        self.progress = 0.0
+
+    def get_time(self) -> float:
+        # Simulated seconds since the start of the timeline
+        return self.offset + (time.monotonic() - self.started) * self.speedup
+
+    def is_authorized(self, request: web.Request) -> bool:
+        if self.digest_password is None:
+            return request.headers.get("X-Api-Key") == self.api_key
+        return self.check_digest(request)
+
+    def check_digest(self, request: web.Request) -> bool:
+        header = request.headers.get("Authorization", "")
+        if not header.startswith("Digest "):
+            return False
+        fields = {}
+        for part in header[len("Digest "):].split(","):
+            name, _, value = part.strip().partition("=")
+            fields[name] = value.strip('"')
+
+        def md5(text: str) -> str:
+            return hashlib.md5(text.encode()).hexdigest()
+
+        ha1 = md5(f"maker:{DIGEST_REALM}:{self.digest_password}")
+        ha2 = md5(f"{request.method}:{fields.get('uri', '')}")
+        if fields.get("qop") == "auth":
+            expected = md5(f"{ha1}:{fields.get('nonce')}:{fields.get('nc')}:{fields.get('cnonce')}:auth:{ha2}")
+        else:
+            expected = md5(f"{ha1}:{fields.get('nonce')}:{ha2}")
+        return fields.get("username") == "maker" and fields.get("nonce") == self.nonce and fields.get("response") == expected
+
+    def unauthorized(self) -> web.Response:
+        if self.digest_password is None:
+            return web.Response(status=401)
+        return web.Response(status=401, headers={
+            "WWW-Authenticate": f'Digest realm="{DIGEST_REALM}", nonce="{self.nonce}", qop="auth"'})
+
+    async def respond(self, request: web.Request) -> web.Response:
+        """Applies auth, delays and offline phases, returns a response to send instead of the real one or None."""
+        self.requests += 1
+        delay = self.delay
+        if self.timeline is not None:
+            t = self.get_time()
+            if self.timeline.status_at(t) is None:
+                # Offline, drop the connection like a printer that was switched off
+                request.transport.close()
+                return web.Response(status=503)
+            delay = max(delay, self.timeline.delay_at(t))
+        if not self.is_authorized(request):
+            return self.unauthorized()
+        if delay:
+            await asyncio.sleep(delay)
+        return None
+
+    def get_status(self) -> dict:
+        if self.timeline is not None:
+            return self.timeline.status_at(self.get_time())
+        self.progress = min(100, self.progress + 0.1)
+        return make_status(self.progress, self.job_id)
+
+    async def handle_status(self, request: web.Request) -> web.Response:
+        response = await self.respond(request)
+        if response is not None:
+            return response
+        return web.json_response(self.get_status())
+
+    async def handle_job(self, request: web.Request) -> web.Response:
+        self.job_requests += 1
+        response = await self.respond(request)
+        if response is not None:
+            return response
+        status = self.get_status()
+        job = status.get("job") if status is not None else None
+        if self.timeline is not None and job is None:
+            return web.Response(status=204)
+        job_id = job["id"] if job is not None else self.job_id
+
+        etag = f'"job-{job_id}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.json_response(make_job(job_id, job["progress"] if job else self.progress), headers={"ETag": etag})
+
+    def make_static_handler(self, body):
+        async def handle(request: web.Request) -> web.Response:
+            response = await self.respond(request)
+            if response is not None:
+                return response
+            if isinstance(body, bytes):
+                return web.Response(body=body, content_type="image/png")
+            return web.json_response(body)
+        return handle
+
+    def get_routes(self) -> dict:
+        return {
+            "/api/v1/status": self.handle_status,
+            "/api/v1/job": self.handle_job,
+            "/api/v1/info": self.make_static_handler(INFO),
+            "/api/v1/storage": self.make_static_handler(STORAGE),
+            THUMBNAIL_PATH: self.make_static_handler(make_thumbnail()),
+        }
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        for path, handler in self.get_routes().items():
+            app.router.add_get(path, handler)
+        return app
+
+
+class FakePrinterFarm:
+    """
+    count printers, each on its own port. With scenarios, printer i follows scenarios[i % len(scenarios)],
+    "digest" runs the print scenario behind digest auth. Timelines start at random points unless spread is False.
+    """
+    def __init__(self, count: int, delay: float = 0, host: str = "127.0.0.1", scenarios: list[str] = None,
+                 speedup: float = 1, spread: bool = True):
+        self.host = host
+        self.printers: list[FakePrinter] = []
+        self.scenarios: list[str] = []
+        for i in range(count):
+            if not scenarios:
+                self.printers.append(FakePrinter(delay=delay))
+                self.scenarios.append("counter")
+                continue
+            scenario = scenarios[i % len(scenarios)]
+            timeline = Timeline(SCENARIOS.get(scenario, SCENARIOS["print"]), job_id=1000 * (i + 1))
+            self.printers.append(FakePrinter(
+                delay=delay, timeline=timeline, speedup=speedup,
+                offset=random.uniform(0, timeline.duration) if spread else 0,
+                digest_password="secret" if scenario == "digest" else None))
+            self.scenarios.append(scenario)
+
+        self.runner: web.AppRunner = None
+        self.ports: dict[int, FakePrinter] = {}
+        self.hosts: list[str] = []
+
+    def make_app(self) -> web.Application:
+        # One app for all printers, requests are routed to the printer by the port they came in on
+        routes = {printer: printer.get_routes() for printer in self.printers}
+        app = web.Application()
+        for path in FakePrinter().get_routes():
+            async def handle(request: web.Request, path: str = path) -> web.Response:
+                printer = self.ports[request.transport.get_extra_info("sockname")[1]]
+                return await routes[printer][path](request)
+            app.router.add_get(path, handle)
+        return app
+
+    async def start(self) -> list[str]:
+        self.runner = web.AppRunner(self.make_app(), access_log=None)
+        await self.runner.setup()
+        for printer in self.printers:
+            site = web.TCPSite(self.runner, self.host, 0, backlog=256)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            self.ports[port] = printer
+            self.hosts.append(f"{self.host}:{port}")
+        return self.hosts
+
+    async def stop(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+        self.ports.clear()
+        self.hosts.clear()
+
+
+class FarmThread:
+    """Runs the fake printers on their own event loop so they don't share the engine's loop."""
+    def __init__(self, count: int, delay: float = 0, **kwargs):
+        self.farm = FakePrinterFarm(count, delay=delay, **kwargs)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def __enter__(self) -> list[str]:
+        self.thread.start()
+        return asyncio.run_coroutine_threadsafe(self.farm.start(), self.loop).result()
+
+    def __exit__(self, *args):
+        asyncio.run_coroutine_threadsafe(self.farm.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def run_farm_process(connection, count: int, kwargs: dict) -> None:
+    async def main():
+        farm = FakePrinterFarm(count, **kwargs)
+        connection.send((await farm.start(), farm.scenarios))
+        # Serve until the parent asks for the request count
+        await asyncio.get_running_loop().run_in_executor(None, connection.recv)
+        connection.send(sum(printer.requests for printer in farm.printers))
+        await farm.stop()
+
+    asyncio.run(main())
+
+
+class FarmProcess:
+    """Runs the fake printers in a separate process, so their cpu time isn't counted for the code being measured."""
+    def __init__(self, count: int, **kwargs):
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=run_farm_process, args=(child_connection, count, kwargs),
+                                               daemon=True)
+        self.hosts: list[str] = []
+        self.scenarios: list[str] = []
+
+    def __enter__(self) -> "FarmProcess":
+        self.process.start()
+        self.hosts, self.scenarios = self.connection.recv()
+        return self
+
+    def stop(self) -> int:
+        """Stops the printers and returns how many requests they got."""
+        self.connection.send(None)
+        requests = self.connection.recv()
+        self.process.join()
+        return requests
+
+    def __exit__(self, *args):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--printers", type=int, default=1)
+    parser.add_argument("--scenario", nargs="*", default=[], help=f"Any of {', '.join(SCENARIOS)}, digest")
+    parser.add_argument("--speedup", type=float, default=1, help="Simulated seconds per real second")
+    args = parser.parse_args()
+
+    async def main():
+        farm = FakePrinterFarm(args.printers, scenarios=args.scenario, speedup=args.speedup)
+        hosts = await farm.start()
+        for host, scenario in zip(hosts, farm.scenarios):
+            print(f"Fake PrusaLink ({scenario}) listening on http://{host} (api key: key, digest: maker/secret)")
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
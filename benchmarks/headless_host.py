@@ -0,0 +1,141 @@
+"""
+Just enough of StreamController and gi to create the plugin's real actions without gtk or a deck.
+install() has to run before the plugin's main module is imported.
+Config rows and other gtk widgets are stubs, only what the actions do on the main loop is real.
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import types
+
+import plugin_path
+
+
+class Stub:
+    """Stands in for any widget, enum or function of gtk, every attribute and call gives another stub."""
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name: str) -> "Stub":
+        return Stub()
+
+    def __call__(self, *args, **kwargs) -> "Stub":
+        return Stub()
+
+
+class Deck:
+    """Counts the updates the keys send, like a real deck gets them."""
+    def __init__(self):
+        self.updates = 0
+
+    def update(self) -> None:
+        self.updates += 1
+
+
+class ActionBase:
+    """The part of StreamController's ActionBase the plugin's actions use, key output goes nowhere."""
+    def __init__(self, action_id: str, action_name: str, deck_controller, page, coords: str, plugin_base):
+        self.action_id = action_id
+        self.action_name = action_name
+        # A Deck here, it only counts updates
+        self.deck_controller = deck_controller
+        self.page = page
+        self.coords = coords
+        self.plugin_base = plugin_base
+        self.settings = {}
+
+    def get_settings(self) -> dict:
+        return self.settings
+
+    def set_settings(self, settings: dict) -> None:
+        self.settings = settings
+
+    def set_top_label(self, text: str, update: bool = True, **style) -> None:
+        pass
+
+    set_center_label = set_bottom_label = set_top_label
+
+    def set_media(self, image=None, update: bool = True, **kwargs) -> None:
+        pass
+
+    def set_background_color(self, color: list = None, update: bool = True) -> None:
+        pass
+
+    def get_input(self) -> Deck:
+        return self.deck_controller
+
+
+class Locales:
+    """Reads the plugin's english strings like StreamController's locale manager."""
+    def __init__(self):
+        with open(os.path.join(plugin_path.PLUGIN_DIR, "locales", "en_US.json")) as file:
+            self.strings = json.load(file)
+
+    def get(self, key: str) -> str:
+        return self.strings.get(key, key)
+
+
+class GLib(types.ModuleType):
+    """idle_add and timeout_add hand their callbacks to the dispatch given to install()."""
+    SOURCE_REMOVE = False
+    SOURCE_CONTINUE = True
+
+    def __init__(self, dispatch):
+        super().__init__("gi.repository.GLib")
+        self.dispatch = dispatch
+        self.timers: dict[int, threading.Timer] = {}
+        self.next_id = 0
+
+    def idle_add(self, callback, *args) -> int:
+        self.dispatch(callback, *args)
+        return 0
+
+    def timeout_add(self, milliseconds: int, callback, *args) -> int:
+        self.next_id += 1
+        timer = self.timers[self.next_id] = threading.Timer(milliseconds / 1000, self.dispatch, (callback, *args))
+        timer.daemon = True
+        timer.start()
+        return self.next_id
+
+    def timeout_add_seconds(self, seconds: int, callback, *args) -> int:
+        return self.timeout_add(seconds * 1000, callback, *args)
+
+    def source_remove(self, source: int) -> None:
+        timer = self.timers.pop(source, None)
+        if timer is not None:
+            timer.cancel()
+
+
+def stub_module(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    # Any other name is a stub class, so the plugin can subclass gtk widgets
+    module.__getattr__ = lambda attribute: Stub
+    sys.modules[name] = module
+    return module
+
+
+def install(dispatch) -> None:
+    """Registers the stand-in modules, dispatch schedules a callable on the benchmark's main loop."""
+    gi = stub_module("gi", require_version=lambda namespace, version: None)
+    repository = stub_module("gi.repository")
+    gi.repository = repository
+    repository.GLib = sys.modules["gi.repository.GLib"] = GLib(dispatch)
+    for name in ("Gtk", "Adw", "Gdk"):
+        setattr(repository, name, stub_module(f"gi.repository.{name}"))
+
+    stub_module("src")
+    stub_module("src.backend")
+    stub_module("src.backend.PluginManager")
+    stub_module("src.backend.PluginManager.ActionBase", ActionBase=ActionBase)
+    stub_module("src.backend.PluginManager.PluginBase", PluginBase=Stub)
+    stub_module("src.backend.PluginManager.ActionHolder", ActionHolder=Stub)
+    stub_module("src.backend.PluginManager.ActionInputSupport", ActionInputSupport=Stub)
+    stub_module("src.backend.DeckManagement")
+    stub_module("src.backend.DeckManagement.InputIdentifier", Input=Stub)
+    stub_module("src.backend.DeckManagement.DeckController", DeckController=Stub)
+    stub_module("src.backend.PageManagement")
+    stub_module("src.backend.PageManagement.Page", Page=Stub)
+    stub_module("globals", DATA_PATH=tempfile.gettempdir())
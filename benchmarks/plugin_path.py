@@ -0,0 +1,28 @@
+"""
+Makes the plugin importable as plugins.com_core447_PrusaLinkStatus outside of StreamController,
+no matter what the checkout directory is called.
+"""
+import os
+import sys
+import types
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLUGIN_ID = "com_core447_PrusaLinkStatus"
+
+
+def register() -> None:
+    if f"plugins.{PLUGIN_ID}" in sys.modules:
+        return
+    plugins = sys.modules.get("plugins")
+    if plugins is None:
+        plugins = types.ModuleType("plugins")
+        plugins.__path__ = []
+        sys.modules["plugins"] = plugins
+
+    package = types.ModuleType(f"plugins.{PLUGIN_ID}")
+    package.__path__ = [PLUGIN_DIR]
+    sys.modules[f"plugins.{PLUGIN_ID}"] = package
+    setattr(plugins, PLUGIN_ID, package)
+
+
+register()
@@ -1,10 +1,3 @@
-from functools import lru_cache
-import json
-import threading
-import time
-
-from matplotlib.testing import _has_tex_package
-from numpy import isin
 from src.backend.PluginManager.ActionBase import ActionBase
 from src.backend.PluginManager.PluginBase import PluginBase
 from src.backend.PluginManager.ActionHolder import ActionHolder
@@ -15,17 +8,31 @@ from src.backend.PluginManager.ActionInputSupport import ActionInputSupport
 import gi
 gi.require_version("Gtk", "4.0")
 gi.require_version("Adw", "1")
-from gi.repository import Gtk, Adw, Gio
+from gi.repository import Gtk, Adw, GLib
 
+import atexit
 import sys
 import os
-from PIL import Image
+import re
+import time
 from loguru import logger as log
-import requests
+from PIL import Image
 
 # Add plugin to sys.paths
 sys.path.append(os.path.dirname(__file__))
+from plugins.com_core447_PrusaLinkStatus.AlertEngine import DEFAULT_RULES
+from plugins.com_core447_PrusaLinkStatus.DataBus import DataBus
+from plugins.com_core447_PrusaLinkStatus.Endpoints import STATUS
+from plugins.com_core447_PrusaLinkStatus.Diagnostics import Diagnostics
+from plugins.com_core447_PrusaLinkStatus.FarmSummary import FARM_HOST, OFFLINE, SUMMARY_FIELDS, FarmSummary
 from plugins.com_core447_PrusaLinkStatus.GraphBase import GraphBase
+from plugins.com_core447_PrusaLinkStatus.ImageCache import ImageCache
+from plugins.com_core447_PrusaLinkStatus.KeyFrame import FrameAction
+from plugins.com_core447_PrusaLinkStatus.LabelAction import LabelAction
+from plugins.com_core447_PrusaLinkStatus.PrinterAction import CONNECTION_CHECK_DELAY, HOST_PATTERN, PrinterAction
+from plugins.com_core447_PrusaLinkStatus.PrinterRegistry import PrinterRegistry
+from plugins.com_core447_PrusaLinkStatus.RenderPool import RenderPool
+from plugins.com_core447_PrusaLinkStatus.ThumbnailLoader import ThumbnailLoader
 
 # Import globals
 import globals as gl
@@ -34,32 +41,29 @@ import globals as gl
 from src.backend.DeckManagement.DeckController import DeckController
 from src.backend.PageManagement.Page import Page
 
-import PrusaLinkPy #TODO: Remove, also from the app requirements
+# Numeric status fields that can be graphed
+GRAPH_FIELDS = [field for field in STATUS.fields if field not in ("state", "id")]
+TARGET_FIELDS = {"temp_nozzle": "target_nozzle", "temp_bed": "target_bed"}
+FIELD_UNITS = {
+    "temp_nozzle": "°C", "target_nozzle": "°C", "temp_bed": "°C", "target_bed": "°C",
+    "flow": "%", "speed": "%", "progress": "%", "axis_x": "mm", "axis_y": "mm", "axis_z": "mm",
+}
+# Fields of the printer a farm overview pages to
+PAGE_FIELDS = {"printer_name", "state", "progress", "eta_clock"}
+# Seconds before a failed thumbnail is loaded again, doubled after every further failure
+THUMBNAIL_RETRY_DELAY = 5
+THUMBNAIL_RETRY_MAX_DELAY = 5 * 60
+
+class Status(LabelAction, PrinterAction, ActionBase):
+    default_alerts = DEFAULT_RULES
 
-class Status(ActionBase):
     def __init__(self, action_id: str, action_name: str,
                  deck_controller: "DeckController", page: Page, coords: str, plugin_base: PluginBase):
         super().__init__(action_id=action_id, action_name=action_name,
             deck_controller=deck_controller, page=page, coords=coords, plugin_base=plugin_base)
         
     def get_config_rows(self) -> list:
-        self.ip_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.ip.title"))
-        self.key_row = Adw.PasswordEntryRow(title=self.plugin_base.lm.get("actions.status.key.title"))
-
-        self.top_label_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.top-label.title"))
-        self.center_label_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.center-label.title"))
-        self.bottom_label_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.bottom-label.title"))
-
-        self.load_config_defaults()
-
-        # Connect signals
-        self.ip_row.connect("notify::text", self.on_ip_row_changed)
-        self.key_row.connect("notify::text", self.on_key_row_changed)
-        self.top_label_row.connect("notify::text", self.on_label_row_changed)
-        self.center_label_row.connect("notify::text", self.on_label_row_changed)
-        self.bottom_label_row.connect("notify::text", self.on_label_row_changed)
-
-        return [self.ip_row, self.key_row, self.top_label_row, self.center_label_row, self.bottom_label_row]
+        return self.get_printer_rows() + self.get_label_rows() + self.get_alert_rows()
     
     def get_custom_config_area(self):
         text = "<ul> \
@@ -68,17 +72,35 @@ class Status(ActionBase):
         <li>target_bed</li> \
         <li>temp_nozzle</li> \
         <li>target_nozzle</li> \
-        <li>axiz_z</li> \
-        <li>axiz_y</li> \
-        <li>axiz_x</li> \
-        <li>flow_</li> \
+        <li>axis_z</li> \
+        <li>axis_y</li> \
+        <li>axis_x</li> \
+        <li>flow</li> \
         <li>speed</li> \
         <li>progress</li> \
         <li>fan_hotend</li> \
         <li>fan_print</li> \
         <li>time_remaining</li> \
         <li>time_printing</li> \
-        </ul>"
+        <li>eta</li> \
+        <li>eta_clock</li> \
+        <li>progress_rate (%/h)</li> \
+        <li>file_name</li> \
+        <li>file_size</li> \
+        <li>printer_name</li> \
+        <li>nozzle_diameter</li> \
+        <li>storage_name</li> \
+        <li>storage_free</li> \
+        </ul> \
+        Format specs are supported, e.g. {temp_nozzle:.1f}, {progress:3d}%, {time_remaining:hm} \
+        \n\nAlert rules, separated by ; \
+        <ul> \
+        <li>state: FINISHED ERROR ATTENTION</li> \
+        <li>temp_nozzle ~ target_nozzle &gt; 10 for 2m</li> \
+        <li>temp_bed &gt; 110 for 30s</li> \
+        <li>progress still 10m</li> \
+        </ul> \
+        A key press acknowledges the alerts of its printer"
         #FIXME
         label = Gtk.Label(use_markup=True, hexpand=True, vexpand=True, wrap=True) 
         label = Gtk.TextView(wrap_mode=Gtk.WrapMode.WORD, hexpand=True, vexpand=True, css_classes=["flat"], editable=False, cursor_visible=False)
@@ -92,173 +114,476 @@ class Status(ActionBase):
         return label
 
 
-    def load_config_defaults(self):
-        settings = self.plugin_base.get_settings()
-        ip = settings.get("ip", "")
-        key = settings.get("key", "")
+    def on_ready(self) -> None:
+        self.compile_labels()
+        super().on_ready()
+        self.show()
 
+    def on_printer_update(self, changed: set[str]) -> None:
+        self.show()
+
+    def show(self):
+        data = self.get_data()
+        if data is None:
+            self.shown_stale_label = None
+            frame = self.get_frame()
+            frame.set_top_label(self.plugin_base.lm.get("actions.status.errors.no-data.top"), font_size=12)
+            frame.set_center_label(self.plugin_base.lm.get("actions.status.errors.no-data.center"), font_size=12)
+            frame.set_bottom_label(None)
+            frame.commit()
+            return
+        
+        labels = self.render_labels(data)
+
+        # Keep showing the last known values, but mark them
+        self.shown_stale_label = self.get_stale_label()
+        if self.shown_stale_label is not None:
+            labels["bottom"] = self.shown_stale_label
+
+        frame = self.get_frame()
+        frame.set_top_label(labels["top"], font_size=14)
+        frame.set_center_label(labels["center"], font_size=14)
+        frame.set_bottom_label(labels["bottom"], font_size=14)
+        frame.commit()
+    
+
+class MetricGraph(LabelAction, PrinterAction, GraphBase):
+    """Graph of any numeric status field, optionally with further fields drawn over it."""
+    default_field = "temp_nozzle"
+
+    def __init__(self, action_id: str, action_name: str,
+                 deck_controller: "DeckController", page: Page, coords: str, plugin_base: PluginBase):
+        super().__init__(action_id=action_id, action_name=action_name,
+            deck_controller=deck_controller, page=page, coords=coords, plugin_base=plugin_base)
+
+    def get_config_rows(self) -> list:
+        graph_rows = super().get_config_rows()
+
+        self.field_row = Adw.ComboRow(title=self.plugin_base.lm.get("actions.metric-graph.field.title"),
+                                      model=Gtk.StringList.new(GRAPH_FIELDS))
+        self.overlay_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.metric-graph.overlays.title"))
+
+        field = self.get_field()
+        if field in GRAPH_FIELDS:
+            self.field_row.set_selected(GRAPH_FIELDS.index(field))
+        self.overlay_row.set_text(", ".join(self.get_overlay_fields()))
+        self.check_overlay_fields()
+
+        self.field_row.connect("notify::selected", self.on_field_changed)
+        self.overlay_row.connect("notify::text", self.on_overlay_fields_changed)
+
+        return self.get_printer_rows() + [self.field_row, self.overlay_row] + graph_rows + self.get_label_rows()
+
+    def get_field(self) -> str:
+        return self.get_settings().get("field", self.default_field)
+
+    def get_target_field(self) -> str:
+        return TARGET_FIELDS.get(self.get_field())
+
+    def get_overlay_fields(self) -> list[str]:
+        return [field for field in self.get_settings().get("overlay-fields", []) if field in GRAPH_FIELDS]
+
+    def get_default_labels(self) -> dict[str, str]:
+        field = self.get_field()
+        return {"bottom": f"{{{field}}}{FIELD_UNITS.get(field, '')}"}
+
+    def on_field_changed(self, combo_row, *args):
         settings = self.get_settings()
-        top = settings.get("labels", {}).get("top", "")
-        center = settings.get("labels", {}).get("center", "")
-        bottom = settings.get("labels", {}).get("bottom", "")
-
-        # Update ui
-        self.ip_row.set_text(ip)
-        self.key_row.set_text(key)
-        self.top_label_row.set_text(top)
-        self.center_label_row.set_text(center)
-        self.bottom_label_row.set_text(bottom)
-
-    def on_ip_row_changed(self, entry, *args):
-        settings = self.plugin_base.get_settings()
-        settings["ip"] = entry.get_text()
-        self.plugin_base.set_settings(settings)
-
-        self.plugin_base.printer.host = entry.get_text()
-        self.plugin_base.data = self.plugin_base.fetch_data()
-
-    def on_key_row_changed(self, entry, *args):
-        settings = self.plugin_base.get_settings()
-        settings["key"] = entry.get_text()
-        self.plugin_base.set_settings(settings)
-
-        self.plugin_base.printer.api_key = entry.get_text()
-        self.plugin_base.data = self.plugin_base.fetch_data()
-
-    def on_label_row_changed(self, entry, *args):
-        settings = self.get_settings()
-        settings.setdefault("labels", {})
-        settings["labels"]["top"] = self.top_label_row.get_text()
-        settings["labels"]["center"] = self.center_label_row.get_text()
-        settings["labels"]["bottom"] = self.bottom_label_row.get_text()
+        settings["field"] = GRAPH_FIELDS[combo_row.get_selected()]
+        self.set_settings(settings)
+        self.on_series_changed()
 
+    def on_overlay_fields_changed(self, entry, *args):
+        settings = self.get_settings()
+        settings["overlay-fields"] = [field.strip() for field in entry.get_text().split(",") if field.strip()]
         self.set_settings(settings)
+        self.check_overlay_fields()
+        self.on_series_changed()
+
+    def check_overlay_fields(self) -> None:
+        fields = self.get_settings().get("overlay-fields", [])
+        if all(field in GRAPH_FIELDS for field in fields):
+            self.overlay_row.remove_css_class("error")
+        else:
+            self.overlay_row.add_css_class("error")
+
+    def on_series_changed(self) -> None:
+        # Default labels follow the field and the subscription the plotted fields
+        self.compile_labels()
         self.show()
 
+    def get_series(self, since: float) -> tuple[list[float], list[float]]:
+        if self.printer is None:
+            return [], []
+        return self.printer.get_history(self.get_field(), since)
+
+    def get_overlay_series(self, since: float) -> list[tuple[list[float], list[float]]]:
+        if self.printer is None:
+            return []
+        # All series come from the printer's shared telemetry, no extra requests
+        return [self.printer.get_history(field, since) for field in self.get_overlay_fields()]
+
+    def on_ready(self) -> None:
+        self.compile_labels()
+        # The graph has to be sent again as well
+        self.shown_frame = None
+        super().on_ready()
+        self.show()
 
-    def on_tick(self) -> None:
+    def get_subscribed_fields(self) -> set[str]:
+        fields = set(super().get_subscribed_fields())
+        fields.add(self.get_field())
+        fields.update(self.get_overlay_fields())
+        if self.get_target_field() is not None:
+            fields.add(self.get_target_field())
+        return fields
+
+    def on_printer_update(self, changed: set[str]) -> None:
         self.show()
 
-    def show(self):
-        data = self.plugin_base.data
+    def update_on_tick(self) -> bool:
+        drawn = super().update_on_tick()
+        # Keeps scrolling while the values are steady or the printer is offline, unchanged frames come from the cache
+        if self.is_graph_scrolled():
+            self.show()
+            drawn = True
+        return drawn
+
+    def on_removed_from_cache(self) -> None:
+        self.plugin_base.render_pool.cancel(self)
+        super().on_removed_from_cache()
+
+    def show(self) -> None:
+        data = self.get_data()
         if data is None:
-            self.set_top_label(self.plugin_base.lm.get("actions.status.errors.no-data.top"), font_size=12)
-            self.set_center_label(self.plugin_base.lm.get("actions.status.errors.no-data.center"), font_size=12)
-            self.set_bottom_label(None)
+            # No printer set or its data was dropped after being offline too long, nothing old stays on the key
+            self.shown_stale_label = None
+            self.plugin_base.render_pool.cancel(self)
+            self.shown_frame = None
+            # Nothing to scroll until the next data arrives
+            self.graph_time = None
+            frame = self.get_frame()
+            frame.set_media(None)
+            if self.printer is None:
+                for position in ("top", "center", "bottom"):
+                    frame.set_label(position, None)
+            else:
+                frame.set_top_label(self.plugin_base.lm.get("actions.status.errors.no-data.top"), font_size=12)
+                frame.set_center_label(self.plugin_base.lm.get("actions.status.errors.no-data.center"), font_size=12)
+                frame.set_bottom_label(None)
+            frame.commit()
             return
-        
-        settings = self.get_settings()
 
-        top = self.inject_data(settings.get("labels", {}).get("top", ""), data)
-        center = self.inject_data(settings.get("labels", {}).get("center", ""), data)
-        bottom = self.inject_data(settings.get("labels", {}).get("bottom", ""), data)
+        target_field = self.get_target_field()
+        # Without a target the graph scales to the values and draws no target line
+        self.target = data.get(target_field) if target_field is not None else None
 
-        self.set_top_label(top, font_size=14)
-        self.set_center_label(center, font_size=14)
-        self.set_bottom_label(bottom, font_size=14)
+        # Graph and labels go to the deck in one update
+        self.show_graph(commit=False)
+
+        labels = self.render_labels(data)
+        # The stale marker takes the top label, the graph leaves the least room there
+        self.shown_stale_label = self.get_stale_label()
+        if self.shown_stale_label is not None:
+            labels["top"] = self.shown_stale_label
+
+        frame = self.get_frame()
+        frame.set_top_label(labels["top"], font_size=12)
+        frame.set_center_label(labels["center"], font_size=14)
+        frame.set_bottom_label(labels["bottom"], font_size=16)
+        frame.commit()
+
+
+class HotendTemperature(MetricGraph):
+    # Kept for keys that were set up before the generic graph existed
+    default_field = "temp_nozzle"
 
-    
-    def inject_data(self, label: str, data: dict) -> str:
-        for key in data:
-            value = data[key]
-            if key in ["time_remaining", "time_printing"]:
-                value = self.seconds_to_readable(value)
-
-            if isinstance(value, float):
-                value = round(value)
-            
-            label = label.replace("{" + key + "}", str(value))
-        return label
-    
-    def seconds_to_readable(self, seconds: int) -> str:
-        minutes, seconds = divmod(seconds, 60)
-        hours, minutes = divmod(minutes, 60)
-        return f"{hours:02d}:{minutes:02d}"
-    
 
-class HotendTemperature(GraphBase):
+class Thumbnail(PrinterAction, ActionBase):
     def __init__(self, action_id: str, action_name: str,
                  deck_controller: "DeckController", page: Page, coords: str, plugin_base: PluginBase):
         super().__init__(action_id=action_id, action_name=action_name,
             deck_controller=deck_controller, page=page, coords=coords, plugin_base=plugin_base)
-        
+
+        # (host, job id, thumbnail path) of the shown or loading thumbnail
+        self.thumbnail_key: tuple = None
+        # Key of the thumbnail that failed to load, retried after retry_delay
+        self.failed_key: tuple = None
+        self.retry_source: int = None
+        self.retry_delay = THUMBNAIL_RETRY_DELAY
+
     def get_config_rows(self) -> list:
-        super_rows = super().get_config_rows()
-        self.ip_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.ip.title"))
-        self.key_row = Adw.PasswordEntryRow(title=self.plugin_base.lm.get("actions.status.key.title"))
-
-        self.top_label_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.top-label.title"))
-        self.center_label_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.center-label.title"))
-        self.bottom_label_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.status.bottom-label.title"))
-
-        self.load_config_defaults()
-
-        # Connect signals
-        self.ip_row.connect("notify::text", self.on_ip_row_changed)
-        self.key_row.connect("notify::text", self.on_key_row_changed)
-        self.top_label_row.connect("notify::text", self.on_label_row_changed)
-        self.center_label_row.connect("notify::text", self.on_label_row_changed)
-        self.bottom_label_row.connect("notify::text", self.on_label_row_changed)
-
-        super_rows.extend([self.ip_row, self.key_row, self.top_label_row, self.center_label_row, self.bottom_label_row])
-
-        return super_rows
-   
-
-    def load_config_defaults(self):
-        settings = self.plugin_base.get_settings()
-        ip = settings.get("ip", "")
-        key = settings.get("key", "")
-        top = settings.get("labels", {}).get("top", "")
-        center = settings.get("labels", {}).get("center", "")
-        bottom = settings.get("labels", {}).get("bottom", "")
-
-        # Update ui
-        self.ip_row.set_text(ip)
-        self.key_row.set_text(key)
-        self.top_label_row.set_text(top)
-        self.center_label_row.set_text(center)
-        self.bottom_label_row.set_text(bottom)
-
-    def on_ip_row_changed(self, entry, *args):
-        settings = self.plugin_base.get_settings()
-        settings["ip"] = entry.get_text()
-        self.plugin_base.set_settings(settings)
-
-        self.plugin_base.printer.host = entry.get_text()
-        self.plugin_base.data = self.plugin_base.fetch_data()
-
-    def on_key_row_changed(self, entry, *args):
-        settings = self.plugin_base.get_settings()
-        settings["key"] = entry.get_text()
-        self.plugin_base.set_settings(settings)
-
-        self.plugin_base.printer.api_key = entry.get_text()
-        self.plugin_base.data = self.plugin_base.fetch_data()
-
-    def on_label_row_changed(self, entry, *args):
-        settings = self.get_settings()
-        settings.setdefault("labels", {})
-        settings["labels"]["top"] = self.top_label_row.get_text()
-        settings["labels"]["center"] = self.center_label_row.get_text()
-        settings["labels"]["bottom"] = self.bottom_label_row.get_text()
+        return self.get_printer_rows()
 
-        self.set_settings(settings)
+    def on_ready(self) -> None:
+        # Loads the thumbnail again, from the cache if it is still there
+        self.thumbnail_key = None
+        super().on_ready()
         self.show()
 
+    def on_removed_from_cache(self) -> None:
+        self.cancel_retry()
+        super().on_removed_from_cache()
 
-    def on_tick(self) -> None:
-        if self.plugin_base.data is None:
+    def get_subscribed_fields(self) -> set[str]:
+        return {"id", "thumbnail"}
+
+    def on_printer_update(self, changed: set[str]) -> None:
+        self.show()
+
+    def show(self) -> None:
+        data = self.get_data()
+        frame = self.get_frame()
+        self.shown_stale_label = self.get_stale_label()
+        frame.set_top_label(self.shown_stale_label, font_size=12)
+
+        path = data.get("thumbnail") if data is not None else None
+        if path is None:
+            self.thumbnail_key = None
+            self.cancel_retry()
+            frame.set_media(None)
+        else:
+            key = (self.printer.host, data.get("id"), path)
+            if key != self.thumbnail_key:
+                if key != self.failed_key:
+                    # A new job, the backoff of the failed one doesn't apply
+                    self.failed_key = None
+                    self.retry_delay = THUMBNAIL_RETRY_DELAY
+                self.cancel_retry()
+                self.thumbnail_key = key
+                # Cached thumbnails come back right away, others arrive in on_thumbnail_loaded
+                image = self.plugin_base.thumbnails.load(self.printer, key, self.on_thumbnail_loaded)
+                if image is not None:
+                    frame.set_media(image)
+        frame.commit()
+
+    def on_thumbnail_loaded(self, key: tuple, image: Image.Image) -> None:
+        if key != self.thumbnail_key:
+            # The job changed while loading
             return
-        
-        temp = self.plugin_base.data.get("temp_nozzle", -1)
-        target = self.plugin_base.data.get("target_nozzle", -1)
-        self.target = target
-        self.percentages.append(temp)
+        if image is None:
+            self.failed_key = key
+            self.schedule_retry()
+            return
+        self.failed_key = None
+        self.retry_delay = THUMBNAIL_RETRY_DELAY
+        frame = self.get_frame()
+        frame.set_media(image)
+        frame.commit()
+
+    def schedule_retry(self) -> None:
+        self.cancel_retry()
+        self.retry_source = GLib.timeout_add_seconds(self.retry_delay, self.retry_thumbnail)
+        self.retry_delay = min(self.retry_delay * 2, THUMBNAIL_RETRY_MAX_DELAY)
+
+    def cancel_retry(self) -> None:
+        if self.retry_source is not None:
+            GLib.source_remove(self.retry_source)
+            self.retry_source = None
+
+    def retry_thumbnail(self) -> bool:
+        self.retry_source = None
+        # Forget the failed key so show loads it again
+        self.thumbnail_key = None
+        self.show()
+        return GLib.SOURCE_REMOVE
 
-        self.show_graph()
 
-        self.set_bottom_label(f"{temp}°C", font_size=16)
+class FetchDiagnostics(FrameAction, ActionBase):
+    def __init__(self, action_id: str, action_name: str,
+                 deck_controller: "DeckController", page: Page, coords: str, plugin_base: PluginBase):
+        super().__init__(action_id=action_id, action_name=action_name,
+            deck_controller=deck_controller, page=page, coords=coords, plugin_base=plugin_base)
+
+    def on_ready(self) -> None:
+        self.get_frame().reset()
+        self.show()
+
+    def on_tick(self) -> None:
+        start = time.perf_counter()
+        self.show()
+        self.record_render(start)
+
+    def on_removed_from_cache(self) -> None:
+        # Not subscribed to the data bus, which drops the render times of the other keys
+        self.plugin_base.diagnostics.forget_render(self.get_diagnostics_name())
+
+    def show(self) -> None:
+        diagnostics = self.plugin_base.diagnostics
+        host, p95 = diagnostics.get_slowest_printer()
+        lag = diagnostics.display_lag.percentile(0.95)
+
+        # Runs every tick, the frame only touches the deck when a value actually changed
+        frame = self.get_frame()
+        frame.set_top_label(f"p95 {p95:.0f}ms" if host else "-", font_size=12)
+        frame.set_center_label(host or self.plugin_base.lm.get("actions.diagnostics.no-printers"), font_size=10)
+        frame.set_bottom_label(f"{diagnostics.get_error_count()} err {lag:.0f}ms", font_size=12)
+        frame.commit()
+
+    def on_key_down(self) -> None:
+        # Write the full report to the plugin's data directory
+        json_path, text_path = self.plugin_base.diagnostics.dump(self.plugin_base.data_directory)
+        log.info(f"Wrote PrusaLink diagnostics to {json_path} and {text_path}")
+        frame = self.get_frame()
+        frame.set_center_label(self.plugin_base.lm.get("actions.diagnostics.saved"), font_size=10)
+        frame.commit()
+
+
+class FarmOverview(FrameAction, ActionBase):
+    def __init__(self, action_id: str, action_name: str,
+                 deck_controller: "DeckController", page: Page, coords: str, plugin_base: PluginBase):
+        super().__init__(action_id=action_id, action_name=action_name,
+            deck_controller=deck_controller, page=page, coords=coords, plugin_base=plugin_base)
+
+        # Printers this key adds to the farm, all other registered printers are included as well
+        self.printers: list = []
+        self.printers_source: int = None
+        self.subscription = None
+        # Printer shown instead of the overview, paged through with a dial or key presses
+        self.page_host: str = None
+        self.page_subscription = None
+
+    def get_config_rows(self) -> list:
+        self.printers_row = Adw.EntryRow(title=self.plugin_base.lm.get("actions.farm-overview.printers.title"))
+        self.printers_row.set_text(self.get_settings().get("printers", ""))
+        self.printers_row.connect("notify::text", self.on_printers_row_changed)
+        return [self.printers_row]
+
+    def on_printers_row_changed(self, entry, *args):
+        settings = self.get_settings()
+        settings["printers"] = entry.get_text()
+        self.set_settings(settings)
+
+        # Wait until the user stopped typing
+        if self.printers_source is not None:
+            GLib.source_remove(self.printers_source)
+        self.printers_source = GLib.timeout_add(CONNECTION_CHECK_DELAY, self.on_printers_changed)
+
+    def on_printers_changed(self) -> bool:
+        self.printers_source = None
+        self.acquire_printers()
+        return GLib.SOURCE_REMOVE
+
+    def get_printer_settings(self) -> list[tuple[str, str]]:
+        # "host" or "host=key", the key defaults to the plugin wide one
+        default_key = self.plugin_base.get_settings().get("key", "")
+        printers = []
+        for entry in re.split(r"[,\s]+", self.get_settings().get("printers", "")):
+            host, _, key = entry.partition("=")
+            if HOST_PATTERN.match(host):
+                printers.append((host, key or default_key))
+        return printers
+
+    def acquire_printers(self) -> None:
+        old_printers = self.printers
+        self.printers = [self.plugin_base.registry.acquire(host, key) for host, key in self.get_printer_settings()]
+        for printer in old_printers:
+            self.plugin_base.registry.release(printer)
+
+    def release_printers(self) -> None:
+        for printer in self.printers:
+            self.plugin_base.registry.release(printer)
+        self.printers = []
+
+    def on_ready(self) -> None:
+        self.get_frame().reset()
+        old_subscription = self.subscription
+        self.subscription = self.plugin_base.data_bus.subscribe(FARM_HOST, SUMMARY_FIELDS, self.on_summary_update,
+                                                                self.get_diagnostics_name())
+        # Dropped last, the key's render times only go with its last subscription
+        self.plugin_base.data_bus.unsubscribe(old_subscription)
+        self.acquire_printers()
+        self.show()
+
+    def on_removed_from_cache(self) -> None:
+        self.plugin_base.data_bus.unsubscribe(self.subscription)
+        self.subscription = None
+        self.set_page(None)
+        self.release_printers()
+
+    def on_summary_update(self, changed: set[str]) -> None:
+        if self.page_host is None or "printers" in changed:
+            self.show()
+
+    def event_callback(self, event, data: dict = None) -> None:
+        if event == Input.Dial.Events.TURN_CW:
+            self.turn_page(1)
+        elif event == Input.Dial.Events.TURN_CCW:
+            self.turn_page(-1)
+        elif event == Input.Dial.Events.DOWN:
+            self.set_page(None)
+        else:
+            super().event_callback(event, data)
+
+    def on_key_down(self) -> None:
+        self.turn_page(1)
+
+    def turn_page(self, step: int) -> None:
+        self.set_page(self.plugin_base.farm.get_page_host(self.page_host, step))
+
+    def set_page(self, host: str) -> None:
+        self.plugin_base.data_bus.unsubscribe(self.page_subscription)
+        self.page_subscription = None
+        self.page_host = host
+        if host is not None:
+            self.page_subscription = self.plugin_base.data_bus.subscribe(host, PAGE_FIELDS, self.on_page_update,
+                                                                         self.get_diagnostics_name())
+        self.show()
+
+    def on_page_update(self, changed: set[str]) -> None:
+        self.show()
+
+    def show(self) -> None:
+        frame = self.get_frame()
+        if self.page_host is None:
+            self.show_overview(frame)
+        else:
+            self.show_printer(frame)
+        frame.commit()
+
+    def show_overview(self, frame) -> None:
+        # Everything comes from the farm summary, no printer's data is looked at
+        lm = self.plugin_base.lm
+        farm = self.plugin_base.farm
+        counts = farm.get_counts()
+        total = sum(counts.values())
+        if total == 0:
+            frame.set_top_label(None)
+            frame.set_center_label(lm.get("actions.farm-overview.no-printers"), font_size=12)
+            frame.set_bottom_label(None)
+            return
+
+        frame.set_top_label(lm.get("actions.farm-overview.printing").format(count=counts.get("PRINTING", 0), total=total),
+                            font_size=12)
+        soonest = farm.get_soonest()
+        if soonest is None:
+            frame.set_center_label(lm.get("actions.farm-overview.idle"), font_size=12)
+        else:
+            _, name, finish = soonest
+            frame.set_center_label(f"{name}\n{time.strftime('%H:%M', time.localtime(finish))}", font_size=12)
+        error = farm.get_hottest_error()
+        if error is not None:
+            _, name, temp = error
+            frame.set_bottom_label(f"! {name} {temp}°C", font_size=12)
+        elif counts.get(OFFLINE):
+            frame.set_bottom_label(lm.get("actions.farm-overview.offline").format(count=counts[OFFLINE]), font_size=12)
+        else:
+            frame.set_bottom_label(None)
+
+    def show_printer(self, frame) -> None:
+        printer = self.plugin_base.registry.get(self.page_host)
+        data = printer.data if printer is not None and not printer.stale else None
+        if data is None:
+            frame.set_top_label(self.page_host, font_size=10)
+            frame.set_center_label(OFFLINE, font_size=12)
+            frame.set_bottom_label(None)
+            return
+        frame.set_top_label(data.get("printer_name") or self.page_host, font_size=10)
+        frame.set_center_label(data.get("state"), font_size=12)
+        if data.get("state") == "PRINTING":
+            frame.set_bottom_label(f"{data.get('progress', 0)}% {data.get('eta_clock', '')}".strip(), font_size=12)
+        else:
+            frame.set_bottom_label(None)
 
 
 class PrusaLinkStatusPlugin(PluginBase):
@@ -266,10 +591,22 @@ class PrusaLinkStatusPlugin(PluginBase):
         super().__init__()
 
         self.init_locale_manager()
-        self.init_printer()
 
-        self.data = {}
-        threading.Thread(target=self.fetch_data_loop, name="printer status fetch", daemon=True).start()
+        self.data_directory = os.path.join(gl.DATA_PATH, "plugins", "com_core447_PrusaLinkStatus")
+
+        self.diagnostics = Diagnostics()
+        self.graph_cache = ImageCache()
+        # Graphs that aren't cached are drawn in worker threads, the main loop only shows them
+        self.render_pool = RenderPool(GLib.idle_add, self.graph_cache, diagnostics=self.diagnostics)
+        # Also stops the workers when StreamController quits without uninstalling the plugin
+        atexit.register(self.render_pool.shutdown)
+        self.thumbnails = ThumbnailLoader(GLib.idle_add)
+        # Updates from the fetch thread are handed to the actions on the gtk main loop
+        self.data_bus = DataBus(GLib.idle_add, self.diagnostics)
+        self.farm = FarmSummary(self.data_bus)
+        self.registry = PrinterRegistry(bus=self.data_bus, diagnostics=self.diagnostics,
+                                        telemetry_directory=os.path.join(self.data_directory, "telemetry"),
+                                        summary=self.farm)
 
         self.lm = self.locale_manager
 
@@ -287,6 +624,19 @@ class PrusaLinkStatusPlugin(PluginBase):
         )
         self.add_action_holder(self.status_holder)
 
+        self.metric_graph_holder = ActionHolder(
+            plugin_base=self,
+            action_base=MetricGraph,
+            action_id_suffix="MetricGraph",
+            action_name=self.lm.get("actions.metric-graph.name"),
+            action_support={
+                Input.Key: ActionInputSupport.SUPPORTED,
+                Input.Dial: ActionInputSupport.SUPPORTED,
+                Input.Touchscreen: ActionInputSupport.UNSUPPORTED
+            }
+        )
+        self.add_action_holder(self.metric_graph_holder)
+
         self.hotend_temp_holder = ActionHolder(
             plugin_base=self,
             action_base=HotendTemperature,
@@ -300,6 +650,45 @@ class PrusaLinkStatusPlugin(PluginBase):
         )
         self.add_action_holder(self.hotend_temp_holder)
 
+        self.thumbnail_holder = ActionHolder(
+            plugin_base=self,
+            action_base=Thumbnail,
+            action_id_suffix="Thumbnail",
+            action_name=self.lm.get("actions.thumbnail.name"),
+            action_support={
+                Input.Key: ActionInputSupport.SUPPORTED,
+                Input.Dial: ActionInputSupport.SUPPORTED,
+                Input.Touchscreen: ActionInputSupport.UNSUPPORTED
+            }
+        )
+        self.add_action_holder(self.thumbnail_holder)
+
+        self.diagnostics_holder = ActionHolder(
+            plugin_base=self,
+            action_base=FetchDiagnostics,
+            action_id_suffix="Diagnostics",
+            action_name=self.lm.get("actions.diagnostics.name"),
+            action_support={
+                Input.Key: ActionInputSupport.SUPPORTED,
+                Input.Dial: ActionInputSupport.SUPPORTED,
+                Input.Touchscreen: ActionInputSupport.UNSUPPORTED
+            }
+        )
+        self.add_action_holder(self.diagnostics_holder)
+
+        self.farm_overview_holder = ActionHolder(
+            plugin_base=self,
+            action_base=FarmOverview,
+            action_id_suffix="FarmOverview",
+            action_name=self.lm.get("actions.farm-overview.name"),
+            action_support={
+                Input.Key: ActionInputSupport.SUPPORTED,
+                Input.Dial: ActionInputSupport.SUPPORTED,
+                Input.Touchscreen: ActionInputSupport.UNSUPPORTED
+            }
+        )
+        self.add_action_holder(self.farm_overview_holder)
+
 
         # Register plugin
         self.register(
@@ -309,34 +698,12 @@ class PrusaLinkStatusPlugin(PluginBase):
             app_version="1.1.1-alpha"
         )
 
+    def on_uninstall(self) -> None:
+        self.render_pool.shutdown()
+        on_uninstall = getattr(super(), "on_uninstall", None)
+        if on_uninstall is not None:
+            on_uninstall()
+
     def init_locale_manager(self):
         self.lm = self.locale_manager
         self.lm.set_to_os_default()
-
-    def init_printer(self):
-        ip = self.get_settings().get("ip")
-        key = self.get_settings().get("key")
-        self.printer = PrusaLinkPy.PrusaLinkPy(ip, key)
-
-
-    def fetch_data_loop(self) -> None:
-        while True:
-            self.data = self.fetch_data()
-
-            time.sleep(5)
-
-    def fetch_data(self) -> dict:
-        data = {}
-        try:
-            status = self.printer.get_status()
-        except:
-            return
-        
-
-        if status.status_code != 200:
-            return
-        
-        data.update(status.json().get("printer", {}))
-        data.update(status.json().get("job", {}))
-        return data
-
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Makes the plugin importable as plugins.com_core447_PrusaLinkStatus, like the benchmarks do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import plugin_path  # noqa: E402,F401
+import headless_host  # noqa: E402
+
+# Actions run on the benchmarks' stand-ins for StreamController and gtk, callbacks for the main loop run right away
+headless_host.install(lambda callback, *args: callback(*args))
@@ -0,0 +1,113 @@
+from plugins.com_core447_PrusaLinkStatus.AlertEngine import (ERROR, INFO, WARNING, AlertEngine, DeviationRule, StallRule,
+                                                             StateRule, ThresholdRule, parse_rules)
+
+
+def make_engine(text: str) -> AlertEngine:
+    rules, invalid = parse_rules(text)
+    assert invalid == []
+    engine = AlertEngine()
+    engine.set_rules("key", rules)
+    return engine
+
+
+def get_texts(engine: AlertEngine) -> list[str]:
+    return sorted(alert.rule.text for alert in engine.get_alerts())
+
+
+def test_parse_rules():
+    rules, invalid = parse_rules("state: finished error; temp_nozzle ~ target_nozzle > 10 for 2m;"
+                                 " temp_bed > 110 for 30s; progress still 10m; temp_bed >> 3;;")
+    assert [type(rule) for rule in rules] == [StateRule, DeviationRule, ThresholdRule, StallRule]
+    assert rules[0].states == {"FINISHED", "ERROR"}
+    assert rules[1].duration == 120
+    assert rules[2].duration == 30
+    assert rules[3].duration == 600
+    assert invalid == ["temp_bed >> 3"]
+
+
+def test_threshold_goes_off_at_its_deadline_without_further_changes():
+    engine = make_engine("temp_bed > 110 for 30s")
+    assert not engine.evaluate({"temp_bed": 115}, {"temp_bed"}, 1000)
+    # Nothing changed, only time passed
+    assert not engine.evaluate({"temp_bed": 115}, set(), 1029)
+    assert engine.get_level() == (None, False)
+    assert engine.evaluate({"temp_bed": 115}, set(), 1030)
+    assert engine.get_level() == (WARNING, True)
+    assert engine.get_alerts()[0].since == 1000
+
+
+def test_condition_ending_before_the_deadline_cancels_it():
+    engine = make_engine("temp_bed > 110 for 30s")
+    engine.evaluate({"temp_bed": 115}, {"temp_bed"}, 1000)
+    engine.evaluate({"temp_bed": 100}, {"temp_bed"}, 1010)
+    engine.evaluate({"temp_bed": 115}, {"temp_bed"}, 1020)
+    # The outdated deadline of the first streak passes without an alert
+    assert not engine.evaluate({"temp_bed": 115}, set(), 1035)
+    assert engine.evaluate({"temp_bed": 115}, set(), 1050)
+    assert engine.get_alerts()[0].since == 1020
+
+
+def test_alert_ends_when_the_condition_stops_holding():
+    engine = make_engine("temp_bed > 110")
+    assert engine.evaluate({"temp_bed": 115}, {"temp_bed"}, 0)
+    assert get_texts(engine) == ["temp_bed > 110"]
+    assert engine.evaluate({"temp_bed": 90}, {"temp_bed"}, 5)
+    assert engine.get_alerts() == []
+
+
+def test_stall_restarts_with_every_change_of_its_field():
+    engine = make_engine("progress still 10m")
+    data = {"state": "PRINTING", "progress": 10}
+    engine.evaluate(data, {"state", "progress"}, 0)
+    data = {"state": "PRINTING", "progress": 11}
+    engine.evaluate(data, {"progress"}, 500)
+    assert not engine.evaluate(data, set(), 700)
+    assert engine.evaluate(data, set(), 1100)
+    # Stops counting as stalled once the print is paused
+    assert engine.evaluate({"state": "PAUSED", "progress": 11}, {"state"}, 1200)
+    assert engine.get_alerts() == []
+
+
+def test_deviation_only_while_a_target_is_set():
+    engine = make_engine("temp_nozzle ~ target_nozzle > 10")
+    assert not engine.evaluate({"temp_nozzle": 25, "target_nozzle": 0}, {"temp_nozzle", "target_nozzle"}, 0)
+    assert engine.evaluate({"temp_nozzle": 25, "target_nozzle": 215}, {"target_nozzle"}, 1)
+    assert engine.evaluate({"temp_nozzle": 210, "target_nozzle": 215}, {"temp_nozzle"}, 2)
+    assert engine.get_alerts() == []
+
+
+def test_state_levels_and_acknowledging():
+    engine = make_engine("state: FINISHED ERROR")
+    assert engine.evaluate({"state": "FINISHED"}, {"state"}, 0)
+    assert engine.get_level() == (INFO, True)
+    assert engine.acknowledge()
+    assert not engine.acknowledge()
+    assert engine.get_level() == (INFO, False)
+    # Another of the states is a new alert, acknowledged or not
+    assert engine.evaluate({"state": "ERROR"}, {"state"}, 1)
+    assert engine.get_level() == (ERROR, True)
+
+
+def test_removing_rules_ends_their_alerts():
+    engine = make_engine("temp_bed > 110")
+    engine.evaluate({"temp_bed": 115}, {"temp_bed"}, 0)
+    engine.set_rules("key", [])
+    assert engine.evaluate({"temp_bed": 115}, set(), 1)
+    assert engine.get_alerts() == []
+
+
+def test_new_rules_are_evaluated_without_a_change():
+    engine = make_engine("temp_bed > 110")
+    engine.evaluate({"temp_bed": 115, "state": "FINISHED"}, {"temp_bed", "state"}, 0)
+    engine.set_rules("other key", parse_rules("state: FINISHED")[0])
+    assert engine.evaluate({"temp_bed": 115, "state": "FINISHED"}, set(), 1)
+    assert get_texts(engine) == ["state: FINISHED", "temp_bed > 110"]
+
+
+def test_no_data_clears_everything():
+    engine = make_engine("temp_bed > 110 for 30s; state: ERROR")
+    engine.evaluate({"temp_bed": 115, "state": "ERROR"}, {"temp_bed", "state"}, 0)
+    assert engine.evaluate(None, set(), 10)
+    assert engine.get_alerts() == []
+    assert not engine.evaluate({"temp_bed": 115, "state": "IDLE"}, {"state"}, 40)
+    assert engine.get_alerts() == []
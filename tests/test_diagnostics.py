@@ -0,0 +1,33 @@
+from plugins.com_core447_PrusaLinkStatus.DataBus import DataBus
+from plugins.com_core447_PrusaLinkStatus.Diagnostics import ERROR_TIMEOUT, Diagnostics
+
+
+def test_other_endpoints_dont_count_as_status_latency():
+    diagnostics = Diagnostics()
+    diagnostics.record_fetch("printer-1", 0.010)
+    diagnostics.record_fetch("printer-1", 2.0, endpoint="info")
+    diagnostics.record_fetch("printer-2", 1.0, ERROR_TIMEOUT, endpoint="job")
+
+    assert set(diagnostics.fetch_latency) == {"printer-1"}
+    assert diagnostics.fetch_latency["printer-1"].max == 10
+    assert diagnostics.get_slowest_printer() == ("printer-1", 10)
+    assert {name: histogram.count for name, histogram in diagnostics.endpoint_latency.items()} == {"info": 1, "job": 1}
+    # Errors still count per printer, named after the endpoint that failed
+    assert diagnostics.errors == {"printer-2": {"job timeout": 1}}
+    assert "info" in diagnostics.to_text()
+
+
+def test_render_time_goes_with_the_last_subscription_of_a_key():
+    diagnostics = Diagnostics()
+    flushes = []
+    bus = DataBus(flushes.append, diagnostics)
+    summary = bus.subscribe("farm", {"printers"}, lambda changed: None, "FarmOverview 0,0")
+    page = bus.subscribe("printer-1", {"state"}, lambda changed: None, "FarmOverview 0,0")
+    bus.publish("printer-1", {"state"})
+    flushes.pop()()
+    assert diagnostics.render_time["FarmOverview 0,0"].count == 1
+
+    bus.unsubscribe(page)
+    assert "FarmOverview 0,0" in diagnostics.render_time
+    bus.unsubscribe(summary)
+    assert diagnostics.render_time == {}
@@ -0,0 +1,75 @@
+from PIL import Image
+
+import headless_host
+from plugins.com_core447_PrusaLinkStatus.KeyFrame import FrameAction, KeyFrame
+
+
+class Key(FrameAction, headless_host.ActionBase):
+    """Records what reaches the key."""
+    def __init__(self):
+        super().__init__("Key", "Key", headless_host.Deck(), None, "0,0", None)
+        self.writes = []
+
+    def set_top_label(self, text: str, update: bool = True, **style) -> None:
+        self.writes.append(("top", text))
+
+    def set_bottom_label(self, text: str, update: bool = True, **style) -> None:
+        self.writes.append(("bottom", text))
+
+    def set_media(self, image=None, update: bool = True, **kwargs) -> None:
+        self.writes.append(("media", image))
+
+
+def show(frame: KeyFrame, top: str, bottom: str, image: Image.Image = None) -> bool:
+    frame.set_top_label(top, font_size=12)
+    frame.set_bottom_label(bottom, font_size=12)
+    frame.set_media(image)
+    return frame.commit()
+
+
+def test_only_changes_reach_the_key_in_one_update():
+    key = Key()
+    frame = key.get_frame()
+    image = Image.new("RGBA", (4, 4))
+    assert show(frame, "a", "b", image)
+    assert key.writes == [("top", "a"), ("bottom", "b"), ("media", image)]
+    assert key.deck_controller.updates == 1
+
+    key.writes.clear()
+    assert show(frame, "a", "c", image)
+    assert key.writes == [("bottom", "c")]
+    assert key.deck_controller.updates == 2
+
+
+def test_unchanged_frame_doesnt_touch_the_deck():
+    key = Key()
+    frame = key.get_frame()
+    image = Image.new("RGBA", (4, 4))
+    show(frame, "a", "b", image)
+    key.writes.clear()
+    assert not show(frame, "a", "b", image)
+    assert key.writes == []
+    assert key.deck_controller.updates == 1
+
+
+def test_label_style_and_image_identity_count_as_changes():
+    key = Key()
+    frame = key.get_frame()
+    image = Image.new("RGBA", (4, 4))
+    show(frame, "a", "b", image)
+    key.writes.clear()
+    frame.set_top_label("a", font_size=14)
+    # An equal image that didn't come from the cache is sent again
+    frame.set_media(image.copy())
+    assert frame.commit()
+    assert [name for name, _ in key.writes] == ["top", "media"]
+
+
+def test_reset_sends_everything_again():
+    key = Key()
+    frame = key.get_frame()
+    show(frame, "a", "b")
+    frame.reset()
+    key.writes.clear()
+    assert show(frame, "a", "b")
+    assert key.writes == [("top", "a"), ("bottom", "b"), ("media", None)]
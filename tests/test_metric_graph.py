@@ -0,0 +1,72 @@
+import time
+from types import SimpleNamespace
+
+import headless_host
+from plugins.com_core447_PrusaLinkStatus.Diagnostics import Diagnostics
+from plugins.com_core447_PrusaLinkStatus.ImageCache import ImageCache
+from plugins.com_core447_PrusaLinkStatus.PrinterRegistry import MAX_STALE_AGE, Printer
+from plugins.com_core447_PrusaLinkStatus.RenderPool import RenderPool
+from plugins.com_core447_PrusaLinkStatus.main import MetricGraph
+
+
+def create_graph() -> tuple[MetricGraph, list]:
+    main_loop = []
+    diagnostics = Diagnostics()
+    render_pool = RenderPool(lambda callback, *args: main_loop.append((callback, args)), ImageCache(),
+                             diagnostics=diagnostics)
+    plugin = SimpleNamespace(lm=headless_host.Locales(), get_settings=dict, diagnostics=diagnostics,
+                             render_pool=render_pool)
+    graph = MetricGraph(action_id="MetricGraph", action_name="MetricGraph", deck_controller=headless_host.Deck(),
+                        page=None, coords="0,0", plugin_base=plugin)
+    graph.compile_labels()
+    graph.printer = Printer(None, "printer", "")
+    return graph, main_loop
+
+
+def run_main_loop(graph: MetricGraph, main_loop: list) -> None:
+    graph.plugin_base.render_pool.executor.shutdown(wait=True)
+    for callback, args in main_loop:
+        callback(*args)
+    main_loop.clear()
+
+
+def get_labels(graph: MetricGraph) -> dict:
+    committed = graph.get_frame().committed
+    return {position: committed[position][0] for position in ("top", "center", "bottom")}
+
+
+def test_dropped_data_clears_the_graph_and_the_stale_marker():
+    graph, main_loop = create_graph()
+    printer = graph.printer
+    printer.set_data({"state": "PRINTING", "temp_nozzle": 215.4})
+    graph.show()
+    run_main_loop(graph, main_loop)
+    assert graph.get_frame().committed["media"] is not None
+    assert get_labels(graph)["bottom"] == "215°C"
+
+    # Offline for two minutes, the last values stay up with their age
+    printer.stale = True
+    printer.data_time = time.time() - 120
+    graph.show()
+    assert get_labels(graph)["top"] == "stale 2m"
+
+    # Offline for longer than the data is kept
+    printer.data_time = time.time() - MAX_STALE_AGE - 1
+    printer.set_unavailable()
+    assert printer.data is None
+    graph.show()
+    assert graph.get_frame().committed["media"] is None
+    assert get_labels(graph) == {"top": "No", "center": "connection", "bottom": None}
+    assert graph.shown_stale_label is None
+    assert not graph.is_graph_scrolled()
+
+
+def test_drawing_and_showing_the_graph_count_for_the_key():
+    graph, main_loop = create_graph()
+    graph.printer.set_data({"state": "PRINTING", "temp_nozzle": 215.4})
+    graph.show()
+    run_main_loop(graph, main_loop)
+    render_time = graph.plugin_base.diagnostics.render_time
+    # Drawing in the worker and committing the image on the main loop
+    assert list(render_time) == ["MetricGraph 0,0"]
+    assert render_time["MetricGraph 0,0"].count == 2
@@ -0,0 +1,46 @@
+from plugins.com_core447_PrusaLinkStatus.RingBuffer import RingBuffer
+
+
+def fill(buffer: RingBuffer, count: int) -> None:
+    for i in range(count):
+        buffer.append(float(i), float(i * 10))
+
+
+def test_keeps_the_newest_samples_in_order_after_wrapping():
+    buffer = RingBuffer(4)
+    fill(buffer, 10)
+    assert len(buffer) == 4
+    assert [buffer.get_timestamp(i) for i in range(4)] == [6, 7, 8, 9]
+    assert [buffer.get_value(i) for i in range(4)] == [60, 70, 80, 90]
+    assert buffer.last() == (9, 90)
+
+
+def test_find_bisects_across_the_wrap():
+    buffer = RingBuffer(5)
+    fill(buffer, 8)
+    # Holds 3..7, the start of the window sits in the middle of the arrays
+    assert buffer.find(0) == 0
+    assert buffer.find(5) == 2
+    assert buffer.find(5.5) == 3
+    assert buffer.find(100) == 5
+
+
+def test_window_includes_the_previous_sample():
+    buffer = RingBuffer(5)
+    fill(buffer, 8)
+    assert buffer.window(5.5) == ([5, 6, 7], [50, 60, 70])
+    assert buffer.window(5.5, include_previous=False) == ([6, 7], [60, 70])
+    assert buffer.window(0) == ([3, 4, 5, 6, 7], [30, 40, 50, 60, 70])
+
+
+def test_new_samples_go_on_after_wrapping():
+    buffer = RingBuffer(3)
+    fill(buffer, 5)
+    buffer.append(5.0, 50.0)
+    assert buffer.window(0, include_previous=False) == ([3, 4, 5], [30, 40, 50])
+
+
+def test_empty_buffer():
+    buffer = RingBuffer(3)
+    assert buffer.last() is None
+    assert buffer.window(0) == ([], [])
@@ -0,0 +1,73 @@
+import pytest
+
+from plugins.com_core447_PrusaLinkStatus.Endpoints import FIELDS, STATUS, StatusRecord, parse_info, parse_status
+
+STATUS_RESPONSE = {
+    "printer": {"state": "printing", "temp_nozzle": 214.8, "target_nozzle": 215, "temp_bed": "60.1",
+                "fan_hotend": 4999.6, "flow": float("nan"), "id": 99},
+    "job": {"id": 12, "progress": 42, "time_remaining": 1800.4, "state": "NOT A STATUS FIELD"},
+}
+
+
+def test_parse_status_reads_and_converts_the_declared_fields():
+    record = parse_status(STATUS_RESPONSE)
+    assert record["state"] == "PRINTING"
+    assert record["temp_nozzle"] == 214.8
+    assert record["temp_bed"] == 60.1
+    assert record["fan_hotend"] == 5000
+    assert record["time_remaining"] == 1800
+    # The job section can't overwrite printer fields and the printer section can't set the job id
+    assert record["id"] == 12
+    # NaN and missing values are absent
+    assert "flow" not in record
+    assert "axis_x" not in record
+    assert set(record) <= set(STATUS.fields)
+
+
+def test_parse_status_without_a_job():
+    record = parse_status({"printer": {"state": "IDLE"}})
+    assert dict(record.items()) == {"state": "IDLE"}
+
+
+def test_reads_and_writes_like_a_dict():
+    record = StatusRecord()
+    assert len(record) == 0
+    assert record.get("temp_bed") is None
+    assert record.get("temp_bed", 0) == 0
+    assert record.get("not a field", "default") == "default"
+    with pytest.raises(KeyError):
+        record["temp_bed"]
+
+    record.update({"temp_bed": 60, "printer_name": "MK4"})
+    record["eta"] = 0
+    assert record["eta"] == 0
+    assert "eta" in record
+    assert len(record) == 3
+    assert list(record) == [field for field in FIELDS if field in ("temp_bed", "printer_name", "eta")]
+    assert record == {"temp_bed": 60, "printer_name": "MK4", "eta": 0}
+
+    del record["eta"]
+    assert "eta" not in record
+    with pytest.raises(KeyError):
+        del record["eta"]
+    with pytest.raises(KeyError):
+        record["not a field"] = 1
+
+
+def test_copy_is_independent():
+    record = parse_status(STATUS_RESPONSE)
+    copy = record.copy()
+    copy["temp_nozzle"] = 100
+    assert record["temp_nozzle"] == 214.8
+    assert copy != record
+
+
+def test_diff_compares_field_by_field():
+    old = parse_status(STATUS_RESPONSE)
+    new = old.copy()
+    assert new.diff(old) == set()
+    new["temp_nozzle"] = 215.2
+    new["progress"] = None
+    new.update(parse_info({"name": "MK4"}))
+    assert new.diff(old) == {"temp_nozzle", "progress", "printer_name"}
+    assert old.diff(new) == new.diff(old)
@@ -0,0 +1,127 @@
+import math
+import os
+import time
+
+from plugins.com_core447_PrusaLinkStatus.TelemetryLog import FIELDS, HEADER, RECORD, TelemetryLog, to_dict
+from plugins.com_core447_PrusaLinkStatus.TelemetryStore import (MAX_AGE, RAW_CAPACITY, REPLAY_SAMPLES_PER_BUCKET, TIERS,
+                                                                TelemetryStore)
+
+
+def test_round_trip(tmp_path):
+    log = TelemetryLog(str(tmp_path), "192.168.1.5:80")
+    log.append(100.0, {"temp_nozzle": 215.5, "progress": 12, "state": "PRINTING"})
+    log.append(101.0, {"temp_nozzle": 216.0})
+    log.close()
+
+    records = list(log.read())
+    assert [timestamp for timestamp, _ in records] == [100.0, 101.0]
+    assert to_dict(records[0][1]) == {"temp_nozzle": 215.5, "progress": 12}
+    # Missing fields are stored as NaN and dropped again
+    assert to_dict(records[1][1]) == {"temp_nozzle": 216.0}
+    assert len(records[0][1]) == len(FIELDS)
+    assert os.path.basename(log.get_path()) == "192.168.1.5_80.bin"
+
+
+def test_read_since_skips_older_records(tmp_path):
+    log = TelemetryLog(str(tmp_path), "printer")
+    for i in range(100):
+        log.append(float(i), {"temp_bed": i})
+    log.close()
+    assert [timestamp for timestamp, _ in log.read(since=95.5)] == [96, 97, 98, 99]
+    assert list(log.read(since=1000)) == []
+
+
+def test_partial_record_is_truncated_on_open(tmp_path):
+    log = TelemetryLog(str(tmp_path), "printer")
+    log.append(1.0, {"temp_bed": 60})
+    log.append(2.0, {"temp_bed": 61})
+    log.close()
+    # A crash in the middle of a write leaves half a record behind
+    with open(log.get_path(), "ab") as file:
+        file.write(b"\x00" * (RECORD.size // 2))
+
+    log.append(3.0, {"temp_bed": 62})
+    log.close()
+    assert os.path.getsize(log.get_path()) == HEADER.size + 3 * RECORD.size
+    assert [(timestamp, to_dict(values)) for timestamp, values in log.read()] == [
+        (1.0, {"temp_bed": 60}), (2.0, {"temp_bed": 61}), (3.0, {"temp_bed": 62})]
+
+
+def test_rotation_keeps_backups_oldest_first(tmp_path):
+    max_bytes = HEADER.size + 10 * RECORD.size
+    log = TelemetryLog(str(tmp_path), "printer", max_bytes=max_bytes, backups=2)
+    for i in range(45):
+        log.append(float(i), {"progress": i})
+    log.close()
+
+    assert len(log.get_paths()) == 3
+    assert all(os.path.getsize(path) <= max_bytes for path in log.get_paths())
+    timestamps = [timestamp for timestamp, _ in log.read()]
+    # The oldest file fell out, what is left is in time order
+    assert timestamps == sorted(timestamps)
+    assert timestamps[-1] == 44
+    assert len(timestamps) == 25
+
+
+def test_unknown_format_is_skipped(tmp_path):
+    log = TelemetryLog(str(tmp_path), "printer")
+    with open(log.get_path(), "wb") as file:
+        file.write(HEADER.pack(b"XXXX", 1, RECORD.size, len(FIELDS)) + RECORD.pack(1.0, *([math.nan] * len(FIELDS))))
+    assert list(log.read()) == []
+
+
+def test_strided_read_keeps_its_step_across_files(tmp_path):
+    log = TelemetryLog(str(tmp_path), "printer", max_bytes=HEADER.size + 10 * RECORD.size, backups=3)
+    for i in range(35):
+        log.append(float(i), {"progress": i})
+    log.close()
+
+    assert log.count() == 35
+    assert log.count(since=30) == 5
+    assert [timestamp for timestamp, _ in log.read(step=4)] == list(range(0, 35, 4))
+    assert [timestamp for timestamp, _ in log.read(since=3, step=7, skip=2)] == [5, 12, 19, 26, 33]
+    assert [timestamp for timestamp, _ in log.read(skip=32)] == [32, 33, 34]
+
+
+def test_replay_fills_raw_samples_and_tiers_from_part_of_the_log(tmp_path):
+    log = TelemetryLog(str(tmp_path), "printer", max_bytes=64 * 1024 * 1024)
+    now = time.time()
+    # Two days at one poll per second
+    count = 2 * 24 * 60 * 60
+    for i in range(count):
+        log.append(now - count + i, {"temp_bed": 60 + i % 2})
+    log.close()
+
+    store = TelemetryStore()
+    read = store.load(log)
+    # The raw samples and a few samples per tier bucket, not the whole log
+    assert read < RAW_CAPACITY + sum(capacity * (REPLAY_SAMPLES_PER_BUCKET + 1) for _, capacity in TIERS)
+    timestamps, values = store.get_window("temp_bed", now - 60)
+    assert len(timestamps) == 61
+    assert set(values) == {60, 61}
+    timestamps, values = store.get_window("temp_bed", now - MAX_AGE)
+    assert timestamps[0] <= now - MAX_AGE + TIERS[-1][0]
+    assert all(60 <= value <= 61 for value in values)
+
+
+def test_samples_recorded_during_the_replay_follow_it(tmp_path):
+    log = TelemetryLog(str(tmp_path), "printer")
+    now = time.time()
+    for i in range(10):
+        log.append(now - 10 + i, {"temp_bed": i})
+    log.close()
+
+    store = TelemetryStore()
+    store.hold()
+    # Polled while the replay runs, the log already has it as well
+    log.append(now + 1, {"temp_bed": 100})
+    log.close()
+    store.record({"temp_bed": 100}, now + 1)
+    assert store.is_empty()
+
+    store.load(log)
+    timestamps, values = store.get_window("temp_bed", now - 60)
+    assert values == list(range(10)) + [100]
+    assert timestamps == sorted(timestamps)
+    store.record({"temp_bed": 101}, now + 2)
+    assert store.get_window("temp_bed", now)[1] == [9, 100, 101]